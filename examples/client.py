@@ -9,7 +9,7 @@ from lume_model.utils import variables_from_yaml
 from lume_epics.client.widgets.plots import ImagePlot, Striptool
 from lume_epics.client.widgets.tables import ValueTable
 from lume_epics.client.widgets.controls import build_sliders, EntryTable
-from lume_epics.client.controller import Controller
+from lume_epics.client.scheduler import DashboardScheduler, DEFAULT_IMAGE_INTERVAL
 
 prefix = "test"
 
@@ -108,9 +108,17 @@ curdoc().add_root(
     )
 )
 
-curdoc().add_periodic_callback(image_plot.update, 250)
+# run all widget updates from a single periodic callback
+scheduler = DashboardScheduler(controller)
+scheduler.add(
+    image_plot.update, interval=DEFAULT_IMAGE_INTERVAL, pvnames=["output1"]
+)
 for slider in sliders:
-    curdoc().add_periodic_callback(slider.update, 250)
-curdoc().add_periodic_callback(striptool.update, 250)
-curdoc().add_periodic_callback(update_div_text, 250)
-curdoc().add_periodic_callback(value_table.update, 250)
+    scheduler.add(slider.update, pvnames=[slider.pvname])
+scheduler.add(striptool.update)
+scheduler.add(update_div_text)
+scheduler.add(
+    value_table.update, pvnames=[variable.name for variable in input_variables]
+)
+
+curdoc().add_periodic_callback(scheduler.tick, scheduler.period)
@@ -2,17 +2,16 @@
 The lume-epics controller serves as the intermediary between variable monitors
 and process variables served over EPICS.
 """
-from typing import Union, List
+from typing import Union, List, Dict, Tuple, Callable
 import numpy as np
 import copy
 import logging
+import time
 from datetime import datetime
 from collections import defaultdict
 from functools import partial
-from epics import PV
 import threading
 import sys
-from p4p.client.thread import Context, Disconnected
 
 
 logger = logging.getLogger(__name__)
@@ -27,6 +26,20 @@ DEFAULT_IMAGE_DATA = {
 
 DEFAULT_SCALAR_VALUE = 0
 
+# Area detector style children used to serve image and array variables over
+# Channel Access
+CA_IMAGE_CHILDREN = [
+    "ArrayData_RBV",
+    "ArraySizeX_RBV",
+    "ArraySizeY_RBV",
+    "MinX_RBV",
+    "MinY_RBV",
+    "MaxX_RBV",
+    "MaxY_RBV",
+]
+
+CA_ARRAY_CHILDREN = ["ArrayData_RBV", "ArraySize_RBV"]
+
 
 class Controller:
     """
@@ -41,7 +54,21 @@ class Controller:
 
         _context (Context): P4P threaded context instance for use with pvAccess.
 
-        _pv_registry (dict): Registry mapping pvname to dict of value and pv monitor
+        _pv_registry (dict): Registry mapping pvname to dict of value, pv monitor,
+            and connection state
+
+        _connection_condition (threading.Condition): Condition notified when a
+            process variable receives its first value
+
+        _update_condition (threading.Condition): Condition notified on monitor
+            updates while put_and_wait calls are waiting
+
+        _update_waiters (int): Number of threads waiting on monitor updates
+
+        _callbacks (tuple): Callbacks executed on monitor updates
+
+        _payloads (dict): Maps payload key to the process variable versions and
+            payload last built by cached_payload
 
         _input_pvs (dict): Dictionary of input process variables
 
@@ -49,15 +76,22 @@ class Controller:
 
         _prefix (str): Prefix to use for accessing variables
 
-        last_input_update (datetime): Last update of input variables
+        last_input_update (str): Formatted time of the last input variable update
 
-        last_output_update (datetime): Last update of output variables
+        last_output_update (str): Formatted time of the last output variable update
+
+        _last_input_time (float): Time of the last input update in seconds since epoch
+
+        _last_output_time (float): Time of the last output update in seconds since epoch
 
     Example:
         ```
         # create PVAcess controller
         controller = Controller("pva")
 
+        # block until all monitors have received an initial value
+        status = controller.wait_for_connection(timeout=5.0)
+
         value = controller.get_value("scalar_input")
         image_value = controller.get_image("image_input")
 
@@ -86,41 +120,235 @@ class Controller:
         self._input_pvs = input_pvs
         self._output_pvs = output_pvs
         self._prefix = prefix
-        self.last_input_update = ""
-        self.last_output_update = ""
+        self._last_input_time = None
+        self._last_output_time = None
+        self._connection_condition = threading.Condition()
+        self._update_condition = threading.Condition()
+        self._update_waiters = 0
+        self._callbacks = ()
+        self._payloads = {}
+        self._payload_lock = threading.Lock()
+        self._disconnected = None
 
         # initalize context for pva
-        self._context = None
-        if self._protocol == "pva":
-            self._context = Context("pva")
+        self._context = self._create_context()
 
-        # initialize controller
+        # initialize controller, creating all monitors in a single batch
+        pvnames = []
         for variable in {**input_pvs, **output_pvs}.values():
-            if variable.variable_type == "image":
-                self.get_image(variable.name)
+            pvnames += self._registry_names(variable.name)
+
+        self._set_up_pv_monitors(pvnames)
 
-            elif variable.variable_type == "array":
-                self.get_array(variable.name)
+    @property
+    def last_input_update(self) -> str:
+        """Formatted time of the last input variable update.
 
-            else:
-                self.get_value(variable.name)
+        """
+        if self._last_input_time is None:
+            return ""
 
-    def _ca_value_callback(self, pvname, value, *args, **kwargs):
+        return datetime.fromtimestamp(self._last_input_time).strftime(
+            "%m/%d/%Y, %H:%M:%S"
+        )
+
+    @property
+    def last_output_update(self) -> str:
+        """Formatted time of the last output variable update.
+
+        """
+        if self._last_output_time is None:
+            return ""
+
+        return datetime.fromtimestamp(self._last_output_time).strftime(
+            "%m/%d/%Y, %H:%M:%S"
+        )
+
+    def _create_context(self):
+        """Creates the client context used by the protocol. Channel Access uses the
+        pyepics global context.
+
+        """
+        if self._protocol == "pva":
+            # protocol backends are imported on first use
+            from p4p.client.thread import Context, Disconnected
+
+            # kept for the monitor callback, which runs on every update
+            self._disconnected = Disconnected
+
+            return Context("pva")
+
+        return None
+
+    def _registry_names(self, pvname: str) -> List[str]:
+        """Returns the names of the registered process variables composing a
+        variable. Channel Access images and arrays are served as multiple area
+        detector process variables.
+
+        Args:
+            pvname (str): Variable name
+
+        """
+        variable = self._input_pvs.get(pvname, self._output_pvs.get(pvname))
+
+        if variable is None or self._protocol != "ca":
+            return [pvname]
+
+        if variable.variable_type == "image":
+            return [f"{pvname}:{child}" for child in CA_IMAGE_CHILDREN]
+
+        elif variable.variable_type == "array":
+            return [f"{pvname}:{child}" for child in CA_ARRAY_CHILDREN]
+
+        return [pvname]
+
+    def variable_name(self, pvname: str) -> str:
+        """Returns the name of the variable served by a registered process variable,
+        e.g. the image variable of a Channel Access ArrayData_RBV process variable.
+
+        Args:
+            pvname (str): Registered process variable name
+
+        """
+        if self._protocol == "ca":
+            variable_name, _, child = pvname.rpartition(":")
+
+            if variable_name and (
+                child in CA_IMAGE_CHILDREN or child in CA_ARRAY_CHILDREN
+            ):
+                return variable_name
+
+        return pvname
+
+    def _mark_connected(self, pvname: str) -> None:
+        """Records the first value received by a process variable monitor and
+        notifies threads waiting on connection.
+
+        Args:
+            pvname (str): Process variable name
+
+        """
+        entry = self._pv_registry[pvname]
+        entry["connected"] = True
+
+        if entry["connect_time"] is None:
+            entry["connect_time"] = time.time()
+
+        with self._connection_condition:
+            self._connection_condition.notify_all()
+
+    def _notify_update(self) -> None:
+        """Wakes threads blocked in put_and_wait. Only takes the lock when a
+        waiter is registered so monitor callbacks stay cheap.
+
+        """
+        if self._update_waiters:
+            with self._update_condition:
+                self._update_condition.notify_all()
+
+    def _update_value(self, pvname: str, value, timestamp: float) -> None:
+        """Stores a monitor update in the registry and dispatches it to registered
+        callbacks.
+
+        Args:
+            pvname (str): Registered process variable name
+
+            value (Union[np.ndarray, float]): Value received by the monitor
+
+            timestamp (float): Server timestamp of the update in seconds since epoch
+
+        """
+        now = time.time()
+        entry = self._pv_registry[pvname]
+        entry["value"] = value
+        entry["version"] += 1
+        entry["bytes"] += getattr(value, "nbytes", 8)
+
+        # track inter-arrival mean and variance
+        last_update = entry["last_update"]
+        if last_update is None:
+            entry["first_update"] = now
+
+        else:
+            n_intervals = entry["version"] - 1
+            interval = now - last_update
+            delta = interval - entry["interval_mean"]
+            entry["interval_mean"] += delta / n_intervals
+            entry["interval_m2"] += delta * (interval - entry["interval_mean"])
+
+        entry["last_update"] = now
+
+        if not entry["connected"]:
+            self._mark_connected(pvname)
+
+        self._notify_update()
+
+        if pvname in self._input_pvs:
+            self._last_input_time = now
+
+        if pvname in self._output_pvs:
+            self._last_output_time = now
+
+        for callback in self._callbacks:
+            callback(pvname, value, timestamp)
+
+    def _set_disconnected(self, pvname: str) -> None:
+        """Marks a process variable as disconnected and dispatches a None value to
+        registered callbacks.
+
+        Args:
+            pvname (str): Registered process variable name
+
+        """
+        entry = self._pv_registry[pvname]
+        entry["value"] = None
+
+        if entry["connected"]:
+            entry["disconnects"] += 1
+
+        entry["connected"] = False
+
+        for callback in self._callbacks:
+            callback(pvname, None, time.time())
+
+    def add_callback(self, callback: Callable) -> None:
+        """Register a callback executed on every monitor update. Callbacks are
+        called from the monitor threads with the registered process variable name,
+        the value, and the server timestamp of the update. Disconnects are
+        reported with a value of None.
+
+        Args:
+            callback (Callable): Function accepting pvname, value, and timestamp
+
+        """
+        # replace rather than mutate so monitor threads can iterate safely
+        self._callbacks = self._callbacks + (callback,)
+
+    def remove_callback(self, callback: Callable) -> None:
+        """Remove a callback registered with add_callback.
+
+        Args:
+            callback (Callable): Registered callback
+
+        """
+        self._callbacks = tuple(cb for cb in self._callbacks if cb != callback)
+
+    def _ca_value_callback(self, pvname, value, *args, timestamp=None, **kwargs):
         """Callback executed by Channel Access monitor.
 
         Args:
             pvname (str): Process variable name
 
             value (Union[np.ndarray, float]): Value to assign to process variable.
+
+            timestamp (float): Server timestamp of the update
         """
         pvname = pvname.replace(f"{self._prefix}:", "")
-        self._pv_registry[pvname]["value"] = value
 
-        if pvname in self._input_pvs:
-            self.last_input_update = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+        if timestamp is None:
+            timestamp = time.time()
 
-        if pvname in self._output_pvs:
-            self.last_output_update = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+        self._update_value(pvname, value, timestamp)
 
     def _ca_connection_callback(self, *, pvname, conn, pv):
         """Callback used for monitoring connection and setting values to None on disconnect.
@@ -129,7 +357,7 @@ class Controller:
         pvname = pvname.replace(f"{self._prefix}:", "")
 
         if not conn:
-            self._pv_registry[pvname]["value"] = None
+            self._set_disconnected(pvname)
 
     def _pva_value_callback(self, pvname, value):
         """Callback executed by pvAccess monitor.
@@ -139,16 +367,15 @@ class Controller:
 
             value (Union[np.ndarray, float]): Value to assign to process variable.
         """
-        if isinstance(value, Disconnected):
-            self._pv_registry[pvname]["value"] = None
+        if isinstance(value, self._disconnected):
+            self._set_disconnected(pvname)
+
         else:
-            self._pv_registry[pvname]["value"] = value
+            timestamp = getattr(value, "timestamp", None)
+            if not timestamp:
+                timestamp = time.time()
 
-        if pvname in self._input_pvs:
-            self.last_input_update = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
-
-        if pvname in self._output_pvs:
-            self.last_output_update = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+            self._update_value(pvname, value, timestamp)
 
     def _set_up_pv_monitor(self, pvname):
         """Set up process variable monitor.
@@ -157,35 +384,165 @@ class Controller:
             pvname (str): Process variable name
 
         """
-        if pvname in self._pv_registry:
+        self._set_up_pv_monitors([pvname])
+
+    def _set_up_pv_monitors(self, pvnames: List[str]) -> None:
+        """Set up monitors for a batch of process variables. Channels are created
+        without waiting on connection and the requests are flushed once for the
+        whole batch. Use wait_for_connection to block on the initial values.
+
+        Args:
+            pvnames (List[str]): Process variable names
+
+        """
+        pvnames = [pvname for pvname in pvnames if pvname not in self._pv_registry]
+
+        if not pvnames:
             return
 
+        # populate registry s.t. connection callbacks find their entries
+        request_time = time.time()
+        for pvname in pvnames:
+            self._pv_registry[pvname] = {
+                "pv": None,
+                "value": None,
+                "connected": False,
+                "version": 0,
+                "request_time": request_time,
+                "connect_time": None,
+                "first_update": None,
+                "last_update": None,
+                "interval_mean": 0.0,
+                "interval_m2": 0.0,
+                "disconnects": 0,
+                "bytes": 0,
+            }
+
+        self._create_monitors(pvnames)
+
+    def _create_monitors(self, pvnames: List[str]) -> None:
+        """Create the protocol monitors for registered process variables.
+
+        Args:
+            pvnames (List[str]): Process variable names
+
+        """
         if self._protocol == "ca":
-            # add to registry (must exist for connection callback)
-            self._pv_registry[pvname] = {"pv": None, "value": None}
-
-            # create the pv
-            pv_obj = PV(
-                f"{self._prefix}:{pvname}",
-                callback=self._ca_value_callback,
-                connection_callback=self._ca_connection_callback,
-            )
+            from epics import PV, ca
+
+            for pvname in pvnames:
+                # create the pv
+                pv_obj = PV(
+                    f"{self._prefix}:{pvname}",
+                    callback=self._ca_value_callback,
+                    connection_callback=self._ca_connection_callback,
+                )
+
+                # update registry
+                self._pv_registry[pvname]["pv"] = pv_obj
 
-            # update registry
-            self._pv_registry[pvname]["pv"] = pv_obj
+            # send all channel creation requests at once
+            ca.flush_io()
 
         elif self._protocol == "pva":
-            cb = partial(self._pva_value_callback, pvname)
-            # populate registry s.t. initially disconnected will populate
-            self._pv_registry[pvname] = {"pv": None, "value": None}
+            for pvname in pvnames:
+                cb = partial(self._pva_value_callback, pvname)
+
+                # create the monitor obj
+                mon_obj = self._context.monitor(
+                    f"{self._prefix}:{pvname}", cb, notify_disconnect=True
+                )
+
+                # update registry with the monitor
+                self._pv_registry[pvname]["pv"] = mon_obj
+
+    def wait_for_connection(self, timeout: float = 5.0) -> dict:
+        """Blocks until all registered process variables have received an initial
+        value or the timeout expires.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            dict: Dictionary with keys "elapsed" (seconds spent waiting),
+                "connection_times" (maps pvname to seconds between monitor creation
+                and first value), and "failed" (list of unconnected pvnames).
 
-            # create the monitor obj
-            mon_obj = self._context.monitor(
-                f"{self._prefix}:{pvname}", cb, notify_disconnect=True
+        """
+        start = time.time()
+        deadline = start + timeout
+
+        with self._connection_condition:
+            while True:
+                pending = [
+                    pvname
+                    for pvname, entry in list(self._pv_registry.items())
+                    if not entry["connected"]
+                ]
+                remaining = deadline - time.time()
+
+                if not pending or remaining <= 0:
+                    break
+
+                self._connection_condition.wait(remaining)
+
+        connection_times = {
+            pvname: entry["connect_time"] - entry["request_time"]
+            for pvname, entry in list(self._pv_registry.items())
+            if entry["connect_time"] is not None
+        }
+
+        if pending:
+            logger.warning(
+                "%s process variables failed to connect within %s seconds.",
+                len(pending),
+                timeout,
             )
 
-            # update registry with the monitor
-            self._pv_registry[pvname]["pv"] = mon_obj
+        return {
+            "elapsed": time.time() - start,
+            "connection_times": connection_times,
+            "failed": pending,
+        }
+
+    def stats(self) -> Dict[str, dict]:
+        """Returns a snapshot of monitor statistics for each registered process
+        variable.
+
+        Returns:
+            dict: Maps pvname to dictionary with keys "count" (number of updates),
+                "rate" (mean updates per second), "since_last" (seconds since the last
+                update), "jitter" (standard deviation of inter-arrival time in
+                seconds), "disconnects" (number of disconnects), and "bytes" (bytes
+                received).
+
+        """
+        now = time.time()
+        stats = {}
+
+        for pvname, entry in list(self._pv_registry.items()):
+            count = entry["version"]
+            first_update = entry["first_update"]
+            last_update = entry["last_update"]
+
+            rate = 0.0
+            if count > 1 and last_update > first_update:
+                rate = (count - 1) / (last_update - first_update)
+
+            jitter = 0.0
+            if count > 2:
+                jitter = np.sqrt(entry["interval_m2"] / (count - 1))
+
+            stats[pvname] = {
+                "count": count,
+                "rate": rate,
+                "since_last": now - last_update if last_update is not None else None,
+                "jitter": float(jitter),
+                "disconnects": entry["disconnects"],
+                "bytes": entry["bytes"],
+            }
+
+        return stats
 
     def get(self, pvname: str) -> np.ndarray:
         """
@@ -356,7 +713,7 @@ class Controller:
             timeout (float): Operation timeout in seconds
 
         """
-        self._set_up_pv_monitor(pvname)
+        self._set_up_pv_monitors(self._registry_names(pvname))
 
         # allow no puts before a value has been collected
         registered = self.get_image(pvname)
@@ -432,7 +789,7 @@ class Controller:
             timeout (float): Operation timeout in seconds
 
         """
-        self._set_up_pv_monitor(pvname)
+        self._set_up_pv_monitors(self._registry_names(pvname))
 
         # allow no puts before a value has been collected
         registered = self.get_array(pvname)
@@ -457,6 +814,176 @@ class Controller:
         else:
             logger.debug(f"No initial value set for {pvname}.")
 
+    def get_version(self, pvname: str) -> int:
+        """Returns the number of monitor updates received for a variable. For
+        Channel Access images and arrays, updates to any of the component process
+        variables are counted.
+
+        Args:
+            pvname (str): Variable name
+
+        """
+        version = 0
+        for registry_name in self._registry_names(pvname):
+            entry = self._pv_registry.get(registry_name)
+
+            if entry is not None:
+                version += entry["version"]
+
+        return version
+
+    def cached_payload(self, key, pvnames: List[str], build: Callable):
+        """Returns a payload built from process variable values, rebuilding it only
+        when the variables have changed. Widgets displaying the same variables share
+        payloads, e.g. between bokeh sessions using the same controller. Payloads
+        are shared and must not be modified.
+
+        Args:
+            key: Hashable key identifying the payload and how it is built
+
+            pvnames (List[str]): Variables the payload is built from
+
+            build (Callable): Function returning the payload
+
+        """
+        # versions are read before building s.t. concurrent updates force a rebuild
+        versions = tuple(self.get_version(pvname) for pvname in pvnames)
+
+        with self._payload_lock:
+            cached = self._payloads.get(key)
+
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+        payload = build()
+
+        with self._payload_lock:
+            self._payloads[key] = (versions, payload)
+
+        return payload
+
+    def _get_variable_value(self, pvname: str):
+        """Gets the value of a variable using the access method for its type.
+
+        Args:
+            pvname (str): Variable name
+
+        """
+        variable = self._input_pvs.get(pvname, self._output_pvs.get(pvname))
+
+        if variable is not None and variable.variable_type == "image":
+            return self.get_image(pvname)
+
+        elif variable is not None and variable.variable_type == "array":
+            return self.get_array(pvname)
+
+        return self.get_value(pvname)
+
+    def put_and_wait(
+        self,
+        inputs: Dict[str, Union[float, np.ndarray]],
+        outputs: List[str],
+        timeout: float = 5.0,
+        sequence_pv: str = None,
+    ) -> Tuple[dict, float]:
+        """Assign input values and block until monitor updates have been received
+        for all of the listed outputs.
+
+        Args:
+            inputs (Dict[str, Union[float, np.ndarray]]): Maps input variable name
+                to value to assign.
+
+            outputs (List[str]): Names of the output variables to wait on.
+
+            timeout (float): Maximum time to wait for the outputs in seconds
+
+            sequence_pv (str): Optional name of a process variable incremented by the
+                server on each evaluation. When provided, the call additionally waits
+                for the sequence marker to advance so that updates from evaluations
+                started before the put are not matched.
+
+        Returns:
+            dict: Maps output variable name to updated value.
+            float: Round trip latency in seconds measured from the first put to the
+                last awaited update.
+
+        Raises:
+            TimeoutError: Outputs were not updated within the timeout.
+
+        """
+        watched = list(outputs)
+        sequence_value = None
+        if sequence_pv is not None:
+            self._set_up_pv_monitor(sequence_pv)
+            sequence_value = self.get(sequence_pv)
+            watched.append(sequence_pv)
+
+        with self._update_condition:
+            self._update_waiters += 1
+
+        try:
+            # record versions prior to the put
+            versions = {pvname: self.get_version(pvname) for pvname in watched}
+
+            start = time.time()
+            for pvname, value in inputs.items():
+                variable = self._input_pvs.get(pvname)
+
+                if variable is not None and variable.variable_type == "image":
+                    self.put_image(pvname, image_array=value, timeout=timeout)
+
+                elif variable is not None and variable.variable_type == "array":
+                    self.put_array(pvname, array=value, timeout=timeout)
+
+                else:
+                    self.put(pvname, value, timeout=timeout)
+
+            deadline = start + timeout
+
+            with self._update_condition:
+                while True:
+                    pending = [
+                        pvname
+                        for pvname in watched
+                        if self.get_version(pvname) <= versions[pvname]
+                    ]
+
+                    # sequence marker must advance past the value at put time
+                    if not pending and sequence_pv is not None:
+                        marker = self.get(sequence_pv)
+                        if sequence_value is not None and (
+                            marker is None or marker <= sequence_value
+                        ):
+                            versions[sequence_pv] = self.get_version(sequence_pv)
+                            pending = [sequence_pv]
+
+                    if not pending:
+                        break
+
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"No update received for {pending} within {timeout} seconds."
+                        )
+
+                    self._update_condition.wait(remaining)
+
+            latency = time.time() - start
+
+        finally:
+            with self._update_condition:
+                self._update_waiters -= 1
+
+        values = {pvname: self._get_variable_value(pvname) for pvname in outputs}
+
+        return values, latency
+
     def close(self):
-        if self._protocol == "pva":
+        if self._context is not None:
             self._context.close()
+
+        # release Channel Access subscriptions
+        if self._protocol == "ca":
+            for entry in self._pv_registry.values():
+                if entry["pv"] is not None:
+                    entry["pv"].disconnect()
@@ -0,0 +1,141 @@
+"""
+The hub module shares controllers between the bokeh sessions of a server process.
+Sessions built from the same variables, prefix, and protocol use a single
+controller, so process variables are subscribed to once per process and widget
+payloads built from them are cached on the controller and shared between sessions.
+
+"""
+
+import logging
+import threading
+from typing import Dict
+
+from lume_epics.client.controller import Controller
+
+logger = logging.getLogger(__name__)
+
+
+class DataHub:
+    """
+    Reference counted registry of shared controllers.
+
+    Attributes:
+        _controllers (dict): Maps controller key to the controller and the number of
+            sessions using it
+
+        _lock (threading.Lock): Lock protecting the registry
+
+    Example:
+        ```
+        hub = get_hub()
+
+        controller = hub.acquire_controller(
+            "ca", input_variables, output_variables, "test"
+        )
+
+        # on session end
+        hub.release_controller(controller)
+
+        ```
+
+    """
+
+    def __init__(self) -> None:
+        self._controllers = {}
+        self._lock = threading.Lock()
+
+    def _key(
+        self, protocol: str, input_variables: dict, output_variables: dict, prefix: str
+    ) -> tuple:
+        return (
+            protocol,
+            prefix,
+            tuple(sorted(input_variables)),
+            tuple(sorted(output_variables)),
+        )
+
+    def acquire_controller(
+        self, protocol: str, input_variables: dict, output_variables: dict, prefix: str
+    ) -> Controller:
+        """
+        Returns the shared controller for the variables, creating it on first use.
+        Each call must be matched by a call to release_controller.
+
+        Args:
+            protocol (str): Protocol for getting values from variables ("pva" for
+                pvAccess, "ca" for Channel Access)
+
+            input_variables (dict): Dict mapping input variable names to variable
+
+            output_variables (dict): Dict mapping output variable names to variable
+
+            prefix (str): Prefix used for accessing variables
+
+        """
+        key = self._key(protocol, input_variables, output_variables, prefix)
+
+        with self._lock:
+            entry = self._controllers.get(key)
+
+            if entry is None:
+                controller = Controller(
+                    protocol, input_variables, output_variables, prefix
+                )
+                entry = [controller, 0]
+                self._controllers[key] = entry
+
+            entry[1] += 1
+
+        return entry[0]
+
+    def release_controller(self, controller: Controller) -> None:
+        """
+        Release a controller returned by acquire_controller. The controller is
+        closed once no sessions are using it.
+
+        Args:
+            controller (Controller): Shared controller
+
+        """
+        with self._lock:
+            for key, entry in self._controllers.items():
+                if entry[0] is controller:
+                    entry[1] -= 1
+                    break
+
+            else:
+                logger.warning("Released controller not registered with hub.")
+                return
+
+            if entry[1] > 0:
+                return
+
+            del self._controllers[key]
+
+        controller.close()
+
+    def stats(self) -> Dict[tuple, int]:
+        """
+        Returns the number of sessions using each shared controller.
+
+        """
+        with self._lock:
+            return {key: entry[1] for key, entry in self._controllers.items()}
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub() -> DataHub:
+    """
+    Returns the data hub of the process.
+
+    """
+    global _hub
+
+    with _hub_lock:
+        if _hub is None:
+            _hub = DataHub()
+
+        return _hub
@@ -5,14 +5,19 @@ EPICs.
 
 """
 
-from datetime import datetime
 import time
 import logging
+import threading
 
 import numpy as np
 from typing import List, Dict, Tuple
 
 from lume_epics.client.controller import Controller
+from lume_epics.client.timeseries import (
+    TimeSeriesStore,
+    DEFAULT_CAPACITY,
+    DEFAULT_RESOLUTIONS,
+)
 from lume_model.variables import ImageVariable, ScalarVariable
 
 logger = logging.getLogger(__name__)
@@ -61,15 +66,25 @@ class PVImage:
 
         return self.controller.get_image(self.pvname)
 
+    def version(self) -> int:
+        """Returns the number of updates received for the image.
+
+        """
+        return self.controller.get_version(self.pvname)
+
 
 class PVTimeSeries:
     """
-    Monitor for time series variables.
+    Monitor for time series variables. By default, every update delivered to the
+    controller monitor callback is recorded with its server timestamp. Samples are
+    stored in fixed capacity ring buffers, so memory use is bounded and appends are
+    O(1). Downsampled min/max/mean levels may be maintained alongside the raw
+    samples for rendering long histories.
 
     Attributes:
-        time (np.ndarray): Array of times sampled.
+        time (np.ndarray): View of the sample times in seconds since epoch.
 
-        data (np.ndarray): Array of sampled data.
+        data (np.ndarray): View of the sampled data.
 
         variable (ScalarVariable): Variable monitored for time series.
 
@@ -79,9 +94,31 @@ class PVTimeSeries:
 
         pvname (str): Name of the process variable to access
 
+        capacity (int): Maximum number of samples stored
+
+        sample_on_poll (bool): Whether samples are collected on poll rather than
+            from monitor updates
+
+        decimation (int): Number of monitor updates reduced to each stored sample
+            (or min/max pair)
+
+        decimation_mode (str): "every" to keep every Nth update, "minmax" to keep the
+            minimum and maximum of each bucket of N updates
+
+        resolutions (Tuple[float]): Bucket widths in seconds of the downsampled levels
+
     """
 
-    def __init__(self, variable: ScalarVariable, controller: Controller,) -> None:
+    def __init__(
+        self,
+        variable: ScalarVariable,
+        controller: Controller,
+        capacity: int = DEFAULT_CAPACITY,
+        sample_on_poll: bool = False,
+        decimation: int = 1,
+        decimation_mode: str = "every",
+        resolutions: Tuple[float] = (),
+    ) -> None:
         """Initializes monitor attributes.
 
         Args:
@@ -89,11 +126,43 @@ class PVTimeSeries:
 
             controller (Controller): Controller object for accessing process variable.
 
+            capacity (int): Maximum number of samples stored
+
+            sample_on_poll (bool): Collect a sample on each poll instead of recording
+                monitor updates
+
+            decimation (int): Number of monitor updates reduced to each stored
+                sample
+
+            decimation_mode (str): "every" to keep every Nth update, "minmax" to keep
+                the minimum and maximum of each bucket of N updates
+
+            resolutions (Tuple[float]): Bucket widths in seconds of the downsampled
+                levels, e.g. DEFAULT_RESOLUTIONS. By default only raw samples are kept.
+
         """
+        if decimation < 1:
+            raise ValueError("Decimation must be a positive integer.")
+
+        if decimation_mode not in ["every", "minmax"]:
+            raise ValueError(
+                'Invalid decimation mode provided. Options are "every" and "minmax".'
+            )
+
         self.pvname = variable.name
         self.tstart = time.time()
-        self.time = np.array([])
-        self.data = np.array([])
+        self.capacity = capacity
+        self.sample_on_poll = sample_on_poll
+        self.decimation = decimation
+        self.decimation_mode = decimation_mode
+        self.resolutions = resolutions
+        self._store = TimeSeriesStore(capacity=capacity, resolutions=resolutions)
+        self._lock = threading.Lock()
+
+        # decimation bucket state
+        self._bucket_count = 0
+        self._bucket_min = None
+        self._bucket_max = None
 
         self.units = None
         # check if units has been set
@@ -102,23 +171,151 @@ class PVTimeSeries:
 
         self.controller = controller
 
+        if not sample_on_poll:
+            # seed with the current value
+            value = self.controller.get(self.pvname)
+            if value is not None:
+                self._append(time.time(), value)
+
+            self.controller.add_callback(self._monitor_callback)
+
+    @property
+    def time(self) -> np.ndarray:
+        return self._store.time.view()
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._store.data.view()
+
+    def _append(self, t: float, value: float) -> None:
+        with self._lock:
+            self._store.append(t, value)
+
+    def _monitor_callback(self, pvname: str, value, timestamp: float) -> None:
+        """Controller callback recording updates to the monitored process variable.
+        Disconnects are recorded as NaN so that they render as gaps.
+
+        Args:
+            pvname (str): Registered process variable name
+
+            value (float): Updated value
+
+            timestamp (float): Server timestamp of the update
+
+        """
+        if pvname != self.pvname:
+            return
+
+        if value is None:
+            self._reset_bucket()
+            self._append(timestamp, np.nan)
+            return
+
+        self._bucket_count += 1
+
+        if self.decimation_mode == "every":
+            if self._bucket_count == 1:
+                self._append(timestamp, value)
+
+            if self._bucket_count == self.decimation:
+                self._bucket_count = 0
+
+            return
+
+        # track min and max of the bucket as (timestamp, value)
+        if self._bucket_min is None or value < self._bucket_min[1]:
+            self._bucket_min = (timestamp, value)
+
+        if self._bucket_max is None or value > self._bucket_max[1]:
+            self._bucket_max = (timestamp, value)
+
+        if self._bucket_count == self.decimation:
+            for t, v in sorted({self._bucket_min, self._bucket_max}):
+                self._append(t, v)
+
+            self._reset_bucket()
+
+    def _reset_bucket(self) -> None:
+        self._bucket_count = 0
+        self._bucket_min = None
+        self._bucket_max = None
+
     def poll(self) -> Tuple[np.ndarray]:
         """
-        Collects image data via appropriate protocol and returns time and data.
+        Returns views of the stored times and data, collecting a sample first if
+        sampling on poll. Views are valid until the next sample.
 
         """
-        t = datetime.now()
+        if self.sample_on_poll:
+            t = time.time()
+            v = self.controller.get_value(self.pvname)
+            self._append(t, v)
 
-        v = self.controller.get_value(self.pvname)
+        with self._lock:
+            return self._store.time.view(), self._store.data.view()
 
-        self.time = np.append(self.time, t)
-        self.data = np.append(self.data, v)
+    def since(self, count: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Returns copies of the times and data appended after a total sample count,
+        collecting a sample first if sampling on poll. If the monitor has been reset
+        since the count, all stored samples are returned.
 
-        return self.time, self.data
+        Args:
+            count (int): Total sample count returned by the previous call
+
+        Returns:
+            np.ndarray: Times of the new samples
+            np.ndarray: Data of the new samples
+            int: Total sample count
+
+        """
+        if self.sample_on_poll:
+            self._append(time.time(), self.controller.get_value(self.pvname))
+
+        with self._lock:
+            total = self._store.time.count
+            n_new = total - count if total >= count else total
+
+            return (
+                self._store.time.view(n_new).copy(),
+                self._store.data.view(n_new).copy(),
+                total,
+            )
+
+    def window(
+        self, seconds: float, points: int, aggregate: str = "minmax"
+    ) -> Tuple[np.ndarray]:
+        """
+        Returns the times and data of the last time window at about the requested
+        number of points, using downsampled levels for long windows.
+
+        Args:
+            seconds (float): Length of the window in seconds
+
+            points (int): Approximate maximum number of points to return
+
+            aggregate (str): "minmax" to keep the envelope of downsampled buckets or
+                "mean" to use bucket means
+
+        """
+        if self.sample_on_poll:
+            self._append(time.time(), self.controller.get_value(self.pvname))
+
+        with self._lock:
+            return self._store.window(seconds, points, aggregate=aggregate)
 
     def reset(self) -> None:
-        self.time = np.array([])
-        self.data = np.array([])
+        with self._lock:
+            self._store.reset()
+
+        self._reset_bucket()
+
+    def close(self) -> None:
+        """Stop recording monitor updates.
+
+        """
+        if not self.sample_on_poll:
+            self.controller.remove_callback(self._monitor_callback)
 
 
 class PVScalar:
@@ -0,0 +1,554 @@
+"""
+The recorder module contains tools for capturing the monitor updates received by a
+lume_epics.client.controller.Controller and replaying them offline. Updates are
+appended to fixed-size, memory-mapped chunk files so recording does not allocate
+buffers in the monitor callbacks.
+
+Each chunk begins with a 16 byte header holding a magic string and the number of
+bytes used. Records consist of a 72 byte header followed by the payload, padded to
+8 byte alignment:
+
+    timestamp (f8) | pv index (u4) | nbytes (u4) | dtype code (u4) | ndim (u4) |
+    shape (4 x u4) | image limits (4 x f8) | payload
+
+"""
+
+import os
+import json
+import mmap
+import glob
+import time
+import logging
+import threading
+from typing import Iterator, Tuple, List
+
+import numpy as np
+
+from lume_epics.client.controller import Controller
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MAGIC = b"LUMEREC1"
+CHUNK_HEADER_BYTES = 16
+RECORD_HEADER_BYTES = 72
+MAX_NDIM = 4
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# dtypes supported for recorded values, indexed by the code stored in the header
+RECORD_DTYPES = [
+    np.dtype(dtype)
+    for dtype in ["<f8", "<f4", "<i8", "<i4", "<i2", "<i1", "<u8", "<u4", "<u2", "<u1", "?"]
+]
+_DTYPE_CODES = {dtype: code for code, dtype in enumerate(RECORD_DTYPES)}
+_FLOAT_CODE = _DTYPE_CODES[np.dtype("<f8")]
+_INT_CODE = _DTYPE_CODES[np.dtype("<i8")]
+
+# code used for disconnect records
+NONE_CODE = 255
+
+# image attributes stored for pvAccess NTNDArrays
+IMAGE_ATTRIBUTES = ["x_min", "y_min", "x_max", "y_max"]
+
+
+class AttribArray(np.ndarray):
+    """
+    Array carrying the attrib dictionary of a pvAccess NTNDArray.
+
+    """
+
+    attrib = None
+
+    def __array_finalize__(self, obj):
+        self.attrib = getattr(obj, "attrib", None)
+
+
+class Recorder:
+    """
+    Appends timestamped monitor updates to chunked, memory-mapped binary files.
+
+    Attributes:
+        directory (str): Directory holding the recording
+
+        chunk_size (int): Size of each chunk file in bytes
+
+        _pv_indices (dict): Maps registered pvname to index stored in records
+
+        _lock (threading.Lock): Lock serializing writes from monitor threads
+
+    Example:
+        ```
+        recorder = Recorder("recording")
+        recorder.attach(controller)
+
+        ...
+
+        recorder.close()
+
+        ```
+
+    """
+
+    def __init__(self, directory: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """Initialize the recorder and create the first chunk.
+
+        Args:
+            directory (str): Directory holding the recording. Created if missing.
+
+            chunk_size (int): Size of each chunk file in bytes
+
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self._controller = None
+        self._protocol = None
+        self._prefix = None
+        self._pvnames = []
+        self._pv_indices = {}
+        self._lock = threading.Lock()
+        self._chunk_index = -1
+        self._file = None
+        self._mmap = None
+        self._pos = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_chunk()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def attach(self, controller: Controller) -> None:
+        """Start recording the monitor updates received by a controller.
+
+        Args:
+            controller (Controller): Controller to record
+
+        """
+        self._controller = controller
+        self._protocol = controller._protocol
+        self._prefix = controller._prefix
+        self._write_index()
+        controller.add_callback(self.record)
+
+    def detach(self) -> None:
+        """Stop recording the attached controller.
+
+        """
+        if self._controller is not None:
+            self._controller.remove_callback(self.record)
+            self._controller = None
+
+    def record(self, pvname: str, value, timestamp: float) -> None:
+        """Append a monitor update to the recording. Used as the controller callback.
+
+        Args:
+            pvname (str): Registered process variable name
+
+            value (Union[np.ndarray, float]): Value received by the monitor
+
+            timestamp (float): Server timestamp of the update
+
+        """
+        pv_index = self._pv_indices.get(pvname)
+        if pv_index is None:
+            pv_index = self._register_pv(pvname)
+
+        array = None
+        attrib = None
+        ndim = 0
+
+        if value is None:
+            code = NONE_CODE
+            nbytes = 0
+
+        elif isinstance(value, np.ndarray):
+            code = _DTYPE_CODES.get(value.dtype)
+
+            if code is None or value.ndim > MAX_NDIM:
+                logger.debug("Unable to record %s of dtype %s.", pvname, value.dtype)
+                return
+
+            array = value
+            ndim = value.ndim
+            nbytes = value.nbytes
+            attrib = getattr(value, "attrib", None)
+
+        elif isinstance(value, (float, np.floating)):
+            code = _FLOAT_CODE
+            nbytes = 8
+
+        elif isinstance(value, (int, np.integer)):
+            code = _INT_CODE
+            nbytes = 8
+
+        else:
+            logger.debug("Unable to record %s of type %s.", pvname, type(value))
+            return
+
+        size = RECORD_HEADER_BYTES + ((nbytes + 7) & ~7)
+
+        with self._lock:
+            if self._mmap is None:
+                return
+
+            if self._pos + size > self.chunk_size:
+                if size > self.chunk_size - CHUNK_HEADER_BYTES:
+                    logger.warning(
+                        "Update to %s of %s bytes exceeds chunk size.", pvname, nbytes
+                    )
+                    return
+
+                self._close_chunk()
+                self._open_chunk()
+
+            pos = self._pos
+            f8_pos = pos // 8
+            u4_pos = pos // 4
+
+            # header
+            self._f8[f8_pos] = timestamp
+            self._u4[u4_pos + 2] = pv_index
+            self._u4[u4_pos + 3] = nbytes
+            self._u4[u4_pos + 4] = code
+            self._u4[u4_pos + 5] = ndim
+
+            if array is not None:
+                for i in range(MAX_NDIM):
+                    self._u4[u4_pos + 6 + i] = array.shape[i] if i < ndim else 0
+
+            for i, key in enumerate(IMAGE_ATTRIBUTES):
+                self._f8[f8_pos + 5 + i] = (
+                    attrib[key] if attrib is not None and key in attrib else np.nan
+                )
+
+            # payload
+            payload_pos = pos + RECORD_HEADER_BYTES
+            if array is not None:
+                if nbytes:
+                    if not array.flags.c_contiguous:
+                        array = np.ascontiguousarray(array)
+
+                    self._u1[payload_pos : payload_pos + nbytes] = array.reshape(
+                        -1
+                    ).view(np.uint8)
+
+            elif code == _FLOAT_CODE:
+                self._f8[payload_pos // 8] = value
+
+            elif code == _INT_CODE:
+                self._i8[payload_pos // 8] = value
+
+            self._pos = pos + size
+            self._u8[1] = self._pos
+
+    def close(self) -> None:
+        """Detach from the controller and close the current chunk.
+
+        """
+        self.detach()
+
+        with self._lock:
+            if self._mmap is not None:
+                self._close_chunk()
+
+        self._write_index()
+
+    def _register_pv(self, pvname: str) -> int:
+        """Assign a record index to a process variable and update the index file.
+
+        Args:
+            pvname (str): Registered process variable name
+
+        """
+        with self._lock:
+            if pvname not in self._pv_indices:
+                self._pv_indices[pvname] = len(self._pvnames)
+                self._pvnames.append(pvname)
+
+        self._write_index()
+        return self._pv_indices[pvname]
+
+    def _write_index(self) -> None:
+        """Write recording metadata to index.json.
+
+        """
+        index = {
+            "protocol": self._protocol,
+            "prefix": self._prefix,
+            "pvnames": list(self._pvnames),
+        }
+
+        with open(os.path.join(self.directory, "index.json"), "w") as f:
+            json.dump(index, f)
+
+    def _open_chunk(self) -> None:
+        """Create and map the next chunk file.
+
+        """
+        self._chunk_index += 1
+        filename = os.path.join(self.directory, f"chunk_{self._chunk_index:06d}.bin")
+
+        self._file = open(filename, "w+b")
+        self._file.truncate(self.chunk_size)
+        self._mmap = mmap.mmap(self._file.fileno(), self.chunk_size)
+
+        # views used to write records without intermediate buffers
+        self._u1 = np.frombuffer(self._mmap, dtype=np.uint8)
+        self._u4 = np.frombuffer(self._mmap, dtype="<u4")
+        self._f8 = np.frombuffer(self._mmap, dtype="<f8")
+        self._i8 = np.frombuffer(self._mmap, dtype="<i8")
+        self._u8 = np.frombuffer(self._mmap, dtype="<u8")
+
+        self._mmap[: len(CHUNK_MAGIC)] = CHUNK_MAGIC
+        self._pos = CHUNK_HEADER_BYTES
+        self._u8[1] = self._pos
+
+    def _close_chunk(self) -> None:
+        """Flush the current chunk and truncate it to the bytes used.
+
+        """
+        used = self._pos
+
+        # views must be released before the map can be closed
+        self._u1 = self._u4 = self._f8 = self._i8 = self._u8 = None
+        self._mmap.flush()
+        self._mmap.close()
+        self._mmap = None
+
+        self._file.truncate(used)
+        self._file.close()
+        self._file = None
+
+
+class Replayer:
+    """
+    Reader for recordings written by Recorder.
+
+    Attributes:
+        directory (str): Directory holding the recording
+
+        protocol (str): Protocol of the recorded controller
+
+        prefix (str): Prefix of the recorded controller
+
+        pvnames (List[str]): Recorded process variable names
+
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Load the recording index.
+
+        Args:
+            directory (str): Directory holding the recording
+
+        """
+        self.directory = directory
+
+        with open(os.path.join(directory, "index.json"), "r") as f:
+            index = json.load(f)
+
+        self.protocol = index["protocol"]
+        self.prefix = index["prefix"]
+        self.pvnames = index["pvnames"]
+
+    def records(self) -> Iterator[Tuple[float, str, object]]:
+        """Iterate over the recorded updates in order.
+
+        Returns:
+            Iterator[Tuple[float, str, object]]: Timestamp, process variable name, and
+                value of each update. Disconnects are returned with a value of None.
+
+        """
+        filenames = sorted(glob.glob(os.path.join(self.directory, "chunk_*.bin")))
+
+        for filename in filenames:
+            with open(filename, "rb") as f:
+                if os.fstat(f.fileno()).st_size < CHUNK_HEADER_BYTES:
+                    continue
+
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            try:
+                if data[: len(CHUNK_MAGIC)] != CHUNK_MAGIC:
+                    logger.warning("Skipping invalid chunk %s.", filename)
+                    continue
+
+                yield from self._read_chunk(data)
+
+            finally:
+                data.close()
+
+    def _read_chunk(self, data: mmap.mmap) -> Iterator[Tuple[float, str, object]]:
+        """Iterate over the records of a mapped chunk.
+
+        Args:
+            data (mmap.mmap): Mapped chunk file
+
+        """
+        used = int(np.frombuffer(data, dtype="<u8", count=2)[1])
+        pos = CHUNK_HEADER_BYTES
+
+        while pos + RECORD_HEADER_BYTES <= used:
+            f8 = np.frombuffer(data, dtype="<f8", count=9, offset=pos)
+            u4 = np.frombuffer(data, dtype="<u4", count=10, offset=pos)
+
+            timestamp = float(f8[0])
+            pvname = self.pvnames[int(u4[2])]
+            nbytes = int(u4[3])
+            code = int(u4[4])
+            ndim = int(u4[5])
+            payload_pos = pos + RECORD_HEADER_BYTES
+
+            if code == NONE_CODE:
+                value = None
+
+            elif ndim == 0:
+                scalar = np.frombuffer(
+                    data, dtype=RECORD_DTYPES[code], count=1, offset=payload_pos
+                )[0]
+                value = scalar.item()
+
+            else:
+                dtype = RECORD_DTYPES[code]
+                shape = tuple(int(dim) for dim in u4[6 : 6 + ndim])
+                value = (
+                    np.frombuffer(
+                        data,
+                        dtype=dtype,
+                        count=nbytes // dtype.itemsize,
+                        offset=payload_pos,
+                    )
+                    .reshape(shape)
+                    .copy()
+                )
+
+                limits = f8[5:9]
+                if not np.isnan(limits).all():
+                    value = value.view(AttribArray)
+                    value.attrib = {
+                        key: float(limit)
+                        for key, limit in zip(IMAGE_ATTRIBUTES, limits)
+                    }
+
+            yield timestamp, pvname, value
+
+            pos = payload_pos + ((nbytes + 7) & ~7)
+
+
+class ReplayController(Controller):
+    """
+    Controller-compatible object fed from a recording. Widgets and monitors built
+    with a ReplayController receive the recorded updates through the same registry
+    and callbacks used by a live controller. Puts are ignored.
+
+    Attributes:
+        _replayer (Replayer): Reader for the recording
+
+        _stop_event (threading.Event): Event marking playback shutdown
+
+        _play_thread (threading.Thread): Thread running background playback
+
+    Example:
+        ```
+        controller = ReplayController("recording", input_variables, output_variables)
+        controller.play(speed=10.0, block=False)
+
+        value_table = ValueTable(list(output_variables.values()), controller)
+
+        ```
+
+    """
+
+    def __init__(self, directory: str, input_pvs: dict, output_pvs: dict) -> None:
+        """Initialize the replay controller using the protocol and prefix of the
+        recording.
+
+        Args:
+            directory (str): Directory holding the recording
+
+            input_pvs (dict): Dict mapping input variable names to variable
+
+            output_pvs (dict): Dict mapping output variable names to variable
+
+        """
+        self._replayer = Replayer(directory)
+        self._stop_event = threading.Event()
+        self._play_thread = None
+        super().__init__(
+            self._replayer.protocol, input_pvs, output_pvs, self._replayer.prefix
+        )
+
+    def _create_context(self):
+        """No client context is used during replay.
+
+        """
+        return None
+
+    def _create_monitors(self, pvnames: List[str]) -> None:
+        """Registry entries are populated by playback rather than monitors.
+
+        """
+        pass
+
+    def play(self, speed: float = 1.0, block: bool = True) -> None:
+        """Feed the recorded updates through the controller.
+
+        Args:
+            speed (float): Playback speed relative to the original timing. Use None
+                to replay as fast as possible.
+
+            block (bool): Whether to block until playback completes or to play in a
+                background thread.
+
+        """
+        if not block:
+            self._play_thread = threading.Thread(
+                target=self.play, kwargs={"speed": speed, "block": True}, daemon=True
+            )
+            self._play_thread.start()
+            return
+
+        start = None
+        record_start = None
+
+        for timestamp, pvname, value in self._replayer.records():
+            if self._stop_event.is_set():
+                break
+
+            if start is None:
+                start = time.time()
+                record_start = timestamp
+
+            if speed:
+                delay = start + (timestamp - record_start) / speed - time.time()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+
+            if pvname not in self._pv_registry:
+                self._set_up_pv_monitors([pvname])
+
+            if value is None:
+                self._set_disconnected(pvname)
+
+            else:
+                self._update_value(pvname, value, timestamp)
+
+    def put(self, pvname, value: float, timeout=1.0) -> None:
+        logger.warning("Unable to put %s. Replay controller is read-only.", pvname)
+
+    def put_image(self, pvname, *args, **kwargs) -> None:
+        logger.warning("Unable to put %s. Replay controller is read-only.", pvname)
+
+    def put_array(self, pvname, *args, **kwargs) -> None:
+        logger.warning("Unable to put %s. Replay controller is read-only.", pvname)
+
+    def close(self) -> None:
+        """Stop background playback.
+
+        """
+        self._stop_event.set()
+
+        if self._play_thread is not None:
+            self._play_thread.join()
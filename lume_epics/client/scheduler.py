@@ -0,0 +1,370 @@
+"""
+The scheduler module contains the DashboardScheduler, which runs the periodic
+updates of all dashboard widgets from a single bokeh periodic callback or, in push
+mode, refreshes widgets as controller monitor updates arrive.
+
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List
+
+from bokeh.io import curdoc
+
+from lume_epics.client.controller import Controller
+
+logger = logging.getLogger(__name__)
+
+# tick period and default refresh intervals in milliseconds
+DEFAULT_PERIOD = 250
+DEFAULT_SCALAR_INTERVAL = 250
+DEFAULT_IMAGE_INTERVAL = 1000
+
+# minimum time between pushed refreshes of a widget in milliseconds
+DEFAULT_FRAME_BUDGET = 50
+
+
+class ScheduledUpdate:
+    """
+    Widget update registered with a scheduler.
+
+    Attributes:
+        callback (Callable): Widget update function
+
+        interval (int): Refresh interval in milliseconds
+
+        every (int): Number of ticks between updates
+
+        pvnames (List[str]): Process variables displayed by the widget
+
+        versions (tuple): Process variable versions at the last update
+
+        last_run (float): Monotonic time of the last pushed update
+
+    """
+
+    def __init__(
+        self, callback: Callable, interval: int, every: int, pvnames: List[str] = None
+    ):
+        self.callback = callback
+        self.interval = interval
+        self.every = every
+        self.pvnames = pvnames
+        self.versions = None
+        self.last_run = float("-inf")
+
+
+class DashboardScheduler:
+    """
+    Runs widget updates from a single periodic callback. Each tick runs the updates
+    due at that tick inside a single document hold, so all changes are sent to the
+    browser together. Updates registered with process variables are skipped if none
+    of the variables changed since the last update.
+
+    In push mode, updates registered with process variables are instead run when
+    the controller receives monitor updates for them. Refreshes are scheduled on the
+    document with add_next_tick_callback and coalesced, so each widget redraws at
+    most once per refresh interval or frame budget, whichever is longer. Updates
+    without process variables continue to run on the tick.
+
+    Attributes:
+        controller (Controller): Controller used for checking process variable
+            versions
+
+        period (int): Tick period in milliseconds
+
+        doc (Document): Bokeh document to hold during ticks. Defaults to the current
+            document.
+
+        push (bool): Whether to run updates on controller monitor updates
+
+        frame_budget (int): Minimum time between pushed refreshes of a widget in
+            milliseconds
+
+        _updates (List[ScheduledUpdate]): Registered updates
+
+        _subscribers (Dict[str, List[ScheduledUpdate]]): Maps variable name to the
+            pushed updates displaying it
+
+        _dirty (set): Pushed updates with pending monitor updates
+
+        _ticks (int): Number of ticks run
+
+    """
+
+    def __init__(
+        self,
+        controller: Controller = None,
+        period: int = DEFAULT_PERIOD,
+        doc=None,
+        push: bool = False,
+        frame_budget: int = DEFAULT_FRAME_BUDGET,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            controller (Controller): Controller used for checking process variable
+                versions
+
+            period (int): Tick period in milliseconds
+
+            doc (Document): Bokeh document to hold during ticks. Defaults to the
+                current document.
+
+            push (bool): Whether to run updates on controller monitor updates
+
+            frame_budget (int): Minimum time between pushed refreshes of a widget in
+                milliseconds
+
+        """
+        self.controller = controller
+        self.period = period
+        self.doc = doc
+        self.push = push
+        self.frame_budget = frame_budget
+        self._updates = []
+        self._subscribers = {}
+        self._dirty = set()
+        self._push_lock = threading.Lock()
+        self._push_pending = False
+        self._timeout_at = None
+        self._started = False
+        self._periodic_callback = None
+        self._ticks = 0
+        self._pushes = 0
+        self._skipped = 0
+        self._tick_time_total = 0.0
+        self._tick_time_last = 0.0
+        self._tick_time_max = 0.0
+        self._push_time_max = 0.0
+
+    def add(
+        self,
+        callback: Callable,
+        interval: int = DEFAULT_SCALAR_INTERVAL,
+        pvnames: List[str] = None,
+    ) -> None:
+        """
+        Register a widget update.
+
+        Args:
+            callback (Callable): Widget update function
+
+            interval (int): Refresh interval in milliseconds, rounded to a multiple of
+                the tick period
+
+            pvnames (List[str]): Process variables displayed by the widget. If
+                provided, the update is skipped when none have changed, or run on
+                monitor updates in push mode.
+
+        """
+        every = max(1, round(interval / self.period))
+        update = ScheduledUpdate(callback, interval, every, pvnames=pvnames)
+        self._updates.append(update)
+
+        for pvname in pvnames or []:
+            self._subscribers.setdefault(pvname, []).append(update)
+
+    def _pushed(self, update: ScheduledUpdate) -> bool:
+        return self.push and bool(update.pvnames)
+
+    def _changed(self, update: ScheduledUpdate) -> bool:
+        if not update.pvnames or self.controller is None:
+            return True
+
+        versions = tuple(
+            self.controller.get_version(pvname) for pvname in update.pvnames
+        )
+        if versions == update.versions:
+            return False
+
+        update.versions = versions
+        return True
+
+    def _run(self, updates: List[ScheduledUpdate]) -> None:
+        """
+        Run updates inside a single document hold, skipping unchanged widgets.
+
+        """
+        doc = self.doc or curdoc()
+        doc.hold("combine")
+
+        try:
+            for update in updates:
+                if not self._changed(update):
+                    self._skipped += 1
+                    continue
+
+                try:
+                    update.callback()
+
+                except Exception:
+                    logger.exception("Error running widget update %s", update.callback)
+
+        finally:
+            doc.unhold()
+
+    def tick(self) -> None:
+        """
+        Run the updates due at this tick.
+
+        """
+        start = time.perf_counter()
+        tick = self._ticks
+        self._ticks += 1
+
+        self._run(
+            [
+                update
+                for update in self._updates
+                if not tick % update.every and not self._pushed(update)
+            ]
+        )
+
+        elapsed = time.perf_counter() - start
+        self._tick_time_last = elapsed
+        self._tick_time_total += elapsed
+        if elapsed > self._tick_time_max:
+            self._tick_time_max = elapsed
+
+    def start(self, doc=None) -> None:
+        """
+        Register the tick with a document and, in push mode, subscribe to controller
+        monitor updates. Must be called from the document thread, e.g. while
+        building the document.
+
+        Args:
+            doc (Document): Bokeh document to update. Defaults to the current
+                document.
+
+        """
+        if self._started:
+            return
+
+        self.doc = doc or self.doc or curdoc()
+        self._periodic_callback = self.doc.add_periodic_callback(self.tick, self.period)
+
+        if self.push:
+            self.controller.add_callback(self._monitor_callback)
+
+            # draw the initial values
+            with self._push_lock:
+                self._dirty.update(u for u in self._updates if self._pushed(u))
+                self._push_pending = True
+
+            self.doc.add_next_tick_callback(self._push_updates)
+
+        self.doc.on_session_destroyed(self._session_destroyed)
+        self._started = True
+
+    def stop(self) -> None:
+        """
+        Unsubscribe from controller monitor updates and remove the tick from the
+        document.
+
+        """
+        if not self._started:
+            return
+
+        if self.push:
+            self.controller.remove_callback(self._monitor_callback)
+
+        try:
+            self.doc.remove_periodic_callback(self._periodic_callback)
+
+        except ValueError:
+            pass
+
+        self._started = False
+
+    def _session_destroyed(self, session_context) -> None:
+        self.stop()
+
+    def _monitor_callback(self, pvname: str, value, timestamp: float) -> None:
+        """
+        Controller callback marking widgets displaying the process variable for
+        refresh. Called from monitor threads.
+
+        """
+        updates = self._subscribers.get(self.controller.variable_name(pvname))
+        if not updates:
+            return
+
+        with self._push_lock:
+            self._dirty.update(updates)
+
+            if self._push_pending:
+                return
+
+            self._push_pending = True
+
+        # only thread safe way of scheduling work on the document
+        self.doc.add_next_tick_callback(self._push_updates)
+
+    def _push_updates(self) -> None:
+        """
+        Run pushed updates whose refresh interval has elapsed and schedule a
+        timeout for the remaining ones. Runs on the document thread.
+
+        """
+        start = time.perf_counter()
+        now = time.monotonic()
+
+        with self._push_lock:
+            self._push_pending = False
+            due = []
+            wait = None
+
+            for update in self._dirty:
+                remaining = (
+                    update.last_run
+                    + max(update.interval, self.frame_budget) / 1000
+                    - now
+                )
+
+                if remaining <= 0:
+                    due.append(update)
+
+                elif wait is None or remaining < wait:
+                    wait = remaining
+
+            self._dirty.difference_update(due)
+
+        for update in due:
+            update.last_run = now
+
+        if due:
+            self._run(due)
+            self._pushes += 1
+
+        # reschedule unless an earlier timeout is pending
+        if wait is not None and (
+            self._timeout_at is None or now + wait < self._timeout_at
+        ):
+            self._timeout_at = now + wait
+            self.doc.add_timeout_callback(self._push_timeout, wait * 1000)
+
+        elapsed = time.perf_counter() - start
+        if elapsed > self._push_time_max:
+            self._push_time_max = elapsed
+
+    def _push_timeout(self) -> None:
+        self._timeout_at = None
+        self._push_updates()
+
+    def stats(self) -> dict:
+        """
+        Returns tick statistics for tuning refresh intervals. Times are in seconds.
+
+        """
+        return {
+            "ticks": self._ticks,
+            "pushes": self._pushes,
+            "skipped": self._skipped,
+            "last": self._tick_time_last,
+            "mean": self._tick_time_total / self._ticks if self._ticks else 0.0,
+            "max": self._tick_time_max,
+            "push_max": self._push_time_max,
+        }
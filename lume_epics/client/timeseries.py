@@ -0,0 +1,415 @@
+"""
+The timeseries module contains fixed-memory buffers used by monitors for storing
+the history of process variable values.
+
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+DEFAULT_CAPACITY = 10000
+
+
+class RingBuffer:
+    """
+    Fixed capacity circular buffer. Each value is written to two positions of a
+    buffer twice the capacity so that the most recent values are always available
+    as a contiguous view. Views alias the buffer and are only valid until the next
+    append.
+
+    Attributes:
+        capacity (int): Maximum number of values stored
+
+        count (int): Total number of values appended since the last reset
+
+        _data (np.ndarray): Mirrored storage of length 2 * capacity
+
+        _index (int): Position of the next write
+
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, dtype=np.float64) -> None:
+        """Preallocate the buffer.
+
+        Args:
+            capacity (int): Maximum number of values stored
+
+            dtype (np.dtype): Data type of the stored values
+
+        """
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be positive.")
+
+        self.capacity = capacity
+        self.count = 0
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        self._index = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, value) -> None:
+        """Append a value, overwriting the oldest value once full.
+
+        Args:
+            value: Value to append
+
+        """
+        index = self._index
+        self._data[index] = value
+        self._data[index + self.capacity] = value
+
+        index += 1
+        self._index = 0 if index == self.capacity else index
+        self.count += 1
+
+    def view(self, n: int = None) -> np.ndarray:
+        """Returns a read-only view of the most recent values, oldest first.
+
+        Args:
+            n (int): Maximum number of values to return. Defaults to all stored values.
+
+        """
+        size = len(self)
+        if n is not None:
+            size = min(n, size)
+
+        end = self._index + self.capacity
+        view = self._data[end - size : end]
+        view.flags.writeable = False
+
+        return view
+
+    def reset(self) -> None:
+        """Remove all values.
+
+        """
+        self.count = 0
+        self._index = 0
+
+
+# bucket widths in seconds of the downsampled levels
+DEFAULT_RESOLUTIONS = (1.0, 10.0, 60.0, 600.0)
+DEFAULT_LEVEL_CAPACITY = 2000
+
+
+class DownsampledLevel:
+    """
+    Level of a time series pyramid. Values are aggregated into buckets of fixed
+    width, and the minimum, maximum, and mean of each completed bucket are stored in
+    ring buffers.
+
+    Attributes:
+        width (float): Bucket width in seconds
+
+        count (int): Total number of completed buckets
+
+    """
+
+    def __init__(self, width: float, capacity: int = DEFAULT_LEVEL_CAPACITY) -> None:
+        """Preallocate the level buffers.
+
+        Args:
+            width (float): Bucket width in seconds
+
+            capacity (int): Maximum number of buckets stored
+
+        """
+        self.width = width
+        self._min_time = RingBuffer(capacity)
+        self._min = RingBuffer(capacity)
+        self._max_time = RingBuffer(capacity)
+        self._max = RingBuffer(capacity)
+        self._mean = RingBuffer(capacity)
+        self._reset_bucket(None)
+
+    @property
+    def count(self) -> int:
+        return self._mean.count
+
+    def __len__(self) -> int:
+        return len(self._mean)
+
+    def _reset_bucket(self, bucket) -> None:
+        self._bucket = bucket
+        self._bucket_count = 0
+        self._bucket_sum = 0.0
+        self._bucket_min = np.inf
+        self._bucket_min_time = 0.0
+        self._bucket_max = -np.inf
+        self._bucket_max_time = 0.0
+
+    def add(self, t: float, value: float) -> None:
+        """Add a value to the level, completing the current bucket if the value
+        belongs to a later one. NaN values are not aggregated.
+
+        Args:
+            t (float): Time of the value in seconds since epoch
+
+            value (float): Value to add
+
+        """
+        if value != value:
+            return
+
+        bucket = int(t // self.width)
+
+        if self._bucket is None:
+            self._bucket = bucket
+
+        # late values are added to the current bucket
+        elif bucket > self._bucket:
+            self._flush()
+            self._reset_bucket(bucket)
+
+        self._bucket_count += 1
+        self._bucket_sum += value
+
+        if value < self._bucket_min:
+            self._bucket_min = value
+            self._bucket_min_time = t
+
+        if value > self._bucket_max:
+            self._bucket_max = value
+            self._bucket_max_time = t
+
+    def _flush(self) -> None:
+        if not self._bucket_count:
+            return
+
+        self._min_time.append(self._bucket_min_time)
+        self._min.append(self._bucket_min)
+        self._max_time.append(self._bucket_max_time)
+        self._max.append(self._bucket_max)
+        self._mean.append(self._bucket_sum / self._bucket_count)
+
+    def covers(self, start: float) -> bool:
+        """Returns whether the level holds all buckets after a start time.
+
+        Args:
+            start (float): Start time in seconds since epoch
+
+        """
+        # no buckets have been overwritten
+        if self.count <= self._mean.capacity:
+            return True
+
+        return self._min_time.view()[0] // self.width * self.width <= start
+
+    def n_points(self, start: float, aggregate: str = "minmax") -> int:
+        """Returns the number of points rendered for the buckets after a start time.
+
+        Args:
+            start (float): Start time in seconds since epoch
+
+            aggregate (str): "minmax" or "mean"
+
+        """
+        n_buckets = len(self) - np.searchsorted(self._min_time.view(), start)
+        if self._bucket_count:
+            n_buckets += 1
+
+        return 2 * n_buckets if aggregate == "minmax" else n_buckets
+
+    def window(self, start: float, aggregate: str = "minmax") -> Tuple[np.ndarray]:
+        """Returns the aggregated points after a start time, including the
+        incomplete current bucket.
+
+        Args:
+            start (float): Start time in seconds since epoch
+
+            aggregate (str): "minmax" to return the minimum and maximum of each bucket
+                in time order, or "mean" to return the bucket means at the bucket
+                centers
+
+        """
+        idx = np.searchsorted(self._min_time.view(), start)
+
+        min_time = self._min_time.view()[idx:]
+        max_time = self._max_time.view()[idx:]
+        mins = self._min.view()[idx:]
+        maxs = self._max.view()[idx:]
+        means = self._mean.view()[idx:]
+
+        if self._bucket_count:
+            min_time = np.append(min_time, self._bucket_min_time)
+            max_time = np.append(max_time, self._bucket_max_time)
+            mins = np.append(mins, self._bucket_min)
+            maxs = np.append(maxs, self._bucket_max)
+            means = np.append(means, self._bucket_sum / self._bucket_count)
+
+        if aggregate == "mean":
+            centers = (min_time // self.width + 0.5) * self.width
+            return centers, means.copy()
+
+        # order min and max of each bucket in time
+        min_first = min_time <= max_time
+        ts = np.empty(2 * len(mins))
+        ys = np.empty(2 * len(mins))
+        ts[0::2] = np.where(min_first, min_time, max_time)
+        ts[1::2] = np.where(min_first, max_time, min_time)
+        ys[0::2] = np.where(min_first, mins, maxs)
+        ys[1::2] = np.where(min_first, maxs, mins)
+
+        return ts, ys
+
+    def reset(self) -> None:
+        for buffer in [self._min_time, self._min, self._max_time, self._max, self._mean]:
+            buffer.reset()
+
+        self._reset_bucket(None)
+
+
+def _decimate(
+    times: np.ndarray, values: np.ndarray, points: int, aggregate: str = "minmax"
+) -> Tuple[np.ndarray]:
+    """Returns samples reduced to about the requested number of points by
+    aggregating runs of consecutive samples.
+
+    Args:
+        times (np.ndarray): Sample times
+
+        values (np.ndarray): Sample values
+
+        points (int): Approximate maximum number of points to return
+
+        aggregate (str): "minmax" to return the minimum and maximum samples of each
+            run in time order, or "mean" to return the mean time and value of each
+            run
+
+    """
+    n_runs = max(points // 2 if aggregate == "minmax" else points, 1)
+    size = -(-len(values) // n_runs)
+
+    if size <= 1:
+        return times.copy(), values.copy()
+
+    starts = np.arange(0, len(values), size)
+
+    if aggregate == "mean":
+        counts = np.diff(np.append(starts, len(values)))
+        return (
+            np.add.reduceat(times, starts) / counts,
+            np.add.reduceat(values, starts) / counts,
+        )
+
+    # pad the last run with its last sample
+    padded = np.pad(values, (0, len(starts) * size - len(values)), mode="edge")
+    padded = padded.reshape(len(starts), size)
+
+    last = len(values) - 1
+    min_idx = np.minimum(starts + np.argmin(padded, axis=1), last)
+    max_idx = np.minimum(starts + np.argmax(padded, axis=1), last)
+
+    idx = np.empty(2 * len(starts), dtype=int)
+    idx[0::2] = np.minimum(min_idx, max_idx)
+    idx[1::2] = np.maximum(min_idx, max_idx)
+
+    return times[idx], values[idx]
+
+
+class TimeSeriesStore:
+    """
+    Time series storage combining raw ring buffers with a pyramid of downsampled
+    levels. Queries for a time window return at most about the requested number of
+    points regardless of the length of the history.
+
+    Attributes:
+        time (RingBuffer): Raw sample times in seconds since epoch
+
+        data (RingBuffer): Raw sample values
+
+        levels (List[DownsampledLevel]): Downsampled levels ordered by bucket width
+
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        resolutions: Tuple[float] = DEFAULT_RESOLUTIONS,
+        level_capacity: int = DEFAULT_LEVEL_CAPACITY,
+    ) -> None:
+        """Preallocate raw and downsampled buffers.
+
+        Args:
+            capacity (int): Maximum number of raw samples stored
+
+            resolutions (Tuple[float]): Bucket widths in seconds of the downsampled
+                levels
+
+            level_capacity (int): Maximum number of buckets stored per level
+
+        """
+        self.time = RingBuffer(capacity)
+        self.data = RingBuffer(capacity)
+        self.levels = [
+            DownsampledLevel(width, capacity=level_capacity)
+            for width in sorted(resolutions or [])
+        ]
+
+    def append(self, t: float, value: float) -> None:
+        """Append a sample to the raw buffers and downsampled levels.
+
+        Args:
+            t (float): Time of the sample in seconds since epoch
+
+            value (float): Sample value
+
+        """
+        self.time.append(t)
+        self.data.append(value)
+
+        for level in self.levels:
+            level.add(t, value)
+
+    def window(
+        self, seconds: float, points: int, aggregate: str = "minmax"
+    ) -> Tuple[np.ndarray]:
+        """Returns the samples of the last time window at about the requested number
+        of points. Raw samples are returned when they cover the window within the
+        point budget, otherwise the finest covering level within budget is used.
+        Raw samples are decimated if no level is within budget.
+
+        Args:
+            seconds (float): Length of the window in seconds, ending at the latest
+                sample
+
+            points (int): Approximate maximum number of points to return
+
+            aggregate (str): "minmax" or "mean" aggregation of downsampled levels
+
+        """
+        raw_time = self.time.view()
+
+        if not len(raw_time):
+            return np.array([]), np.array([])
+
+        start = raw_time[-1] - seconds
+        idx = np.searchsorted(raw_time, start)
+
+        # raw samples cover the window if it has not been overwritten
+        raw_covers = idx > 0 or self.time.count <= self.time.capacity
+        if raw_covers and len(raw_time) - idx <= points:
+            return raw_time[idx:].copy(), self.data.view()[idx:].copy()
+
+        covering = [level for level in self.levels if level.covers(start)]
+        for level in covering:
+            if level.n_points(start, aggregate) <= points:
+                return level.window(start, aggregate)
+
+        # decimate raw samples when no level is within budget
+        if raw_covers or not self.levels:
+            return _decimate(raw_time[idx:], self.data.view()[idx:], points, aggregate)
+
+        if not covering:
+            covering = self.levels[-1:]
+
+        return covering[-1].window(start, aggregate)
+
+    def reset(self) -> None:
+        self.time.reset()
+        self.data.reset()
+
+        for level in self.levels:
+            level.reset()
@@ -3,8 +3,12 @@ from bokeh.layouts import column, row, gridplot, layout
 from bokeh.models.widgets import Select
 from bokeh.models import Div
 from bokeh import palettes
+from bokeh.io import curdoc
+from bokeh.document import Document
 
 from lume_epics.client.controller import Controller
+from lume_epics.client.scheduler import DashboardScheduler, DEFAULT_IMAGE_INTERVAL
+from lume_epics.client.hub import DataHub
 
 from lume_epics.client.widgets.tables import ValueTable
 from lume_epics.client.widgets.controls import build_sliders, EntryTable
@@ -149,8 +153,14 @@ def render_from_yaml(
     read_only=False,
     striptool_limit=50,
     ncol_widgets=5,
+    striptool_history=None,
+    scheduler: DashboardScheduler = None,
+    hub: DataHub = None,
+    doc: Document = None,
 ):
     """Renders a bokeh layout from the configuration file. Returns layout and callbacks.
+    Widget updates are registered with a single scheduler, whose tick is returned
+    as the only callback.
 
     Args:
         config_file: Opened configuration file
@@ -159,6 +169,15 @@ def render_from_yaml(
         read_only (bool): Whether to render the page as read only
         striptool_limit (int): Maximum number of steps to display on the striptool
         ncol_widgets (int): Number of columns for rendering widgets
+        striptool_history (float): Seconds of history to display on striptools using
+            downsampled levels. Defaults to displaying the last striptool_limit steps.
+        scheduler (DashboardScheduler): Scheduler for widget updates. A scheduler
+            with the default tick period is created if not provided. Use a
+            scheduler in push mode to refresh widgets on monitor updates.
+        hub (DataHub): Hub providing a controller shared with other sessions of the
+            process. Image and table payloads are then built once and shared.
+        doc (Document): Document of the session, whose destruction releases the
+            controller and widget resources. Defaults to the current document.
 
     Returns
         layout
@@ -203,10 +222,24 @@ def render_from_yaml(
             variable_output_images.append(variable)
 
     # set up controller
-    controller = Controller(protocol, input_variables, output_variables, prefix)
+    if hub is not None:
+        controller = hub.acquire_controller(
+            protocol, input_variables, output_variables, prefix
+        )
+
+    else:
+        controller = Controller(protocol, input_variables, output_variables, prefix)
+
+    share_payload = hub is not None
+    striptools = []
+    sliders = []
 
-    # track callbacks
-    callbacks = []
+    # register widget updates with a single scheduler
+    if scheduler is None:
+        scheduler = DashboardScheduler(controller)
+
+    elif scheduler.controller is None:
+        scheduler.controller = controller
 
     # track all inputs
     input_value_vars = constant_scalars + variable_input_scalars
@@ -216,18 +249,25 @@ def render_from_yaml(
     # add images
     current_row = []
     for variable in variable_input_images + constant_images:
-        image = ImagePlot([variable], controller)
+        image = ImagePlot([variable], controller, share_payload=share_payload)
         image.build_plot(pal)
         layout_builder.add_input(image.plot, title=variable.name)
-        callbacks.append(image.update)
+        scheduler.add(
+            image.update, interval=DEFAULT_IMAGE_INTERVAL, pvnames=[variable.name]
+        )
 
     # build input striptools
     if read_only:
-        striptools = []
         for variable in variable_input_scalars:
-            striptool = Striptool([variable], controller, limit=striptool_limit)
+            striptool = Striptool(
+                [variable],
+                controller,
+                limit=striptool_limit,
+                history=striptool_history,
+            )
             layout_builder.add_input(striptool.plot, title=variable.name)
-            callbacks.append(striptool.update)
+            striptools.append(striptool)
+            scheduler.add(striptool.update, pvnames=[variable.name])
 
     # build sliders and value entry table
     else:
@@ -236,7 +276,7 @@ def render_from_yaml(
         slider_stack = []
         for slider in sliders:
             slider_stack.append(slider.bokeh_slider)
-            callbacks.append(slider.update)
+            scheduler.add(slider.update, pvnames=[slider.pvname])
 
         layout_builder.add_input_stack(slider_stack)
 
@@ -248,46 +288,84 @@ def render_from_yaml(
     table_row = []
 
     # add value table callback
-    value_table = ValueTable(input_value_vars, controller)
+    value_table = ValueTable(input_value_vars, controller, share_payload=share_payload)
     layout_builder.add_input(value_table.table)
-    callbacks.append(value_table.update)
+    scheduler.add(value_table.update, pvnames=[var.name for var in input_value_vars])
 
     # add output value table callback
-    output_value_table = ValueTable(variable_output_scalars, controller)
+    output_value_table = ValueTable(
+        variable_output_scalars, controller, share_payload=share_payload
+    )
 
     if read_only:
         value_table.table.autosize_mode = "fit_columns"
 
     layout_builder.add_output(output_value_table.table)
-    callbacks.append(output_value_table.update)
+    scheduler.add(
+        output_value_table.update,
+        pvnames=[var.name for var in variable_output_scalars],
+    )
 
     for variable in variable_output_images:
-        image = ImagePlot([variable], controller)
+        image = ImagePlot([variable], controller, share_payload=share_payload)
         image.build_plot(pal)
         layout_builder.add_output(image.plot, title=variable.name)
-        callbacks.append(image.update)
+        scheduler.add(
+            image.update, interval=DEFAULT_IMAGE_INTERVAL, pvnames=[variable.name]
+        )
 
     # build output striptools
     if read_only:
 
         for variable in variable_output_scalars:
 
-            striptool = Striptool([variable], controller, limit=striptool_limit)
+            striptool = Striptool(
+                [variable],
+                controller,
+                limit=striptool_limit,
+                history=striptool_history,
+            )
             layout_builder.add_output(striptool.plot, title=variable.name)
-            callbacks.append(striptool.update)
+            striptools.append(striptool)
+            scheduler.add(striptool.update, pvnames=[variable.name])
 
     else:
         output_striptool = Striptool(
-            variable_output_scalars, controller, limit=striptool_limit
+            variable_output_scalars,
+            controller,
+            limit=striptool_limit,
+            history=striptool_history,
         )
 
         layout_builder.add_output_stack(
             [output_striptool.selection, output_striptool.plot]
         )
+        striptools.append(output_striptool)
 
         # add the update callback
-        callbacks.append(output_striptool.update)
+        scheduler.add(
+            output_striptool.update,
+            pvnames=[var.name for var in variable_output_scalars],
+        )
 
     layout = layout_builder.build_layout()
 
-    return layout, callbacks
+    # release session resources when served with bokeh
+    def close_session(session_context):
+        for striptool in striptools:
+            striptool.close()
+
+        if sliders:
+            sliders[0].throttler.close()
+
+        if hub is not None:
+            hub.release_controller(controller)
+
+        else:
+            controller.close()
+
+    # curdoc is not the session document when served from a FunctionHandler
+    doc = doc or curdoc()
+    doc.on_session_destroyed(close_session)
+
+    return layout, [scheduler.tick]
@@ -4,9 +4,10 @@ Controls may be built for lume-model ScalarInputVariables.
 
 """
 
-from functools import partial
 from typing import Union, List
 import logging
+import threading
+import time
 
 from bokeh.models import (
     Slider,
@@ -31,15 +32,195 @@ from lume_epics.client.controller import Controller
 
 logger = logging.getLogger(__name__)
 
+# maximum number of puts per second for each process variable
+DEFAULT_MAX_PUT_RATE = 10.0
+
+
+class PutThrottler:
+    """
+    Rate limits puts to process variables. Puts are made from a background thread at
+    most max_rate times per second for each process variable. Values submitted while
+    a process variable is throttled replace earlier pending values, so only the
+    latest value is put.
+
+    Attributes:
+        controller (Controller): Controller object for putting process variable values.
+
+        max_rate (float): Maximum number of puts per second for each process variable
+
+        _pending (dict): Maps process variable name to the latest value not yet put
+
+        _last_put (dict): Maps process variable name to the time of the last put
+
+        _sent (dict): Maps process variable name to the last value put
+
+    """
+
+    def __init__(
+        self, controller: Controller, max_rate: float = DEFAULT_MAX_PUT_RATE
+    ) -> None:
+        """Start the put thread.
+
+        Args:
+            controller (Controller): Controller object for putting process variable
+                values.
+
+            max_rate (float): Maximum number of puts per second for each process
+                variable
+
+        """
+        if max_rate <= 0:
+            raise ValueError("Maximum put rate must be positive.")
+
+        self.controller = controller
+        self.max_rate = max_rate
+        self._interval = 1.0 / max_rate
+        self._pending = {}
+        self._last_put = {}
+        self._sent = {}
+        self._in_flight = 0
+        self._running = True
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="put-throttler", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, pvname: str, value: float, final: bool = False) -> None:
+        """Submit a value to put. Returns without waiting for the put.
+
+        Args:
+            pvname (str): Name of the process variable
+
+            value (float): Value to put
+
+            final (bool): Put the value without waiting for the throttle interval,
+                e.g. on slider release. Skipped if the value has already been put.
+
+        """
+        with self._condition:
+            if final:
+                if pvname not in self._pending and self._sent.get(pvname) == value:
+                    return
+
+                self._last_put.pop(pvname, None)
+
+            self._pending[pvname] = value
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until all pending values have been put.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        """
+        with self._condition:
+            # release throttled values immediately
+            self._last_put.clear()
+            self._condition.notify_all()
+
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout=timeout
+            )
+
+    def close(self) -> None:
+        """Stop the put thread. Pending values are discarded.
+
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        self._thread.join()
+
+    def _run(self) -> None:
+        with self._condition:
+            while self._running:
+                now = time.monotonic()
+                ready = {}
+                wait = None
+
+                for pvname in self._pending:
+                    remaining = (
+                        self._last_put.get(pvname, -self._interval)
+                        + self._interval
+                        - now
+                    )
+
+                    if remaining <= 0:
+                        ready[pvname] = self._pending[pvname]
+
+                    elif wait is None or remaining < wait:
+                        wait = remaining
+
+                if not ready:
+                    self._condition.wait(timeout=wait)
+                    continue
+
+                for pvname, value in ready.items():
+                    del self._pending[pvname]
+                    self._last_put[pvname] = now
+                    self._sent[pvname] = value
+
+                self._in_flight += 1
+                self._condition.release()
+                try:
+                    for pvname, value in ready.items():
+                        try:
+                            self.controller.put(pvname, value)
+
+                        except Exception:
+                            logger.exception("Unable to put %s to %s", value, pvname)
+
+                finally:
+                    self._condition.acquire()
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
 
 class EpicsSlider:
     """EPICS based Slider used for building bokeh sliders and synchronizing process variable values.
 
+    Attributes:
+        controller (Controller): Controller object for getting process variable values.
+
+        variable (ScalarInputVariable): Variable associated with the slider.
+
+        bokeh_slider (Slider): Bokeh slider widget
+
+        _refreshing (bool): Marks programmatic refreshes so they are not put back to
+            the process variable
+
+        _version (int): Process variable version last displayed
+
+        throttler (PutThrottler): Throttler used for putting slider values
+
     """
 
-    def __init__(self, variable: ScalarInputVariable, controller: Controller):
+    def __init__(
+        self,
+        variable: ScalarInputVariable,
+        controller: Controller,
+        throttler: PutThrottler = None,
+    ):
+        """
+        Initialize slider.
+
+        Args:
+            variable (ScalarInputVariable): Variable associated with the slider.
+
+            controller (Controller): Controller object for getting process variable values.
+
+            throttler (PutThrottler): Throttler used for putting slider values. A
+                throttler for the slider is created if not provided.
+
+        """
         self.controller = controller
         self.variable = variable
+        self.throttler = throttler or PutThrottler(controller)
+        self._refreshing = False
+        self._version = None
         self.build_slider()
 
     def build_slider(self):
@@ -70,42 +251,88 @@ class EpicsSlider:
         )
 
         # set up callback
-        self.bokeh_slider.on_change(
-            "value",
-            partial(set_pv_from_slider, pvname=self.pvname, controller=self.controller),
+        self.bokeh_slider.on_change("value", self._on_value_change)
+        self.bokeh_slider.on_change("value_throttled", self._on_value_release)
+
+    def _on_value_change(self, attr: str, old: float, new: float) -> None:
+        """
+        Bokeh callback putting user changes to the process variable. Changes made by
+        update are not put back.
+
+        """
+        if self._refreshing:
+            return
+
+        set_pv_from_slider(
+            attr, old, new, pvname=self.pvname, controller=self.throttler
         )
 
+    def _on_value_release(self, attr: str, old: float, new: float) -> None:
+        """
+        Bokeh callback putting the final slider value on release.
+
+        """
+        if self._refreshing:
+            return
+
+        self.throttler.put(self.pvname, new, final=True)
+
     def update(self):
         """
-        Updates bokeh slider with the process variable value.
+        Updates bokeh slider with the process variable value if the process variable
+        has changed since the last update.
 
         """
-        self.bokeh_slider.value = self.controller.get_value(self.pvname)
+        version = self.controller.get_version(self.pvname)
+        if version == self._version:
+            return
+
+        self._version = version
+        value = self.controller.get_value(self.pvname)
+
+        if value == self.bokeh_slider.value:
+            return
+
+        self._refreshing = True
+        try:
+            self.bokeh_slider.value = value
+
+        finally:
+            self._refreshing = False
 
 
 def build_sliders(
-    variables: List[ScalarInputVariable], controller: Controller,
-) -> List[Slider]:
+    variables: List[ScalarInputVariable],
+    controller: Controller,
+    max_put_rate: float = DEFAULT_MAX_PUT_RATE,
+) -> List[EpicsSlider]:
     """
-    Build sliders for a list of variables.
+    Build sliders for a list of variables. The sliders share a single put throttler.
 
     Args:
         variables (List[ScalarInputVariable]): List of variables for which to build sliders.
 
         controller (Controller): Controller object for getting process variable values.
 
+        max_put_rate (float): Maximum number of puts per second for each slider
+
     """
     sliders = []
+    throttler = PutThrottler(controller, max_rate=max_put_rate)
 
     for variable in variables:
-        slider = EpicsSlider(variable, controller,)
+        slider = EpicsSlider(variable, controller, throttler=throttler)
         sliders.append(slider)
 
     return sliders
 
 
 def set_pv_from_slider(
-    attr: str, old: float, new: float, pvname: str, controller: Controller,
+    attr: str,
+    old: float,
+    new: float,
+    pvname: str,
+    controller: Union[Controller, PutThrottler],
 ) -> None:
     """
     Callback function for updating process variables on slider change.
@@ -119,8 +346,8 @@ def set_pv_from_slider(
 
         pvname (str): Name of the process variable.
 
-        controller (Controller): Controller object for interacting with process
-            variable values.
+        controller (Union[Controller, PutThrottler]): Controller object or put
+            throttler for interacting with process variable values.
 
     """
     controller.put(pvname, new)
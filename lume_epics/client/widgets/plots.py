@@ -5,6 +5,7 @@ process variables.
 """
 
 from typing import List
+from functools import partial
 import logging
 import numpy as np
 
@@ -20,9 +21,15 @@ from lume_epics.client.controller import (
     DEFAULT_SCALAR_VALUE,
 )
 from lume_epics.client.monitors import PVImage, PVTimeSeries
+from lume_epics.client.timeseries import DEFAULT_CAPACITY, DEFAULT_RESOLUTIONS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_STRIPTOOL_POINTS = 500
+
+# packed RGBA color of NaN pixels in RGBA mode, fully transparent
+NAN_COLOR = 0
+
 
 class ImagePlot:
     """
@@ -39,6 +46,22 @@ class ImagePlot:
 
         img_obj (GlyphRenderer): Bokeh glyph renderer for displaying image.
 
+        _rendered (tuple): Name and version of the variable last rendered
+
+        _labeled_variable (str): Variable used for the current axis labels
+
+        _buffer (np.ndarray): Reused buffer holding the oriented image
+
+        rgba (bool): Whether the palette is applied server-side and images are sent
+            as packed uint32 RGBA
+
+        _lut (np.ndarray): Palette lookup table of packed RGBA colors
+
+        _color_limits (list): Low and high limits used for colormapping
+
+        _payload_key (tuple): Key identifying rendered frames shared through the
+            controller payload cache, None if frames are not shared
+
     Example:
 
         ```
@@ -62,6 +85,8 @@ class ImagePlot:
         y_range: List[float] = None,
         color_mapper: ColorMapper = None,
         palette: tuple = None,
+        rgba: bool = False,
+        share_payload: bool = False,
     ) -> None:
         """
         Initialize monitors, current process variable, and data source.
@@ -71,6 +96,23 @@ class ImagePlot:
 
             controller (Controller): Controller object for getting pv values
 
+            x_range (List[float]): Range of the x axis
+
+            y_range (List[float]): Range of the y axis
+
+            color_mapper (ColorMapper): Bokeh color mapper for rendering plot. The
+                low and high attributes are used as fixed limits in RGBA mode.
+
+            palette (tuple): Bokeh color palette to use for plot.
+
+            rgba (bool): Apply the palette server-side and send images as packed
+                uint32 RGBA. Unset color limits are expanded incrementally from the
+                rendered frames.
+
+            share_payload (bool): Share rendered frames with other plots using the
+                controller, e.g. in other bokeh sessions. Frames are not shared in
+                RGBA mode with unset color limits, which depend on the plot history.
+
         """
         self.pv_monitors = {}
         self._x_range = x_range
@@ -81,19 +123,163 @@ class ImagePlot:
 
         self._color_mapper = color_mapper
         self._palette = palette
+        self.rgba = rgba
+
+        if rgba:
+            if color_mapper is not None:
+                self._lut = build_rgba_lut(color_mapper.palette)
+                self._color_limits = [color_mapper.low, color_mapper.high]
+
+            else:
+                self._lut = build_rgba_lut(palette)
+                self._color_limits = [None, None]
+
+            self._fixed_limits = [limit is not None for limit in self._color_limits]
+            self._scaled = None
+            self._indices = None
+            self._nan = None
 
         for variable in variables:
             self.pv_monitors[variable.name] = PVImage(variable, controller)
 
         self.live_variable = list(self.pv_monitors.keys())[0]
+        self._payload_key = None
+
+        if share_payload and not rgba:
+            self._payload_key = ("image",)
+
+        elif share_payload and all(self._fixed_limits):
+            self._payload_key = (
+                "image_rgba",
+                self._lut.tobytes(),
+                tuple(self._color_limits),
+            )
+
+        self._rendered = None
+        self._labeled_variable = None
+        self._buffer = None
 
-        image_data = DEFAULT_IMAGE_DATA
+        image_data = {key: list(value) for key, value in DEFAULT_IMAGE_DATA.items()}
+        image_data["image"] = [self._render(image_data["image"][0])]
 
-        image_data["image"][0] = np.flipud(image_data["image"][0].T)
+        # limits are not expanded by the placeholder image
+        if rgba:
+            self._color_limits = [
+                limit if fixed else None
+                for limit, fixed in zip(self._color_limits, self._fixed_limits)
+            ]
 
         self.source = ColumnDataSource(image_data)
         self.build_plot()
 
+    def _orient(self, image: np.ndarray) -> np.ndarray:
+        """Orients an image for rendering, transposing and flipping rows. The
+        contiguous result is written into a buffer reused between frames of the
+        same shape rather than allocated per frame.
+
+        Args:
+            image (np.ndarray): Image received from the controller
+
+        """
+        oriented = image.T[::-1]
+
+        if (
+            self._buffer is None
+            or self._buffer.shape != oriented.shape
+            or self._buffer.dtype != oriented.dtype
+        ):
+            self._buffer = np.empty(oriented.shape, dtype=oriented.dtype)
+
+        np.copyto(self._buffer, oriented)
+        return self._buffer
+
+    def _colormap(self, image: np.ndarray) -> np.ndarray:
+        """Orients an image and maps it to packed RGBA colors using the palette
+        lookup table. NaN pixels are mapped to NAN_COLOR. Intermediate and output
+        buffers are reused between frames.
+
+        Args:
+            image (np.ndarray): Image received from the controller
+
+        """
+        oriented = image.T[::-1]
+
+        if self._buffer is None or self._buffer.shape != oriented.shape:
+            self._buffer = np.empty(oriented.shape, dtype=np.uint32)
+            self._scaled = np.empty(oriented.shape, dtype=np.float64)
+            self._indices = np.empty(oriented.shape, dtype=np.intp)
+            self._nan = np.empty(oriented.shape, dtype=bool)
+
+        np.copyto(self._scaled, oriented)
+        np.isnan(self._scaled, out=self._nan)
+        has_nan = self._nan.any()
+
+        # expand unset limits incrementally, ignoring NaN pixels
+        if not all(self._fixed_limits) and not self._nan.all():
+            finite = self._scaled[~self._nan] if has_nan else self._scaled
+            frame_min = finite.min()
+            frame_max = finite.max()
+
+            low, high = self._color_limits
+            if not self._fixed_limits[0] and (low is None or frame_min < low):
+                self._color_limits[0] = frame_min
+
+            if not self._fixed_limits[1] and (high is None or frame_max > high):
+                self._color_limits[1] = frame_max
+
+        low, high = self._color_limits
+        if low is None or high is None:
+            low, high = 0.0, 0.0
+
+        n_colors = len(self._lut)
+        scale = n_colors / (high - low) if high > low else 0.0
+
+        np.subtract(self._scaled, low, out=self._scaled)
+        np.multiply(self._scaled, scale, out=self._scaled)
+        np.clip(self._scaled, 0, n_colors - 1, out=self._scaled)
+
+        # casting NaN to an index is undefined
+        if has_nan:
+            self._scaled[self._nan] = 0
+
+        self._indices[...] = self._scaled
+        np.take(self._lut, self._indices, out=self._buffer, mode="clip")
+
+        if has_nan:
+            self._buffer[self._nan] = NAN_COLOR
+
+        return self._buffer
+
+    def _render(self, image: np.ndarray) -> np.ndarray:
+        """Prepares an image for the data source.
+
+        Args:
+            image (np.ndarray): Image received from the controller
+
+        """
+        if self.rgba:
+            return self._colormap(image)
+
+        return self._orient(image)
+
+    def _update_axis_labels(self) -> None:
+        """Labels the plot axes using the live variable.
+
+        """
+        axis_labels = self.pv_monitors[self.live_variable].axis_labels
+        axis_units = self.pv_monitors[self.live_variable].axis_units
+
+        x_axis_label = axis_labels[0]
+        y_axis_label = axis_labels[1]
+
+        if axis_units:
+            x_axis_label += " (" + axis_units[0] + ")"
+            y_axis_label += " (" + axis_units[1] + ")"
+
+        self.plot.xaxis.axis_label = x_axis_label
+        self.plot.yaxis.axis_label = y_axis_label
+        self._labeled_variable = self.live_variable
+
     def build_plot(self,) -> None:
         """
         Creates the plot object.
@@ -106,14 +292,29 @@ class ImagePlot:
 
         """
         # create plot
+        tooltips = [("x", "$x"), ("y", "$y")]
+        if not self.rgba:
+            tooltips.append(("value", "@image"))
+
         self.plot = figure(
-            tooltips=[("x", "$x"), ("y", "$y"), ("value", "@image")],
+            tooltips=tooltips,
             sizing_mode="scale_both",
             x_range=self._x_range,
             y_range=self._y_range,
         )
 
-        if self._color_mapper:
+        if self.rgba:
+            self.plot.image_rgba(
+                name="image_plot",
+                image="image",
+                x="x",
+                y="y",
+                dw="dw",
+                dh="dh",
+                source=self.source,
+            )
+
+        elif self._color_mapper:
             self.plot.image(
                 name="image_plot",
                 image="image",
@@ -142,18 +343,7 @@ class ImagePlot:
                 "Must provide palette or color mapper during ImagePlot construction."
             )
 
-        axis_labels = self.pv_monitors[self.live_variable].axis_labels
-        axis_units = self.pv_monitors[self.live_variable].axis_units
-
-        x_axis_label = axis_labels[0]
-        y_axis_label = axis_labels[1]
-
-        if axis_units:
-            x_axis_label += " (" + axis_units[0] + ")"
-            y_axis_label += " (" + axis_units[1] + ")"
-
-        self.plot.xaxis.axis_label = x_axis_label
-        self.plot.yaxis.axis_label = y_axis_label
+        self._update_axis_labels()
 
     def update(self, live_variable: str = None) -> None:
         """
@@ -167,26 +357,70 @@ class ImagePlot:
         if live_variable:
             self.live_variable = live_variable
 
-        # update axis and labels
-        axis_labels = self.pv_monitors[self.live_variable].axis_labels
-        axis_units = self.pv_monitors[self.live_variable].axis_units
+        # update axis labels only on variable change
+        if self.live_variable != self._labeled_variable:
+            self._update_axis_labels()
 
-        x_axis_label = axis_labels[0]
-        y_axis_label = axis_labels[1]
+        # skip frames that have not changed since the last render
+        monitor = self.pv_monitors[self.live_variable]
+        rendered = (self.live_variable, monitor.version())
+        if rendered == self._rendered:
+            return
 
-        if axis_units:
-            x_axis_label += " (" + axis_units[0] + ")"
-            y_axis_label += " (" + axis_units[1] + ")"
+        self._rendered = rendered
 
-        self.plot.xaxis.axis_label = x_axis_label
-        self.plot.yaxis.axis_label = y_axis_label
+        if self._payload_key is not None:
+            image_data = monitor.controller.cached_payload(
+                self._payload_key + (self.live_variable,),
+                [self.live_variable],
+                partial(self._build_payload, monitor),
+            )
 
-        # get image data
-        image_data = self.pv_monitors[self.live_variable].poll()
-        image_data["image"][0] = np.flipud(image_data["image"][0].T)
+        else:
+            image_data = monitor.poll()
+            image_data = dict(image_data, image=[self._render(image_data["image"][0])])
 
         self.source.data.update(image_data)
 
+    def _build_payload(self, monitor: PVImage) -> dict:
+        """Builds image data for sharing between plots. The rendered image is
+        copied out of the reused buffer.
+
+        Args:
+            monitor (PVImage): Monitor of the displayed variable
+
+        """
+        image_data = monitor.poll()
+        image = self._render(image_data["image"][0]).copy()
+
+        return dict(image_data, image=[image])
+
+
+def build_rgba_lut(palette: tuple) -> np.ndarray:
+    """
+    Builds a lookup table of packed uint32 RGBA colors from a palette of hex
+    colors, as expected by bokeh image_rgba glyphs.
+
+    Args:
+        palette (tuple): Sequence of hex color strings, e.g. a bokeh palette
+
+    """
+    rgba = np.empty((len(palette), 4), dtype=np.uint8)
+
+    for i, color in enumerate(palette):
+        color = color.lstrip("#")
+
+        if len(color) not in [6, 8]:
+            raise ValueError(f"Unable to convert color {color} to RGBA.")
+
+        rgba[i, 0] = int(color[0:2], 16)
+        rgba[i, 1] = int(color[2:4], 16)
+        rgba[i, 2] = int(color[4:6], 16)
+        rgba[i, 3] = int(color[6:8], 16) if len(color) == 8 else 255
+
+    # byte order in memory is R, G, B, A
+    return rgba.view(np.uint32).reshape(len(palette))
+
 
 class Striptool:
     """
@@ -210,6 +444,11 @@ class Striptool:
         controller: Controller,
         limit: int = None,
         aspect_ratio: float = 1.05,
+        sample_on_poll: bool = False,
+        decimation: int = 1,
+        decimation_mode: str = "every",
+        history: float = None,
+        points: int = DEFAULT_STRIPTOOL_POINTS,
     ) -> None:
         """
         Set up monitors, current process variable, and data source.
@@ -223,11 +462,35 @@ class Striptool:
 
             aspect_ratio (float): Ratio of width to height
 
+            sample_on_poll (bool): Sample values on update rather than recording
+                monitor updates
+
+            decimation (int): Number of monitor updates reduced to each point
+
+            decimation_mode (str): "every" to keep every Nth update, "minmax" to keep
+                the minimum and maximum of each bucket of updates
+
+            history (float): Length of history in seconds to display. When set, the
+                history is rendered from downsampled levels at about points points
+                instead of the last limit samples.
+
+            points (int): Approximate number of points rendered for the history,
+                typically the plot width in pixels
+
         """
         self.pv_monitors = {}
 
+        capacity = DEFAULT_CAPACITY if limit is None else limit
         for variable in variables:
-            self.pv_monitors[variable.name] = PVTimeSeries(variable, controller)
+            self.pv_monitors[variable.name] = PVTimeSeries(
+                variable,
+                controller,
+                capacity=capacity,
+                sample_on_poll=sample_on_poll,
+                decimation=decimation,
+                decimation_mode=decimation_mode,
+                resolutions=DEFAULT_RESOLUTIONS if history is not None else (),
+            )
 
         self.live_variable = list(self.pv_monitors.keys())[0]
 
@@ -238,6 +501,13 @@ class Striptool:
         self.reset_button.on_click(self._reset_values)
         self._aspect_ratio = aspect_ratio
         self._limit = limit
+        self._history = history
+        self._points = points
+
+        # points streamed to the source are limited to the buffer capacity
+        self._rollover = capacity
+        self._count = 0
+        self._reset_source = True
         self.selection = Select(
             title="Variable to plot:",
             value=self.live_variable,
@@ -281,18 +551,39 @@ class Striptool:
 
         """
 
-        ts, ys = self.pv_monitors[self.live_variable].poll()
-        if self._limit is not None and len(ts) > self._limit:
-            ts = ts[-self._limit :]
-            ys = ys[-self._limit :]
+        monitor = self.pv_monitors[self.live_variable]
+
+        # downsampled history is bounded by the point budget and replaced each tick
+        if self._history is not None:
+            ts, ys = monitor.window(self._history, self._points)
+
+            # datetime axis expects milliseconds since epoch
+            self.source.data = dict(x=ts * 1000, y=ys)
+            return
 
-        self.source.data = dict(x=ts, y=ys)
+        if self._reset_source:
+            self._count = 0
+
+        ts, ys, count = monitor.since(self._count)
+
+        # full reset on variable change, reset, or monitor reset
+        if self._reset_source or count < self._count:
+            self.source.data = dict(x=ts * 1000, y=ys)
+            self._reset_source = False
+
+        # otherwise only send new points
+        elif len(ts):
+            self.source.stream(dict(x=ts * 1000, y=ys), rollover=self._rollover)
+
+        self._count = count
 
     def update_selection(self, attr, old, new):
         """
         Bokeh callback for assigning new live process variable.
         """
         self.live_variable = new
+        self._reset_source = True
+        self.update()
 
     def _reset_values(self) -> None:
         """
@@ -300,3 +591,13 @@ class Striptool:
 
         """
         self.pv_monitors[self.live_variable].reset()
+        self._reset_source = True
+        self.update()
+
+    def close(self) -> None:
+        """
+        Stop recording process variable values.
+
+        """
+        for monitor in self.pv_monitors.values():
+            monitor.close()
@@ -7,6 +7,7 @@ variables.
 from typing import List, Dict
 import logging
 
+import numpy as np
 from bokeh.models import ColumnDataSource, DataTable, TableColumn, StringFormatter
 
 from lume_model.variables import ScalarVariable
@@ -29,6 +30,13 @@ class ValueTable:
 
         _unit_map (Dict[str, str]): Dictionary mapping pvname to units
 
+        _pvnames (List[str]): Process variable names in row order
+
+        _formatted (np.ndarray): Formatted values currently displayed
+
+        _share_payload (bool): Whether formatted values are shared through the
+            controller payload cache
+
         table (DataTable): Bokeh data table
 
     """
@@ -39,6 +47,7 @@ class ValueTable:
         controller: Controller,
         labels: Dict[str, str] = {},
         sig_figs: int = 5,
+        share_payload: bool = False,
     ) -> None:
         """
         Initialize table.
@@ -50,8 +59,15 @@ class ValueTable:
 
             labels (Dict[list, list]): Dictionary mapping pvname to label
 
+            sig_figs (int): Number of significant figures displayed
+
+            share_payload (bool): Share formatted values with other tables using the
+                controller, e.g. in other bokeh sessions
+
         """
         # only creating pvs for non-image pvs
+        self._controller = controller
+        self._share_payload = share_payload
         self._pv_monitors = {}
         self._output_values = {}
         self._labels = {}
@@ -83,8 +99,10 @@ class ValueTable:
         """
         Creates the bokeh table and populates variable data.
         """
-        x_vals = [self._labels[var] for var in self._output_values.keys()]
+        self._pvnames = list(self._output_values.keys())
+        x_vals = [self._labels[var] for var in self._pvnames]
         y_vals = list(self._output_values.values())
+        self._formatted = np.array(y_vals, dtype=str)
 
         table_data = dict(x=x_vals, y=y_vals)
         self._source = ColumnDataSource(table_data)
@@ -104,17 +122,53 @@ class ValueTable:
             index_position=None,
         )
 
+    def _format(self, values: np.ndarray) -> np.ndarray:
+        """Formats a column of values to the table significant figures.
+
+        Args:
+            values (np.ndarray): Values to format
+
+        """
+        pattern = f"%.{self._sig_figs}g"
+        return np.array([str(float(pattern % value)) for value in values.tolist()])
+
+    def _format_values(self) -> np.ndarray:
+        """Polls and formats the current values.
+
+        """
+        values = np.fromiter(
+            (self._pv_monitors[pvname].poll() for pvname in self._pvnames),
+            dtype=float,
+            count=len(self._pvnames),
+        )
+
+        return self._format(values)
+
     def update(self) -> None:
         """
-        Callback function to update data source to reflect updated values.
+        Callback function to update data source to reflect updated values. Only rows
+        with changed formatted values are patched.
         """
-        for variable in self._pv_monitors:
-            v = self._pv_monitors[variable].poll()
+        if self._share_payload:
+            formatted = self._controller.cached_payload(
+                ("values", self._sig_figs, tuple(self._pvnames)),
+                self._pvnames,
+                self._format_values,
+            )
 
-            # format to sig figs
-            v = format(float("{:.{p}g}".format(v, p=self._sig_figs)))
-            self._output_values[variable] = v
+        else:
+            formatted = self._format_values()
 
-        x_vals = [self._labels[var] for var in self._output_values.keys()]
-        y_vals = list(self._output_values.values())
-        self._source.data = dict(x=x_vals, y=y_vals)
+        changed = np.flatnonzero(formatted != self._formatted)
+
+        if not changed.size:
+            return
+
+        patches = []
+        for idx in changed:
+            value = str(formatted[idx])
+            self._output_values[self._pvnames[idx]] = value
+            patches.append((int(idx), value))
+
+        self._formatted = formatted
+        self._source.patch({"y": patches})
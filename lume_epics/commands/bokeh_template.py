@@ -1,55 +1,131 @@
 from bokeh.io import curdoc
-from bokeh.layouts import column
-from bokeh.server.server import Server
+from bokeh.document import Document
+from bokeh.models import Div
 from lume_epics.client.utils import render_from_yaml
+from lume_epics.client.scheduler import DashboardScheduler, DEFAULT_PERIOD
+from lume_epics.client.hub import get_hub
 import argparse
-import sys
 
-import argparse
 
+def build_document(
+    doc: Document,
+    filename: str,
+    protocol: str,
+    prefix: str,
+    read_only: bool = False,
+    striptool_limit: int = 50,
+    ncol_widgets: int = 5,
+    striptool_history: float = None,
+    push: bool = False,
+    refresh_period: int = DEFAULT_PERIOD,
+    max_sessions: int = None,
+) -> None:
+    """Builds the dashboard for a bokeh session.
+
+    Args:
+        doc (Document): Document of the session
+        filename (str): Variable configuration file
+        protocol (str): Indicates whether to use channel access ("ca") or pvAccess ("pva")
+        prefix (str): Prefix of the served process variables
+        read_only (bool): Whether to render the page as read only
+        striptool_limit (int): Maximum number of steps to display on the striptool
+        ncol_widgets (int): Number of columns for rendering widgets
+        striptool_history (float): Seconds of history to display on striptools
+        push (bool): Refresh widgets on monitor updates instead of polling
+        refresh_period (int): Widget refresh period in milliseconds
+        max_sessions (int): Maximum number of concurrent sessions served by the
+            process. Sessions over the limit are shown a notice instead of the
+            dashboard.
+
+    """
+    session_context = doc.session_context
+    if max_sessions is not None and session_context is not None:
+        # the session being created is not yet registered with the server
+        if len(session_context.server_context.sessions) >= max_sessions:
+            doc.add_root(
+                Div(text="<h3>Maximum number of sessions reached. Try again later.</h3>")
+            )
+            return
+
+    scheduler = DashboardScheduler(period=refresh_period, push=push)
+
+    layout, callbacks = render_from_yaml(
+        filename,
+        prefix,
+        protocol,
+        read_only=read_only,
+        striptool_limit=striptool_limit,
+        ncol_widgets=ncol_widgets,
+        striptool_history=striptool_history,
+        scheduler=scheduler,
+        hub=get_hub(),
+        doc=doc,
+    )
+
+    doc.add_root(layout)
+
+    # registers the scheduler tick, and monitor callbacks in push mode
+    scheduler.start(doc)
+
+
+# parse arguments only when executed by bokeh serve
+if __name__.startswith("bokeh_app"):
+    parser = argparse.ArgumentParser(description="Process bokeh args")
+    parser.add_argument("filename", type=str, help="Filename to load.")
+    parser.add_argument("protocol", type=str, help="Protocol used to build client.")
+    parser.add_argument("prefix", type=str, help="Prefix to serve.")
+    parser.add_argument(
+        "--read-only", default=False, action="store_true", help="Render as read-only"
+    )
+    parser.add_argument(
+        "--ncol-widgets",
+        dest="ncol_widgets",
+        default=5,
+        type=int,
+        help="Number of widgets to render per column",
+    )
+    parser.add_argument(
+        "--striptool-limit",
+        dest="striptool_limit",
+        default=50,
+        type=int,
+        help="Number of striptool steps to keep",
+    )
+
+    parser.add_argument(
+        "--striptool-history",
+        dest="striptool_history",
+        default=None,
+        type=float,
+        help="Seconds of history to display on striptools",
+    )
+
+    parser.add_argument(
+        "--push",
+        default=False,
+        action="store_true",
+        help="Refresh widgets on monitor updates instead of polling",
+    )
+
+    parser.add_argument(
+        "--refresh-period",
+        dest="refresh_period",
+        default=DEFAULT_PERIOD,
+        type=int,
+        help="Widget refresh period in milliseconds",
+    )
+
+    args = parser.parse_args()
 
-parser = argparse.ArgumentParser(description="Process bokeh args")
-parser.add_argument("filename", type=str, help="Filename to load.")
-parser.add_argument("protocol", type=str, help="Protocol used to build client.")
-parser.add_argument("prefix", type=str, help="Prefix to serve.")
-parser.add_argument(
-    "--read-only", default=False, action="store_true", help="Render as read-only"
-)
-parser.add_argument(
-    "--ncol-widgets",
-    dest="ncol_widgets",
-    default=5,
-    type=int,
-    help="Number of widgets to render per column",
-)
-parser.add_argument(
-    "--striptool-limit",
-    dest="striptool_limit",
-    default=50,
-    type=int,
-    help="Number of striptool steps to keep",
-)
-
-args = parser.parse_args()
-
-filename = args.filename
-prefix = args.prefix
-protocol = args.protocol
-read_only = args.read_only
-striptool_limit = args.striptool_limit
-ncol_widgets = args.ncol_widgets
-
-layout, callbacks = render_from_yaml(
-    filename,
-    prefix,
-    protocol,
-    read_only=read_only,
-    striptool_limit=striptool_limit,
-    ncol_widgets=ncol_widgets,
-)
-
-
-curdoc().add_root(layout)
-
-for callback in callbacks:
-    curdoc().add_periodic_callback(callback, 250)
+    build_document(
+        curdoc(),
+        args.filename,
+        args.protocol,
+        args.prefix,
+        read_only=args.read_only,
+        striptool_limit=args.striptool_limit,
+        ncol_widgets=args.ncol_widgets,
+        striptool_history=args.striptool_history,
+        push=args.push,
+        refresh_period=args.refresh_period,
+    )
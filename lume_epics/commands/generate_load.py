@@ -0,0 +1,68 @@
+import json
+import click
+from lume_epics import loadgen
+
+
+@click.command()
+@click.argument("filename")
+@click.argument("prefix")
+@click.option("--protocol", type=click.Choice(["ca", "pva"]), default="ca", help="Protocol used by the clients.")
+@click.option("--clients", default=1, help="Number of putting clients. Round trip latency is only exact with one.")
+@click.option("--monitors", default=0, help="Number of monitor only clients.")
+@click.option("--put-rate", "put_rates", type=float, multiple=True, default=[1.0], help="Puts per second of each putting client. Repeat to mix rates.")
+@click.option("--duration", type=float, default=10.0, help="Seconds to generate load.")
+@click.option("--put-pv", "put_pvs", multiple=True, help="Input variable to put to. Defaults to the non-constant scalar inputs.")
+@click.option("--monitor-pv", "monitor_pvs", multiple=True, help="Output variable to monitor. Defaults to all outputs.")
+@click.option("--wait-pv", default=None, help="Output variable completing a round trip.")
+@click.option("--timeout", type=float, default=5.0, help="Seconds before a round trip is counted as dropped.")
+@click.option("--serve/--no-serve", default=True, help="Serve the model from FILENAME in process.")
+@click.option("--json-output", is_flag=True, help="Print the report as json.")
+def generate_load(filename, prefix, protocol, clients, monitors, put_rates, duration, put_pvs, monitor_pvs, wait_pv, timeout, serve, json_output):
+    from lume_model.utils import model_from_yaml, variables_from_yaml
+
+    loadgen.use_loopback()
+
+    server = None
+    if serve:
+        from lume_epics.epics_server import Server
+
+        with open(filename, "r") as f:
+            model_class, model_kwargs = model_from_yaml(f, load_model=False)
+
+        server = Server(model_class, prefix, protocols=[protocol], model_kwargs=model_kwargs)
+        server.start(monitor=False)
+        input_variables, output_variables = server.input_variables, server.output_variables
+
+    else:
+        with open(filename, "r") as f:
+            input_variables, output_variables = variables_from_yaml(f)
+
+    try:
+        report = loadgen.run_load(
+            protocol,
+            prefix,
+            input_variables,
+            output_variables,
+            clients=clients,
+            monitors=monitors,
+            put_rates=list(put_rates),
+            duration=duration,
+            put_pvs=list(put_pvs) or None,
+            monitor_pvs=list(monitor_pvs) or None,
+            wait_pv=wait_pv,
+            timeout=timeout,
+            server=server,
+        )
+
+    finally:
+        if server is not None:
+            server.stop()
+
+    if json_output:
+        click.echo(json.dumps(report, indent=2))
+
+    else:
+        click.echo(loadgen.format_report(report))
+
+if __name__ == "__main__":
+    generate_load()
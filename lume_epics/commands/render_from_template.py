@@ -1,6 +1,10 @@
 import click
-import subprocess
-from lume_epics.commands import bokeh_template
+from functools import partial
+from bokeh.application import Application
+from bokeh.application.handlers.function import FunctionHandler
+from bokeh.server.server import Server
+from lume_epics.commands.bokeh_template import build_document
+from lume_epics.client.scheduler import DEFAULT_PERIOD
 
 @click.command()
 @click.argument("filename")
@@ -9,12 +13,46 @@ from lume_epics.commands import bokeh_template
 @click.option("--read-only", is_flag=True)
 @click.option("--striptool-limit", default=50)
 @click.option("--ncol-widgets", default=5)
-def render_from_template(filename, protocol, prefix, read_only, striptool_limit, ncol_widgets):
-    template_file = bokeh_template.__file__
-    if read_only:
-        subprocess.call(["bokeh", "serve", template_file, "--show", "--args", filename, protocol, prefix, "--striptool-limit", str(striptool_limit), "--ncol-widgets", str(ncol_widgets),  "--read-only"])
-    else:
-        subprocess.call(["bokeh", "serve", template_file, "--show", "--args", filename, protocol, prefix, "--striptool-limit", str(striptool_limit), "--ncol-widgets", str(ncol_widgets)])
+@click.option("--striptool-history", type=float, default=None)
+@click.option("--push", is_flag=True, help="Refresh widgets on monitor updates instead of polling.")
+@click.option("--refresh-period", default=DEFAULT_PERIOD, help="Widget refresh period in milliseconds.")
+@click.option("--port", default=5006, help="Port to serve the dashboard on.")
+@click.option("--num-procs", default=1, help="Number of worker processes to fork. 0 uses one per CPU.")
+@click.option("--websocket-compression-level", type=int, default=None, help="Websocket permessage-deflate compression level (0-9).")
+@click.option("--max-sessions", type=int, default=None, help="Maximum number of concurrent sessions per process.")
+@click.option("--unused-session-lifetime", default=15000, help="Milliseconds before unused sessions are cleaned up.")
+@click.option("--show/--no-show", default=True, help="Open the dashboard in a browser.")
+def render_from_template(filename, protocol, prefix, read_only, striptool_limit, ncol_widgets, striptool_history, push, refresh_period, port, num_procs, websocket_compression_level, max_sessions, unused_session_lifetime, show):
+    handler = FunctionHandler(
+        partial(
+            build_document,
+            filename=filename,
+            protocol=protocol,
+            prefix=prefix,
+            read_only=read_only,
+            striptool_limit=striptool_limit,
+            ncol_widgets=ncol_widgets,
+            striptool_history=striptool_history,
+            push=push,
+            refresh_period=refresh_period,
+            max_sessions=max_sessions,
+        )
+    )
+
+    server = Server(
+        {"/": Application(handler)},
+        port=port,
+        num_procs=num_procs,
+        websocket_compression_level=websocket_compression_level,
+        unused_session_lifetime_milliseconds=unused_session_lifetime,
+    )
+    server.start()
+
+    # avoid opening a browser tab per worker process
+    if show and num_procs == 1:
+        server.io_loop.add_callback(server.show, "/")
+
+    server.io_loop.start()
 
 if __name__ == "__main__":
     render_from_template()
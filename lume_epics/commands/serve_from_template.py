@@ -8,11 +8,23 @@ from lume_model.utils import model_from_yaml
 @click.argument("prefix")
 @click.option("--serve-ca", type=bool, default=True)
 @click.option("--serve-pva", type=bool, default=True)
-def serve_from_template(filename, prefix, serve_ca, serve_pva):
+@click.option("--profile", is_flag=True, help="Profile the comm thread and protocol processes.")
+@click.option("--profile-dir", default="lume-epics-profile", help="Directory for writing profiles.")
+@click.option("--reload-pv", default=None, help="Serve a process variable reloading the model from a yaml path.")
+@click.option("--model", "additional_models", multiple=True, help="Additional model served as PREFIX=FILENAME. May be repeated.")
+@click.option("--evaluation-workers", default=1, help="Number of threads evaluating models.")
+@click.option("--metrics-port", type=int, default=None, help="Local port serving Prometheus metrics over HTTP.")
+def serve_from_template(filename, prefix, serve_ca, serve_pva, profile, profile_dir, reload_pv, additional_models, evaluation_workers, metrics_port):
 
     with open(filename, "r") as f:
         model_class, model_kwargs = model_from_yaml(f, load_model=False)
 
+    models = {}
+    for entry in additional_models:
+        model_prefix, model_filename = entry.split("=", 1)
+        with open(model_filename, "r") as f:
+            models[model_prefix] = model_from_yaml(f, load_model=False)
+
     protocols = []
     if serve_ca:
         protocols.append("ca")
@@ -20,12 +32,16 @@ def serve_from_template(filename, prefix, serve_ca, serve_pva):
     if serve_pva:
         protocols.append("pva")
 
-    prefix = "test"
     server = Server(
         model_class,
         prefix,
         model_kwargs=model_kwargs,
-        protocols = protocols
+        protocols = protocols,
+        profile=profile_dir if profile else None,
+        reload_pv=reload_pv,
+        models=models,
+        evaluation_workers=evaluation_workers,
+        metrics_port=metrics_port,
     )
 
     server.start(monitor=True)
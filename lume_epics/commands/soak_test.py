@@ -0,0 +1,56 @@
+import json
+import click
+from lume_epics import soak
+
+
+@click.command()
+@click.argument("filename")
+@click.argument("prefix")
+@click.option("--protocol", "protocols", type=click.Choice(["ca", "pva"]), multiple=True, default=["ca", "pva"], help="Protocol served and driven by traffic. May be repeated.")
+@click.option("--duration", type=float, default=3600.0, help="Seconds to run the soak.")
+@click.option("--interval", type=float, default=10.0, help="Seconds between resource samples.")
+@click.option("--warmup", type=float, default=60.0, help="Seconds before the baseline sample.")
+@click.option("--put-rate", type=float, default=10.0, help="Puts per second of each traffic controller.")
+@click.option("--max-rss-growth", type=float, default=soak.DEFAULT_THRESHOLDS["rss_mb"], help="Maximum resident memory growth per process in MB.")
+@click.option("--max-fd-growth", type=int, default=soak.DEFAULT_THRESHOLDS["fds"], help="Maximum open file descriptor growth per process.")
+@click.option("--max-thread-growth", type=int, default=soak.DEFAULT_THRESHOLDS["threads"], help="Maximum thread growth per process.")
+@click.option("--max-queue-depth", type=int, default=soak.DEFAULT_THRESHOLDS["queue_depth"], help="Maximum depth of the server queues.")
+@click.option("--top", default=10, help="Number of top allocation differences reported per process.")
+@click.option("--json-output", is_flag=True, help="Print the report as json.")
+def soak_test(filename, prefix, protocols, duration, interval, warmup, put_rate, max_rss_growth, max_fd_growth, max_thread_growth, max_queue_depth, top, json_output):
+    from lume_model.utils import model_from_yaml
+
+    with open(filename, "r") as f:
+        model_class, model_kwargs = model_from_yaml(f, load_model=False)
+
+    test = soak.SoakTest(
+        model_class,
+        prefix,
+        model_kwargs=model_kwargs,
+        protocols=list(protocols),
+        duration=duration,
+        interval=interval,
+        warmup=warmup,
+        put_rate=put_rate,
+        thresholds={
+            "rss_mb": max_rss_growth,
+            "fds": max_fd_growth,
+            "threads": max_thread_growth,
+            "queue_depth": max_queue_depth,
+        },
+        top=top,
+    )
+    report = test.run()
+
+    if json_output:
+        click.echo(json.dumps(report, indent=2))
+
+    else:
+        click.echo(soak.format_report(report))
+
+    # non-zero exit status fails CI jobs
+    if report["failures"]:
+        raise click.exceptions.Exit(1)
+
+if __name__ == "__main__":
+    soak_test()
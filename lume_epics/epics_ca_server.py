@@ -3,20 +3,25 @@ import logging
 import multiprocessing
 import time
 import signal
+import threading
 from typing import Dict
+from lume_epics.profiling import Profiler
 from lume_model.variables import Variable, InputVariable, OutputVariable
 import numpy as np
 from pcaspy import Driver, SimpleServer
 from pcaspy.tools import ServerThread
 from queue import Full, Empty, Queue
 
-from typing import Dict, Mapping, Union, List
+from typing import Dict, Mapping, Union, List, Tuple
 
 # Each server must have their outQueue in which the comm server will set the inputs and outputs vars to be updated
 # Comm server must also provide one inQueue in which it will receive inputs from Servers
 
 logger = logging.getLogger(__name__)
 
+# maximum length of model configuration paths put to the reload process variable
+RELOAD_PV_LENGTH = 1024
+
 
 class CAServer(multiprocessing.Process):
     """
@@ -31,50 +36,73 @@ class CAServer(multiprocessing.Process):
 
         exit_event (multiprocessing.Event): Event indicating shutdown
 
+        published_updates (multiprocessing.Value): Number of updates from the out
+            queue published to the process variables
+
+        coalesced_puts (multiprocessing.Value): Number of puts replaced in the cache
+            by a later put before being queued for evaluation
+
     """
 
     protocol = "ca"
 
     def __init__(
         self,
-        prefix: str,
-        input_variables: Dict[str, InputVariable],
-        output_variables: Dict[str, OutputVariable],
+        variables: Dict[str, Tuple[Dict[str, InputVariable], Dict[str, OutputVariable]]],
         in_queue: multiprocessing.Queue,
         out_queue: multiprocessing.Queue,
-        running_indicator: multiprocessing.Value,
+        running_indicators: Dict[str, multiprocessing.Value],
+        profile: str = None,
+        reload_pv: str = None,
         *args,
         **kwargs,
     ) -> None:
         """Initialize server process.
 
         Args:
-            prefix (str): EPICS prefix for serving process variables
-
-            input_variables (Dict[str, InputVariable]): Dictionary mapping pvname to lume-model input variable.
-
-            output_variables (Dict[str, OutputVariable]):Dictionary mapping pvname to lume-model output variable.
+            variables (Dict[str, Tuple[Dict[str, InputVariable], Dict[str, OutputVariable]]]):
+                Maps EPICS prefix to the dictionaries of lume-model input and output
+                variables served under it.
 
             in_queue (multiprocessing.Queue): Queue for tracking updates to input variables
 
             out_queue (multiprocessing.Queue): Queue for tracking updates to output variables
 
+            running_indicators (Dict[str, multiprocessing.Value]): Maps prefix to the
+                marker of whether its model is running
+
+            profile (str): Directory for writing profiles of the server process. The
+                process is not profiled if not provided.
+
+            reload_pv (str): Name of the process variable triggering model reloads,
+                served under each prefix if provided.
+
         """
         super().__init__(*args, **kwargs)
         self.ca_server = None
         self.ca_driver = None
         self.server_thread = None
         self.exit_event = multiprocessing.Event()
-        self._prefix = prefix
-        self._input_variables = input_variables
-        self._output_variables = output_variables
+        self._variables = variables
         self._in_queue = in_queue
         self._out_queue = out_queue
         self._providers = {}
-        self._running_indicator = running_indicator
+        self._running_indicators = running_indicators
+        self._profile = profile
+        self._profiler = None
+        self._reload_pv = reload_pv
+
+        # counters shared with the parent, written only by this process
+        self.published_updates = multiprocessing.Value("L", 0, lock=False)
+        self.coalesced_puts = multiprocessing.Value("L", 0, lock=False)
 
-        # cached pv values
-        self._cached_values = {}
+        # maps served pvname to prefix
+        self._pv_prefixes = {}
+        self._reload_pvs = {}
+
+        # cached pv values for each prefix
+        self._cached_values = {prefix: {} for prefix in variables}
+        self._cache_lock = threading.Lock()
 
     def update_pv(self, pvname, value) -> None:
         """Adds update to input process variable to the input queue.
@@ -86,14 +114,52 @@ class CAServer(multiprocessing.Process):
 
         """
         val = value
-        pvname = pvname.replace(f"{self._prefix}:", "")
+        prefix = self._pv_prefixes[pvname]
+        pvname = pvname.replace(f"{prefix}:", "", 1)
+
+        with self._cache_lock:
+            if pvname in self._cached_values[prefix]:
+                self.coalesced_puts.value += 1
 
-        self._cached_values.update({pvname: val})
+            self._cached_values[prefix].update({pvname: val})
 
         # only update if not running
-        if not self._running_indicator.value:
-            self._in_queue.put({"protocol": self.protocol, "pvs": self._cached_values})
-            self._cached_values = {}
+        if not self._running_indicators[prefix].value:
+            self._flush_cached_values(prefix)
+
+    def _flush_cached_values(self, prefix: str) -> None:
+        """Queues input updates cached while the model was running.
+
+        Args:
+            prefix (str): Prefix of the model
+
+        """
+        with self._cache_lock:
+            if not self._cached_values[prefix]:
+                return
+
+            self._in_queue.put(
+                {
+                    "protocol": self.protocol,
+                    "prefix": prefix,
+                    "pvs": self._cached_values[prefix],
+                }
+            )
+            self._cached_values[prefix] = {}
+
+    def request_reload(self, prefix: str, filename: str) -> None:
+        """Queues a model reload from a yaml configuration file.
+
+        Args:
+            prefix (str): Prefix of the reloaded model
+
+            filename (str): Path of the model configuration file
+
+        """
+        logger.info("Model reload of %s from %s requested", prefix, filename)
+        self._in_queue.put(
+            {"protocol": self.protocol, "prefix": prefix, "reload": filename}
+        )
 
     def setup_server(self) -> None:
         """Configure and start server.
@@ -108,12 +174,29 @@ class CAServer(multiprocessing.Process):
         self.ca_server = SimpleServer()
 
         # create all process variables using the process variables stored in
-        # pvdb with the given prefix
-        pvdb, self._child_to_parent_map = build_pvdb(
-            self._input_variables, self._output_variables
-        )
+        # pvdb, names include the prefix so that models may share variable names
+        pvdb = {}
+        self._child_to_parent_map = {}
+        for prefix, (input_variables, output_variables) in self._variables.items():
+            prefix_pvdb, child_to_parent_map = build_pvdb(
+                input_variables, output_variables
+            )
+
+            if self._reload_pv is not None:
+                prefix_pvdb[self._reload_pv] = {
+                    "type": "char",
+                    "count": RELOAD_PV_LENGTH,
+                    "value": "",
+                }
+                self._reload_pvs[f"{prefix}:{self._reload_pv}"] = prefix
+
+            for pvname, entry in prefix_pvdb.items():
+                pvdb[f"{prefix}:{pvname}"] = entry
+                self._pv_prefixes[f"{prefix}:{pvname}"] = prefix
 
-        self.ca_server.createPV(self._prefix + ":", pvdb)
+            self._child_to_parent_map[prefix] = child_to_parent_map
+
+        self.ca_server.createPV("", pvdb)
 
         # set up driver for handing read and write requests to process variables
         self.ca_driver = CADriver(server=self)
@@ -126,39 +209,67 @@ class CAServer(multiprocessing.Process):
 
     def update_pvs(
         self,
+        prefix: str,
         input_variables: List[InputVariable],
         output_variables: List[OutputVariable],
     ):
         """Update process variables over Channel Access.
 
         Args:
+            prefix (str): Prefix of the model the variables belong to
+
             input_variables (List[InputVariable]): List of lume-epics output variables.
 
             output_variables (List[OutputVariable]): List of lume-model output variables.
 
         """
         variables = input_variables + output_variables
-        self.ca_driver.update_pvs(variables)
+        self.ca_driver.update_pvs(prefix, variables)
 
     def run(self) -> None:
         """Start server process.
 
         """
+        if self._profile is not None:
+            self._start_profiler()
+
         self.setup_server()
         while not self.exit_event.is_set():
             try:
                 data = self._out_queue.get_nowait()
                 inputs = data.get("input_variables", [])
                 outputs = data.get("output_variables", [])
-                self.update_pvs(inputs, outputs)
+                self.update_pvs(data["prefix"], inputs, outputs)
+                self.published_updates.value += 1
             except Empty:
                 time.sleep(0.01)
                 logger.debug("out queue empty")
 
+            # send puts received while the models were running
+            for prefix, running_indicator in self._running_indicators.items():
+                if not running_indicator.value:
+                    self._flush_cached_values(prefix)
+
+            if self._profiler is not None:
+                self._profiler.check_dump()
+
         self.server_thread.stop()
         #        self.server_thread.join()
         logger.info("Channel access server stopped.")
 
+        if self._profiler is not None:
+            self._profiler.stop()
+
+    def _start_profiler(self) -> None:
+        """Profile the server process, writing profiles on SIGUSR1 and shutdown.
+
+        """
+        self._profiler = Profiler(self._profile, f"{self.protocol}_server")
+        signal.signal(
+            signal.SIGUSR1, lambda signum, frame: self._profiler.request_dump()
+        )
+        self._profiler.start()
+
     def shutdown(self):
         """Safely shutdown the server process.
 
@@ -381,13 +492,29 @@ class CADriver(Driver):
             value (Union[float, np.ndarray]): Value to assign to the process variable.
 
         """
+        if pvname in self.server._reload_pvs:
+            # char arrays may be delivered as codes
+            if not isinstance(value, str):
+                value = bytes(np.asarray(value, dtype=np.uint8)).decode().rstrip("\x00")
+
+            self.setParam(pvname, value)
+            self.updatePVs()
+            self.server.request_reload(self.server._reload_pvs[pvname], value)
+            return True
+
+        if pvname not in self.server._pv_prefixes:
+            logger.error("%s not found in server variables.", pvname)
+            return False
+
+        prefix = self.server._pv_prefixes[pvname]
+        input_variables, output_variables = self.server._variables[prefix]
 
         # handle area detector types
-        model_var_name = pvname
-        if pvname in self.server._child_to_parent_map:
-            model_var_name = self.server._child_to_parent_map[pvname]
+        model_var_name = pvname.replace(f"{prefix}:", "", 1)
+        if model_var_name in self.server._child_to_parent_map[prefix]:
+            model_var_name = self.server._child_to_parent_map[prefix][model_var_name]
 
-        if model_var_name in self.server._output_variables:
+        if model_var_name in output_variables:
             logger.warning(
                 "Cannot update variable %s. Output variables can only be updated via surrogate model callback.",
                 pvname,
@@ -398,9 +525,9 @@ class CADriver(Driver):
             logger.debug(f"None value provided for {pvname}")
             return False
 
-        if model_var_name in self.server._input_variables:
+        if model_var_name in input_variables:
 
-            if self.server._input_variables[model_var_name].is_constant:
+            if input_variables[model_var_name].is_constant:
                 logger.debug("Unable to update constant variable %s", model_var_name)
 
             else:
@@ -419,14 +546,20 @@ class CADriver(Driver):
             logger.error("%s not found in server variables.", pvname)
             return False
 
-    def update_pvs(self, variables: List[Variable]) -> None:
+    def update_pvs(self, prefix: str, variables: List[Variable]) -> None:
         """Update output Channel Access process variables after model execution.
 
         Args:
+            prefix (str): Prefix of the model the variables belong to
+
             variables (List[Variable]): List of variables.
         """
+        input_variables, _ = self.server._variables[prefix]
+
         for variable in variables:
-            if variable.name in self.server._input_variables and variable.is_constant:
+            pvname = f"{prefix}:{variable.name}"
+
+            if variable.name in input_variables and variable.is_constant:
                 logger.debug("Cannot update constant variable %s", variable.name)
 
             else:
@@ -436,12 +569,12 @@ class CADriver(Driver):
                         variable.name,
                     )
                     self.setParam(
-                        variable.name + ":ArrayData_RBV", variable.value.flatten()
+                        pvname + ":ArrayData_RBV", variable.value.flatten()
                     )
-                    self.setParam(variable.name + ":MinX_RBV", variable.x_min)
-                    self.setParam(variable.name + ":MinY_RBV", variable.y_min)
-                    self.setParam(variable.name + ":MaxX_RBV", variable.x_max)
-                    self.setParam(variable.name + ":MaxY_RBV", variable.y_max)
+                    self.setParam(pvname + ":MinX_RBV", variable.x_min)
+                    self.setParam(pvname + ":MinY_RBV", variable.y_min)
+                    self.setParam(pvname + ":MaxX_RBV", variable.x_max)
+                    self.setParam(pvname + ":MaxY_RBV", variable.y_max)
 
                 elif variable.variable_type == "scalar":
                     logger.debug(
@@ -449,7 +582,7 @@ class CADriver(Driver):
                         variable.name,
                         variable.value,
                     )
-                    self.setParam(variable.name, variable.value)
+                    self.setParam(pvname, variable.value)
 
                 elif variable.variable_type == "array":
                     logger.debug(
@@ -458,7 +591,7 @@ class CADriver(Driver):
                     )
 
                     self.setParam(
-                        variable.name + ":ArrayData_RBV", variable.value.flatten()
+                        pvname + ":ArrayData_RBV", variable.value.flatten()
                     )
 
                 else:
@@ -5,8 +5,10 @@ from queue import Full, Empty
 import numpy as np
 import time
 import signal
-from typing import List, Union
+import threading
+from typing import Dict, List, Tuple, Union
 
+from lume_epics.profiling import Profiler
 from lume_model.variables import InputVariable, OutputVariable
 from p4p.nt import NTScalar, NTNDArray
 from p4p.server.thread import SharedPV
@@ -30,55 +32,79 @@ class PVAServer(multiprocessing.Process):
 
         exit_event (multiprocessing.Event): Event indicating shutdown
 
+        published_updates (multiprocessing.Value): Number of updates from the out
+            queue published to the process variables
+
+        coalesced_puts (multiprocessing.Value): Number of puts replaced in the cache
+            by a later put before being queued for evaluation
+
     """
 
     protocol = "pva"
 
     def __init__(
         self,
-        prefix: str,
-        input_variables: List[InputVariable],
-        output_variables: List[OutputVariable],
+        variables: Dict[str, Tuple[Dict[str, InputVariable], Dict[str, OutputVariable]]],
         in_queue: multiprocessing.Queue,
         out_queue: multiprocessing.Queue,
         conf_proxy: DictProxy,
-        running_indicator=multiprocessing.Value,
+        running_indicators: Dict[str, multiprocessing.Value],
+        profile: str = None,
+        reload_pv: str = None,
         *args,
         **kwargs,
     ) -> None:
         """Initialize server process.
 
         Args:
-            prefix (str): EPICS prefix for serving process variables
-
-            input_variables (Dict[str, InputVariable]): Dictionary mapping pvname to lume-model input variable.
-
-            output_variables (Dict[str, OutputVariable]):Dictionary mapping pvname to lume-model output variable.
+            variables (Dict[str, Tuple[Dict[str, InputVariable], Dict[str, OutputVariable]]]):
+                Maps EPICS prefix to the dictionaries of lume-model input and output
+                variables served under it.
 
             in_queue (multiprocessing.Queue): Queue for tracking updates to input variables
 
             out_queue (multiprocessing.Queue): Queue for tracking updates to output variables
 
+            running_indicators (Dict[str, multiprocessing.Value]): Maps prefix to the
+                marker of whether its model is running
+
+            profile (str): Directory for writing profiles of the server process. The
+                process is not profiled if not provided.
+
+            reload_pv (str): Name of the process variable triggering model reloads,
+                served under each prefix if provided.
+
         """
 
         super().__init__(*args, **kwargs)
         self.pva_server = None
         self.exit_event = multiprocessing.Event()
-        self._prefix = prefix
-        self._input_variables = input_variables
-        self._output_variables = output_variables
+        self._variables = variables
         self._in_queue = in_queue
         self._out_queue = out_queue
         self._providers = {}
         self._conf = conf_proxy
-        self._running_indicator = running_indicator
+        self._running_indicators = running_indicators
+        self._profile = profile
+        self._profiler = None
+        self._reload_pv = reload_pv
 
-        self._cached_values = {}
+        # counters shared with the parent, written only by this process
+        self.published_updates = multiprocessing.Value("L", 0, lock=False)
+        self.coalesced_puts = multiprocessing.Value("L", 0, lock=False)
 
-    def update_pv(self, pvname: str, value: Union[np.ndarray, float]) -> None:
+        # cached pv values for each prefix
+        self._cached_values = {prefix: {} for prefix in variables}
+        self._cache_lock = threading.Lock()
+
+    def update_pv(
+        self, prefix: str, pvname: str, value: Union[np.ndarray, float]
+    ) -> None:
         """Adds update to input process variable to the input queue.
 
         Args:
+            prefix (str): Prefix of the model the process variable belongs to
+
             pvname (str): Name of process variable
 
             value (Union[np.ndarray, float]): Value to set
@@ -86,14 +112,51 @@ class PVAServer(multiprocessing.Process):
         """
         # Hack for now to get the pickable value
         val = value.raw.value
-        pvname = pvname.replace(f"{self._prefix}:", "")
+        pvname = pvname.replace(f"{prefix}:", "", 1)
 
-        self._cached_values.update({"pvname": val})
+        with self._cache_lock:
+            if pvname in self._cached_values[prefix]:
+                self.coalesced_puts.value += 1
+
+            self._cached_values[prefix].update({pvname: val})
 
         # only update if not running
-        if not self._running_indicator:
-            self._in_queue.put({"protocol": self.protocol, "pvs": self._cached_values})
-            self._cached_values = {}
+        if not self._running_indicators[prefix].value:
+            self._flush_cached_values(prefix)
+
+    def _flush_cached_values(self, prefix: str) -> None:
+        """Queues input updates cached while the model was running.
+
+        Args:
+            prefix (str): Prefix of the model
+
+        """
+        with self._cache_lock:
+            if not self._cached_values[prefix]:
+                return
+
+            self._in_queue.put(
+                {
+                    "protocol": self.protocol,
+                    "prefix": prefix,
+                    "pvs": self._cached_values[prefix],
+                }
+            )
+            self._cached_values[prefix] = {}
+
+    def request_reload(self, prefix: str, filename: str) -> None:
+        """Queues a model reload from a yaml configuration file.
+
+        Args:
+            prefix (str): Prefix of the reloaded model
+
+            filename (str): Path of the model configuration file
+
+        """
+        logger.info("Model reload of %s from %s requested", prefix, filename)
+        self._in_queue.put(
+            {"protocol": self.protocol, "prefix": prefix, "reload": filename}
+        )
 
     def setup_server(self) -> None:
         """Configure and start server.
@@ -103,90 +166,102 @@ class PVAServer(multiprocessing.Process):
         signal.signal(signal.SIGINT, signal.SIG_IGN)
 
         logger.info("Initializing pvAccess server")
-        # initialize global inputs
-        for variable in self._input_variables.values():
-            pvname = f"{self._prefix}:{variable.name}"
-
-            # prepare scalar variable types
-            if variable.variable_type == "scalar":
-                nt = NTScalar("d")
-                initial = variable.value
-            # prepare image variable types
-            elif variable.variable_type == "image":
-                nd_array = variable.value.view(NTNDArrayData)
-                nd_array.attrib = {
-                    "x_min": variable.x_min,
-                    "y_min": variable.y_min,
-                    "x_max": variable.x_max,
-                    "y_max": variable.y_max,
-                }
-                nt = NTNDArray()
-                initial = nd_array
-
-            elif variable.variable_type == "array":
-                if variable.value_type == "str":
-                    nt = NTScalar("as")
+        for prefix, (input_variables, output_variables) in self._variables.items():
+            # initialize global inputs
+            for variable in input_variables.values():
+                pvname = f"{prefix}:{variable.name}"
+
+                # prepare scalar variable types
+                if variable.variable_type == "scalar":
+                    nt = NTScalar("d")
                     initial = variable.value
-
-                else:
+                # prepare image variable types
+                elif variable.variable_type == "image":
                     nd_array = variable.value.view(NTNDArrayData)
+                    nd_array.attrib = {
+                        "x_min": variable.x_min,
+                        "y_min": variable.y_min,
+                        "x_max": variable.x_max,
+                        "y_max": variable.y_max,
+                    }
                     nt = NTNDArray()
                     initial = nd_array
 
-            else:
-                raise ValueError(
-                    "Unsupported variable type provided: %s", variable.variable_type
-                )
-
-            handler = PVAccessInputHandler(
-                pvname=pvname, is_constant=variable.is_constant, server=self
-            )
-            pv = SharedPV(handler=handler, nt=nt, initial=initial)
-            self._providers[pvname] = pv
-
-        # use default handler for the output process variables
-        # updates to output pvs are handled from post calls within the input
-        # update
-        for variable in self._output_variables.values():
-            pvname = f"{self._prefix}:{variable.name}"
-            if variable.variable_type == "scalar":
-                nt = NTScalar()
-                initial = variable.value
-
-            elif variable.variable_type == "image":
-                nd_array = variable.value.view(NTNDArrayData)
-
-                # get image limits from model output
-                nd_array.attrib = {
-                    "x_min": np.float64(variable.x_min),
-                    "y_min": np.float64(variable.y_min),
-                    "x_max": np.float64(variable.x_max),
-                    "y_max": np.float64(variable.y_max),
-                }
+                elif variable.variable_type == "array":
+                    if variable.value_type == "str":
+                        nt = NTScalar("as")
+                        initial = variable.value
 
-                nt = NTNDArray()
-                initial = nd_array
+                    else:
+                        nd_array = variable.value.view(NTNDArrayData)
+                        nt = NTNDArray()
+                        initial = nd_array
 
-            elif variable.variable_type == "array":
+                else:
+                    raise ValueError(
+                        "Unsupported variable type provided: %s", variable.variable_type
+                    )
 
-                if variable.value_type == "string":
-                    nt = NTScalar("as")
+                handler = PVAccessInputHandler(
+                    pvname=pvname,
+                    is_constant=variable.is_constant,
+                    server=self,
+                    prefix=prefix,
+                )
+                pv = SharedPV(handler=handler, nt=nt, initial=initial)
+                self._providers[pvname] = pv
+
+            # use default handler for the output process variables
+            # updates to output pvs are handled from post calls within the input
+            # update
+            for variable in output_variables.values():
+                pvname = f"{prefix}:{variable.name}"
+                if variable.variable_type == "scalar":
+                    nt = NTScalar()
                     initial = variable.value
 
-                else:
+                elif variable.variable_type == "image":
                     nd_array = variable.value.view(NTNDArrayData)
+
+                    # get image limits from model output
+                    nd_array.attrib = {
+                        "x_min": np.float64(variable.x_min),
+                        "y_min": np.float64(variable.y_min),
+                        "x_max": np.float64(variable.x_max),
+                        "y_max": np.float64(variable.y_max),
+                    }
+
                     nt = NTNDArray()
                     initial = nd_array
-            else:
-                raise ValueError(
-                    "Unsupported variable type provided: %s", variable.variable_type
-                )
 
-            pv = SharedPV(nt=nt, initial=initial)
-            self._providers[pvname] = pv
+                elif variable.variable_type == "array":
 
-        else:
-            pass  # throw exception for incorrect data type
+                    if variable.value_type == "string":
+                        nt = NTScalar("as")
+                        initial = variable.value
+
+                    else:
+                        nd_array = variable.value.view(NTNDArrayData)
+                        nt = NTNDArray()
+                        initial = nd_array
+                else:
+                    raise ValueError(
+                        "Unsupported variable type provided: %s", variable.variable_type
+                    )
+
+                pv = SharedPV(nt=nt, initial=initial)
+                self._providers[pvname] = pv
+
+            else:
+                pass  # throw exception for incorrect data type
+
+            if self._reload_pv is not None:
+                pvname = f"{prefix}:{self._reload_pv}"
+                self._providers[pvname] = SharedPV(
+                    handler=PVAccessReloadHandler(prefix, self),
+                    nt=NTScalar("s"),
+                    initial="",
+                )
 
         # initialize pva server
         self.pva_server = P4PServer(providers=[self._providers])
@@ -199,25 +274,29 @@ class PVAServer(multiprocessing.Process):
 
     def update_pvs(
         self,
+        prefix: str,
         input_variables: List[InputVariable],
         output_variables: List[OutputVariable],
     ) -> None:
         """Update process variables over pvAccess.
 
         Args:
+            prefix (str): Prefix of the model the variables belong to
+
             input_variables (List[InputVariable]): List of lume-epics output variables.
 
             output_variables (List[OutputVariable]): List of lume-model output variables.
 
         """
+        served_inputs, _ = self._variables[prefix]
         variables = input_variables + output_variables
         for variable in variables:
 
-            if variable.name in self._input_variables and variable.is_constant:
+            if variable.name in served_inputs and variable.is_constant:
                 logger.debug("Cannot update constant variable.")
 
             else:
-                pvname = f"{self._prefix}:{variable.name}"
+                pvname = f"{prefix}:{variable.name}"
                 if variable.variable_type == "image":
                     logger.debug(
                         "pvAccess image process variable %s updated.", variable.name
@@ -259,6 +338,9 @@ class PVAServer(multiprocessing.Process):
         """Start server process.
 
         """
+        if self._profile is not None:
+            self._start_profiler()
+
         self.setup_server()
 
         # mark running
@@ -267,21 +349,37 @@ class PVAServer(multiprocessing.Process):
                 data = self._out_queue.get_nowait()
                 inputs = data.get("input_variables", [])
                 outputs = data.get("output_variables", [])
-                self.update_pvs(inputs, outputs)
-
-                # check cached values
-                if len(self._cached_values) > 0 and not self._running_indicator:
-                    self._in_queue.put(
-                        {"protocol": self.protocol, "pvs": self._cached_values}
-                    )
+                self.update_pvs(data["prefix"], inputs, outputs)
+                self.published_updates.value += 1
 
             except Empty:
                 time.sleep(0.01)
                 logger.debug("out queue empty")
 
+            # send puts received while the models were running
+            for prefix, running_indicator in self._running_indicators.items():
+                if not running_indicator.value:
+                    self._flush_cached_values(prefix)
+
+            if self._profiler is not None:
+                self._profiler.check_dump()
+
         self.pva_server.stop()
         logger.info("pvAccess server stopped.")
 
+        if self._profiler is not None:
+            self._profiler.stop()
+
+    def _start_profiler(self) -> None:
+        """Profile the server process, writing profiles on SIGUSR1 and shutdown.
+
+        """
+        self._profiler = Profiler(self._profile, f"{self.protocol}_server")
+        signal.signal(
+            signal.SIGUSR1, lambda signum, frame: self._profiler.request_dump()
+        )
+        self._profiler.start()
+
     def shutdown(self):
         """Safely shutdown the server process.
 
@@ -295,18 +393,22 @@ class PVAccessInputHandler:
     process variables.
     """
 
-    def __init__(self, pvname: str, is_constant: bool, server: PVAServer):
+    def __init__(
+        self, pvname: str, is_constant: bool, server: PVAServer, prefix: str
+    ):
         """
         Initialize the handler with prefix and image pv attributes
 
         Args:
             pvname (str): The PV being handled
             server (PVAServer): Reference to the server holding this PV
+            prefix (str): Prefix of the model the PV belongs to
 
         """
         self.is_constant = is_constant
         self.pvname = pvname
         self.server = server
+        self.prefix = prefix
 
     def put(self, pv: SharedPV, op: ServOpWrap) -> None:
         """Updates the global input process variable state, posts the input process
@@ -323,6 +425,43 @@ class PVAccessInputHandler:
         # update input values and global input process variable state
         if not self.is_constant and op.value() is not None:
             pv.post(op.value())
-            self.server.update_pv(pvname=self.pvname, value=op.value())
+            self.server.update_pv(
+                prefix=self.prefix, pvname=self.pvname, value=op.value()
+            )
         # mark server operation as complete
         op.done()
+
+
+class PVAccessReloadHandler:
+    """
+    Handler object requesting model reloads on put operations to the reload process
+    variable.
+    """
+
+    def __init__(self, prefix: str, server: PVAServer):
+        """
+        Initialize the handler with the server
+
+        Args:
+            prefix (str): Prefix of the reloaded model
+            server (PVAServer): Reference to the server holding this PV
+
+        """
+        self.prefix = prefix
+        self.server = server
+
+    def put(self, pv: SharedPV, op: ServOpWrap) -> None:
+        """Posts the model configuration path and requests the reload.
+
+        Args:
+            pv (SharedPV): Reload process variable on which the put operates.
+
+            op (ServOpWrap): Server operation initiated by the put call.
+
+        """
+        filename = op.value()
+        if filename:
+            pv.post(filename)
+            self.server.request_reload(self.prefix, str(filename))
+
+        op.done()
@@ -1,55 +1,309 @@
+import os
 import time
+import signal
 import logging
 import threading
 import multiprocessing
-from typing import Dict, Mapping, Union, List
+from functools import partial
+from typing import Callable, Dict, Mapping, Union, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 
 from threading import Thread, Event, local
 from queue import Full, Empty
 
 from lume_model.variables import Variable, InputVariable, OutputVariable
 from lume_model.models import SurrogateModel
-from .epics_pva_server import PVAServer
-from .epics_ca_server import CAServer
+from lume_epics.profiling import Profiler
+from lume_epics.model import OnlineSurrogateModel
 
 logger = logging.getLogger(__name__)
-multiprocessing.set_start_method("fork")
+
+
+class ServedModel:
+    """
+    Model served under a prefix. Evaluations of a served model never overlap, and
+    input updates received while an evaluation is scheduled are coalesced into the
+    next evaluation.
+
+    Attributes:
+        prefix (str): Prefix used to format the process variables of the model
+
+        model (SurrogateModel): Served model instance
+
+        online_model (OnlineSurrogateModel): Execution wrapper timing model
+            evaluations
+
+        input_variables (Dict[str, InputVariable]): Served input variables
+
+        output_variables (Dict[str, OutputVariable]): Served output variables
+
+        running_indicator (multiprocessing.Value): Marks that an evaluation is
+            scheduled. Protocol processes cache puts to the prefix while set.
+
+        callback (Callable[[List[OutputVariable]], None]): Called with the outputs
+            of inputs evaluated after a timed out evaluation finished
+
+        _pending_model (OnlineSurrogateModel): Reloaded model waiting to be swapped
+            in before the next evaluation
+
+        _queued_values (dict): Maps input variable name to the protocol and value of
+            updates waiting for evaluation
+
+        coalesced_updates (int): Number of input updates combined into an already
+            scheduled evaluation
+
+        _scheduled (bool): Whether evaluations of the model are scheduled
+
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        model_class: SurrogateModel,
+        model_kwargs: dict = {},
+        evaluation_timeout: float = None,
+        warmup: int = 1,
+        callback: Callable[[List[OutputVariable]], None] = None,
+    ) -> None:
+        """Instantiate and warm up the model, then initialize the output variables
+        by running with the default inputs.
+
+        Args:
+            prefix (str): Prefix used to format process variables.
+
+            model_class (SurrogateModel): Surrogate model class to be instantiated.
+
+            model_kwargs (dict): Kwargs to instantiate model.
+
+            evaluation_timeout (float): Maximum model evaluation time in seconds.
+
+            warmup (int): Number of evaluations with the default inputs run before
+                serving
+
+            callback (Callable[[List[OutputVariable]], None]): Called with the
+                outputs of inputs rejected while a timed out evaluation was running,
+                once evaluated
+
+        """
+        self.prefix = prefix
+        self.evaluation_timeout = evaluation_timeout
+        self.warmup = warmup
+        self.callback = callback
+
+        self.model = model_class(**model_kwargs)
+        self.input_variables = self.model.input_variables
+
+        # update inputs for starting value to be the default
+        for variable in self.input_variables.values():
+            if variable.value is None:
+                variable.value = variable.default
+
+        self.online_model = OnlineSurrogateModel(
+            self.model, timeout=evaluation_timeout, callback=callback
+        )
+        if warmup:
+            self.online_model.warmup(warmup)
+
+        model_input = list(self.input_variables.values())
+
+        self.input_variables = self.model.input_variables
+        self.output_variables = {
+            variable.name: variable for variable in self.online_model.run(model_input)
+        }
+
+        self.running_indicator = multiprocessing.Value("b", False)
+
+        self._pending_model = None
+        self._queued_values = {}
+        self._refresh = False
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self.coalesced_updates = 0
+
+    def check_schema(self, model: SurrogateModel) -> None:
+        """Raises a ValueError if the variables of a model differ in name or type
+        from the variables of the served model.
+
+        Args:
+            model (SurrogateModel): Model to check
+
+        """
+        for kind in ["input_variables", "output_variables"]:
+            served = {
+                name: variable.variable_type
+                for name, variable in getattr(self.model, kind).items()
+            }
+            loaded = {
+                name: variable.variable_type
+                for name, variable in getattr(model, kind).items()
+            }
+
+            if served != loaded:
+                raise ValueError(
+                    f"Model {kind} do not match the served variables: "
+                    f"served {served}, loaded {loaded}."
+                )
+
+    def load(self, model_class: SurrogateModel, model_kwargs: dict = {}) -> None:
+        """Instantiates, checks, and warms up a model, then queues it to be swapped
+        in before the next evaluation.
+
+        Args:
+            model_class (SurrogateModel): Surrogate model class to be instantiated.
+
+            model_kwargs (dict): Kwargs to instantiate model.
+
+        """
+        model = model_class(**model_kwargs)
+        self.check_schema(model)
+
+        online_model = OnlineSurrogateModel(
+            model, timeout=self.evaluation_timeout, callback=self.callback
+        )
+        if self.warmup:
+            online_model.warmup(self.warmup)
+
+        with self._lock:
+            self._pending_model = online_model
+
+        logger.info(
+            "Loaded model %s for %s, waiting for swap.", model_class.__name__, self.prefix
+        )
+
+    def swap(self) -> bool:
+        """Swaps in a reloaded model, carrying over the current input values.
+        Returns whether the model was swapped.
+
+        """
+        with self._lock:
+            online_model = self._pending_model
+            self._pending_model = None
+
+        if online_model is None:
+            return False
+
+        # serve the variables of the new model with the current input values
+        input_variables = online_model.model.input_variables
+        for name, variable in input_variables.items():
+            variable.value = self.input_variables[name].value
+
+        previous = self.online_model
+        self.online_model = online_model
+        self.model = online_model.model
+        self.input_variables = input_variables
+        self.output_variables = dict(online_model.output_variables)
+        previous.close()
+
+        logger.info("Swapped in reloaded model for %s.", self.prefix)
+        return True
+
+    def queue(self, values: dict, refresh: bool = False) -> bool:
+        """Queues input updates for evaluation. Returns whether an evaluation must
+        be scheduled, i.e. none was already scheduled.
+
+        Args:
+            values (dict): Maps input variable name to the protocol and value of the
+                update
+
+            refresh (bool): Evaluate even if no updates are queued
+
+        """
+        with self._lock:
+            self._queued_values.update(values)
+            self._refresh = self._refresh or refresh
+
+            if self._scheduled:
+                if values:
+                    self.coalesced_updates += 1
+
+                return False
+
+            self._scheduled = True
+
+        # mark running
+        self.running_indicator.value = True
+        return True
+
+    def take_queued(self) -> dict:
+        """Returns the queued input updates, or None and marks evaluations done if
+        nothing is left to evaluate.
+
+        """
+        with self._lock:
+            values, refresh = self._queued_values, self._refresh
+            self._queued_values, self._refresh = {}, False
+
+            if not values and not refresh:
+                self._scheduled = False
+                self.running_indicator.value = False
+                return None
+
+        return values
 
 
 class Server:
     """
     Server for EPICS process variables. Can be optionally initialized with only
     pvAccess or Channel Access protocols; but, defaults to serving over both.
+    Several models may be served under different prefixes, sharing the protocol
+    processes and a pool of evaluation threads.
 
     Attributes:
-        model (SurrogateModel): SurrogateModel class to be served
+        models (Dict[str, ServedModel]): Maps prefix to the model served under it
 
-        input_variables (List[Variable]): List of lume-model variables passed to model.
+        prefix (str): Prefix of the default model, the first served
 
-        ouput_variables (List[Variable]): List of lume-model variables to use as
-            outputs.
+        model (SurrogateModel): Default model instance
 
-        ca_server (SimpleServer): Server class that interfaces between the Channel
-            Access client and the driver.
+        input_variables (Dict[str, InputVariable]): Input variables of the default
+            model
 
-        ca_driver (CADriver): Class used by server to handle to process variable
-            read/write requests.
+        ouput_variables (Dict[str, OutputVariable]): Output variables of the
+            default model
 
-        pva_server (P4PServer): Threaded p4p server used for serving pvAccess
-            variables.
+        online_model (OnlineSurrogateModel): Execution wrapper of the default model
+
+        ca_process (CAServer): Channel Access server process
+
+        pva_process (PVAServer): pvAccess server process
 
         exit_event (Event): Threading exit event marking server shutdown.
 
+        profile (str): Directory profiles are written to, None if not profiling
+
+        reload_pv (str): Name of the process variable triggering model reloads from
+            a yaml configuration path, None if not served
+
+        metrics_server (MetricsServer): HTTP server exposing metrics, None if not
+            served
+
+        dropped_messages (Dict[str, int]): Maps protocol to the number of messages
+            dropped because its out queue was full
+
+        manager_pid (int): Process id of the multiprocessing manager serving the
+            pvAccess configuration, None if pvAccess is not served
+
+        _executor (ThreadPoolExecutor): Pool of threads evaluating the models
+
     """
 
     def __init__(
         self,
-        model_class: SurrogateModel,
-        prefix: str,
+        model_class: SurrogateModel = None,
+        prefix: str = None,
         protocols: List[str] = ["pva", "ca"],
         model_kwargs: dict = {},
+        profile: str = None,
+        evaluation_timeout: float = None,
+        warmup: int = 1,
+        reload_pv: str = None,
+        models: Dict[str, Tuple[SurrogateModel, dict]] = None,
+        evaluation_workers: int = 1,
+        metrics_port: int = None,
+        out_queue_size: int = 0,
     ) -> None:
-        """Create OnlineSurrogateModel instance in the main thread and
+        """Create OnlineSurrogateModel instances in the main thread and
         initialize output variables by running with the input process variable
         state, input/output variable tracking, start the server, create the
         process variables, and start the driver.
@@ -64,6 +318,33 @@ class Server:
 
             model_kwargs (dict): Kwargs to instantiate model.
 
+            profile (str): Directory for writing profiles of the comm thread,
+                including the evaluation pool, and protocol processes. Profiles are
+                written on shutdown and on SIGUSR1. Profiling is disabled if not
+                provided.
+
+            evaluation_timeout (float): Maximum model evaluation time in seconds.
+                Outputs of evaluations exceeding the timeout are not served.
+
+            warmup (int): Number of evaluations with the default inputs run before
+                serving
+
+            reload_pv (str): Name of a string process variable served for
+                triggering model reloads. Putting the path of a model yaml
+                configuration reloads the model with reload_model.
+
+            models (Dict[str, Tuple[SurrogateModel, dict]]): Maps prefix to the
+                model class and kwargs of additional models to serve.
+
+            evaluation_workers (int): Number of threads evaluating models. Each
+                model is evaluated by one thread at a time.
+
+            metrics_port (int): Local port serving metrics in the Prometheus text
+                format over HTTP. Metrics are not served if not provided.
+
+            out_queue_size (int): Maximum number of messages waiting for each
+                protocol server. Messages over the limit are dropped and counted.
+                Defaults to no limit.
 
         """
         # check protocol conditions
@@ -76,72 +357,123 @@ class Server:
                 '(pvAccess) and "ca" (Channel Access).'
             )
 
-        # need these to be global to access from threads
-        self.prefix = prefix
-        self.protocols = protocols
+        served = {}
+        if model_class is not None:
+            if prefix is None:
+                raise ValueError("Prefix must be provided with model class.")
 
-        self.model = model_class(**model_kwargs)
-        self.input_variables = self.model.input_variables
+            served[prefix] = (model_class, model_kwargs)
 
-        # update inputs for starting value to be the default
-        for variable in self.input_variables.values():
-            if variable.value is None:
-                variable.value = variable.default
+        for model_prefix, (served_class, served_kwargs) in (models or {}).items():
+            if model_prefix in served:
+                raise ValueError(f"Multiple models provided for prefix {model_prefix}.")
 
-        model_input = list(self.input_variables.values())
+            served[model_prefix] = (served_class, served_kwargs)
 
-        self.input_variables = self.model.input_variables
-        self.output_variables = self.model.evaluate(model_input)
-        self.output_variables = {
-            variable.name: variable for variable in self.output_variables
-        }
+        if not served:
+            raise ValueError("Model must be provided to start server.")
+
+        # protocol processes are forked unless the application set a start method
+        if multiprocessing.get_start_method(allow_none=True) is None:
+            multiprocessing.set_start_method("fork")
+
+        # need these to be global to access from threads
+        self.prefix = next(iter(served))
+        self.protocols = protocols
+        self.profile = profile
+        self.reload_pv = reload_pv
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self.manager_pid = None
+        self._profiler = None
 
         self.in_queue = multiprocessing.Queue()
         self.out_queues = dict()
         for protocol in protocols:
-            self.out_queues[protocol] = multiprocessing.Queue()
+            self.out_queues[protocol] = multiprocessing.Queue(maxsize=out_queue_size)
+
+        self.dropped_messages = {protocol: 0 for protocol in protocols}
+        self._dropped_lock = threading.Lock()
+
+        self.models = {
+            model_prefix: ServedModel(
+                model_prefix,
+                served_class,
+                model_kwargs=served_kwargs,
+                evaluation_timeout=evaluation_timeout,
+                warmup=warmup,
+                callback=partial(self._publish_outputs, model_prefix),
+            )
+            for model_prefix, (served_class, served_kwargs) in served.items()
+        }
 
-        self.exit_event = Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=evaluation_workers, thread_name_prefix="model-pool"
+        )
 
-        self._running_indicator = multiprocessing.Value("b", False)
+        self.exit_event = Event()
 
-        # we use the running marker to make sure pvs + ca don't just keep adding queue elements
+        # we use the running markers to make sure pvs + ca don't just keep adding queue elements
         self.comm_thread = threading.Thread(
-            target=self.run_comm_thread,
-            kwargs={
-                "model_kwargs": model_kwargs,
-                "in_queue": self.in_queue,
-                "out_queues": self.out_queues,
-                "running_indicator": self._running_indicator,
-            },
+            target=self._comm_thread_main,
+            kwargs={"in_queue": self.in_queue, "out_queues": self.out_queues},
         )
 
-        # initialize channel access server
+        variables = {
+            model_prefix: (model.input_variables, model.output_variables)
+            for model_prefix, model in self.models.items()
+        }
+        running_indicators = {
+            model_prefix: model.running_indicator
+            for model_prefix, model in self.models.items()
+        }
+
+        # initialize channel access server, importing pcaspy only when served
         if "ca" in protocols:
+            from .epics_ca_server import CAServer
+
             self.ca_process = CAServer(
-                prefix=self.prefix,
-                input_variables=self.input_variables,
-                output_variables=self.output_variables,
+                variables=variables,
                 in_queue=self.in_queue,
                 out_queue=self.out_queues["ca"],
-                running_indicator=self._running_indicator,
+                running_indicators=running_indicators,
+                profile=profile,
+                reload_pv=reload_pv,
             )
 
-        # initialize pvAccess server
+        # initialize pvAccess server, importing p4p only when served
         if "pva" in protocols:
+            from .epics_pva_server import PVAServer
 
-            manager = multiprocessing.Manager()
-            self._pva_conf = manager.dict()
+            self._manager = multiprocessing.Manager()
+            self.manager_pid = self._manager._process.pid
+            self._pva_conf = self._manager.dict()
             self.pva_process = PVAServer(
-                prefix=self.prefix,
-                input_variables=self.input_variables,
-                output_variables=self.output_variables,
+                variables=variables,
                 in_queue=self.in_queue,
                 out_queue=self.out_queues["pva"],
                 conf_proxy=self._pva_conf,
-                running_indicator=self._running_indicator,
+                running_indicators=running_indicators,
+                profile=profile,
+                reload_pv=reload_pv,
             )
 
+    @property
+    def model(self) -> SurrogateModel:
+        return self.models[self.prefix].model
+
+    @property
+    def online_model(self) -> OnlineSurrogateModel:
+        return self.models[self.prefix].online_model
+
+    @property
+    def input_variables(self) -> Dict[str, InputVariable]:
+        return self.models[self.prefix].input_variables
+
+    @property
+    def output_variables(self) -> Dict[str, OutputVariable]:
+        return self.models[self.prefix].output_variables
+
     def __enter__(self):
         """Handle server startup
         """
@@ -153,67 +485,286 @@ class Server:
         """
         self.stop()
 
+    def _comm_thread_main(self, **kwargs) -> None:
+        """Runs the comm thread, profiling it if requested.
+
+        """
+        if self.profile is None:
+            self.run_comm_thread(**kwargs)
+            return
+
+        self._profiler = Profiler(self.profile, "comm_thread")
+        self._profiler.start()
+
+        try:
+            self.run_comm_thread(**kwargs)
+
+        finally:
+            self._profiler.stop()
+
+    def _handle_profile_signal(self, signum, frame) -> None:
+        """SIGUSR1 handler requesting profiles from the comm thread and protocol
+        processes.
+
+        """
+        if self._profiler is not None:
+            self._profiler.request_dump()
+
+        for protocol in self.protocols:
+            process = getattr(self, f"{protocol}_process")
+            if process.pid is not None:
+                os.kill(process.pid, signal.SIGUSR1)
+
+    def _get_served_model(self, prefix: str = None) -> ServedModel:
+        """Returns the model served under a prefix, defaulting to the first served.
+
+        """
+        if prefix is None:
+            prefix = self.prefix
+
+        if prefix not in self.models:
+            raise ValueError(f"No model served under prefix {prefix}.")
+
+        return self.models[prefix]
+
+    def reload_model(
+        self,
+        model_class: SurrogateModel,
+        model_kwargs: dict = {},
+        block: bool = False,
+        prefix: str = None,
+    ) -> threading.Thread:
+        """Replaces a served model without restarting the EPICS servers. The new
+        model is instantiated and warmed up in a background thread, and swapped in
+        before the next evaluation if its variables match the served variables. The
+        new model is then evaluated with the current inputs.
+
+        Args:
+            model_class (SurrogateModel): Surrogate model class to be instantiated.
+
+            model_kwargs (dict): Kwargs to instantiate model.
+
+            block (bool): Wait until the model has been loaded. Errors are raised
+                when blocking and logged otherwise.
+
+            prefix (str): Prefix of the replaced model, defaults to the first served
+
+        """
+        served = self._get_served_model(prefix)
+
+        if block:
+            served.load(model_class, model_kwargs)
+            self._schedule(served, {}, refresh=True)
+            return None
+
+        def load():
+            try:
+                served.load(model_class, model_kwargs)
+                self._schedule(served, {}, refresh=True)
+
+            except Exception:
+                logger.exception("Unable to reload model %s.", model_class)
+
+        thread = threading.Thread(target=load, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def reload_model_from_yaml(
+        self, filename: str, prefix: str = None
+    ) -> threading.Thread:
+        """Replaces a served model with a model loaded from a yaml configuration
+        file in the background. See reload_model.
+
+        Args:
+            filename (str): Path of the model configuration file
+
+            prefix (str): Prefix of the replaced model, defaults to the first served
+
+        """
+        served = self._get_served_model(prefix)
+
+        def load():
+            from lume_model.utils import model_from_yaml
+
+            try:
+                with open(filename, "r") as f:
+                    model_class, model_kwargs = model_from_yaml(f, load_model=False)
+
+                served.load(model_class, model_kwargs)
+                self._schedule(served, {}, refresh=True)
+
+            except Exception:
+                logger.exception("Unable to reload model from %s.", filename)
+
+        thread = threading.Thread(target=load, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def _schedule(self, served: ServedModel, values: dict, refresh: bool = False):
+        """Queues input updates of a served model and submits its evaluation to the
+        pool unless one is already scheduled.
+
+        Args:
+            served (ServedModel): Model to evaluate
+
+            values (dict): Maps input variable name to the protocol and value of the
+                update
+
+            refresh (bool): Evaluate even if no updates are queued
+
+        """
+        if served.queue(values, refresh=refresh):
+            self._executor.submit(self._run_evaluations, served, self.out_queues)
+
+    def _run_evaluations(
+        self, served: ServedModel, out_queues: Dict[str, multiprocessing.Queue]
+    ) -> None:
+        """Evaluates a served model until no input updates are left. Runs on the
+        evaluation pool, profiled into the comm thread profile when profiling.
+
+        """
+        # pool workers are profiled with the comm thread
+        if self._profiler is not None:
+            context = self._profiler.profile_worker()
+
+        else:
+            context = nullcontext()
+
+        with context:
+            while True:
+                values = served.take_queued()
+                if values is None:
+                    return
+
+                try:
+                    # swap in reloaded models between evaluations
+                    served.swap()
+
+                    for name, (_, value) in values.items():
+                        served.input_variables[name].value = value
+
+                    # sync pva/ca
+                    for protocol, queue in out_queues.items():
+                        synced = [
+                            served.input_variables[name]
+                            for name, (origin, _) in values.items()
+                            if origin != protocol
+                        ]
+
+                        if synced:
+                            self._put_message(
+                                protocol,
+                                queue,
+                                {"prefix": served.prefix, "input_variables": synced},
+                            )
+
+                    # update output variable state
+                    self._evaluate(served, out_queues)
+
+                except Exception:
+                    logger.exception("Unable to evaluate model for %s.", served.prefix)
+
+    def _evaluate(
+        self, served: ServedModel, out_queues: Dict[str, multiprocessing.Queue]
+    ) -> None:
+        """Evaluates a served model with the current inputs and queues the outputs
+        for the protocol servers.
+
+        """
+        model_input = list(served.input_variables.values())
+
+        try:
+            predicted_output = served.online_model.run(model_input)
+
+        # outputs of timed out evaluations are not served, the newest rejected
+        # inputs are evaluated and published once the evaluation finishes
+        except TimeoutError as error:
+            logger.error(str(error))
+            return
+
+        self._publish_outputs(served.prefix, predicted_output, out_queues)
+
+    def _publish_outputs(
+        self,
+        prefix: str,
+        output_variables: List[OutputVariable],
+        out_queues: Dict[str, multiprocessing.Queue] = None,
+    ) -> None:
+        """Queues the outputs of a served model for the protocol servers.
+
+        """
+        for protocol, queue in (out_queues or self.out_queues).items():
+            self._put_message(
+                protocol,
+                queue,
+                {"prefix": prefix, "output_variables": output_variables},
+            )
+
+    def _put_message(
+        self, protocol: str, queue: multiprocessing.Queue, message: dict
+    ) -> None:
+        """Queues a message for a protocol server, counting it as dropped if the
+        queue is full. Never blocks, so stalled protocol servers do not slow
+        evaluations.
+
+        """
+        try:
+            queue.put_nowait(message)
+
+        except Full:
+            logger.error(f"{protocol} queue is full.")
+
+            with self._dropped_lock:
+                self.dropped_messages[protocol] += 1
+
     def run_comm_thread(
         self,
         *,
-        running_indicator: multiprocessing.Value,
-        model_kwargs={},
         in_queue: multiprocessing.Queue = None,
         out_queues: Dict[str, multiprocessing.Queue] = None,
     ):
-        """Handles communications between pvAccess server, Channel Access server, and model.
+        """Handles communications between pvAccess server, Channel Access server, and
+        the evaluation pool.
 
         Arguments:
-            model_class: Model class to be executed.
-
-            model_kwargs (dict): Dictionary of model keyword arguments.
-
-            in_queue (multiprocessing.Queue):
+            in_queue (multiprocessing.Queue): Queue of input updates and reload
+                requests from the protocol servers
 
             out_queues (Dict[str: multiprocessing.Queue]): Maps protocol to output assignment queue.
 
-            running_marker (multiprocessing.Value): multiprocessing marker for whether comm thread computing or not
-
         """
-        model = self.model
-
         while not self.exit_event.is_set():
             try:
-
                 data = in_queue.get(timeout=0.1)
 
-                # mark running
-                running_indicator.value = True
+                served = self.models.get(data.get("prefix", self.prefix))
+                if served is None:
+                    logger.error("No model served under prefix %s.", data["prefix"])
+                    continue
 
-                for pv in data["pvs"]:
-                    self.input_variables[pv].value = data["pvs"][pv]
+                # reload requested over the reload process variable
+                if "reload" in data:
+                    self.reload_model_from_yaml(data["reload"], prefix=served.prefix)
+                    continue
 
-                # sync pva/ca
-                for protocol, queue in out_queues.items():
-                    if protocol == data["protocol"]:
-                        continue
+                self._schedule(
+                    served,
+                    {
+                        name: (data["protocol"], value)
+                        for name, value in data["pvs"].items()
+                    },
+                )
 
-                    queue.put(
-                        {
-                            "input_variables": [
-                                self.input_variables[pv] for pv in data["pvs"]
-                            ]
-                        }
-                    )
-
-                # update output variable state
-                model_input = list(self.input_variables.values())
-                predicted_output = model.evaluate(model_input)
-                for protocol, queue in out_queues.items():
-                    queue.put({"output_variables": predicted_output}, timeout=0.1)
+            except Empty:
+                pass
 
-                running_indicator.value = False
+            if self._profiler is not None:
+                self._profiler.check_dump()
 
-            except Empty:
-                continue
+        self._executor.shutdown(wait=True)
 
-            except Full:
-                logger.error(f"{protocol} queue is full.")
+        for served in self.models.values():
+            served.online_model.close()
 
         logger.info("Stopping comm thread")
 
@@ -234,6 +785,20 @@ class Server:
         if "pva" in self.protocols:
             self.pva_process.start()
 
+        # serve metrics from a separate thread, importing http.server only when served
+        if self.metrics_port is not None:
+            from lume_epics.metrics import MetricsServer
+
+            self.metrics_server = MetricsServer(self, port=self.metrics_port)
+            self.metrics_server.start()
+
+        # signal handlers may only be installed from the main thread
+        if (
+            self.profile is not None
+            and threading.current_thread() is threading.main_thread()
+        ):
+            signal.signal(signal.SIGUSR1, self._handle_profile_signal)
+
         if monitor:
             try:
                 while True:
@@ -250,6 +815,9 @@ class Server:
         self.exit_event.set()
         self.comm_thread.join()
 
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+
         if "ca" in self.protocols:
             self.ca_process.shutdown()
 
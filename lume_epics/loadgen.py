@@ -0,0 +1,439 @@
+"""
+The loadgen module drives synthetic load against a lume-epics server for sizing
+deployments. Simulated clients run in separate processes, each with its own
+Controller. Putting clients assign random input values at a configured rate and
+time the round trip to the next output update, and monitor clients subscribe to
+the selected outputs to add monitor fan-out, e.g. on large images.
+
+A local server may be run in the same process, in which case the report includes
+server-side evaluation counts and latencies:
+
+```
+server = Server(MyModel, "load", protocols=["ca"])
+server.start(monitor=False)
+
+report = run_load(
+    "ca", "load", server.input_variables, server.output_variables, server=server,
+    clients=4, monitors=16, put_rates=[1.0, 10.0], duration=60,
+)
+print(format_report(report))
+```
+
+"""
+
+import copy
+import logging
+import multiprocessing
+import os
+import random
+import time
+from queue import Empty
+from typing import Dict, List
+
+import numpy as np
+
+from lume_epics.model import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# environment restricting Channel Access and pvAccess to the loopback interface
+LOOPBACK_ENVIRONMENT = {
+    "EPICS_CA_ADDR_LIST": "127.0.0.1",
+    "EPICS_CA_AUTO_ADDR_LIST": "NO",
+    "EPICS_CAS_INTF_ADDR_LIST": "127.0.0.1",
+    "EPICS_PVA_ADDR_LIST": "127.0.0.1",
+    "EPICS_PVA_AUTO_ADDR_LIST": "NO",
+    "EPICS_PVAS_INTF_ADDR_LIST": "127.0.0.1",
+}
+
+# seconds clients wait for their monitors to connect before starting
+CONNECTION_TIMEOUT = 10.0
+
+
+def use_loopback() -> None:
+    """Restrict EPICS servers and clients created afterwards to the loopback
+    interface.
+
+    """
+    os.environ.update(LOOPBACK_ENVIRONMENT)
+
+
+def default_put_pvs(input_variables: dict) -> List[str]:
+    """Returns the names of the non-constant scalar input variables.
+
+    Args:
+        input_variables (dict): Dict mapping input variable names to variable
+
+    """
+    return [
+        name
+        for name, variable in input_variables.items()
+        if variable.variable_type == "scalar" and not variable.is_constant
+    ]
+
+
+def random_value(variable) -> float:
+    """Returns a random value within the range of a scalar variable.
+
+    """
+    value_range = getattr(variable, "value_range", None)
+    if value_range is None:
+        return float(np.random.random())
+
+    return float(np.random.uniform(value_range[0], value_range[1]))
+
+
+def run_client(
+    client_id: int,
+    protocol: str,
+    prefix: str,
+    input_variables: dict,
+    output_variables: dict,
+    put_rate: float,
+    duration: float,
+    results: multiprocessing.Queue,
+    wait_pv: str = None,
+    timeout: float = 5.0,
+) -> None:
+    """Runs a simulated client. Clients with a put rate assign random values to the
+    input variables and time the round trip to the next update of the wait
+    variable. Put slots missed while waiting on a round trip are counted as missed.
+    All clients monitor the output variables.
+
+    Args:
+        client_id (int): Index of the client
+
+        protocol (str): Protocol used by the client ("pva" or "ca")
+
+        prefix (str): Prefix of the served process variables
+
+        input_variables (dict): Input variables put to by the client
+
+        output_variables (dict): Output variables monitored by the client
+
+        put_rate (float): Puts per second, zero for monitor only clients
+
+        duration (float): Seconds to generate load
+
+        results (multiprocessing.Queue): Queue the client report is put to
+
+        wait_pv (str): Output variable whose update completes a round trip
+
+        timeout (float): Seconds before a round trip is counted as dropped
+
+    """
+    from lume_epics.client.controller import Controller
+
+    random.seed(client_id)
+    np.random.seed(client_id)
+
+    controller = Controller(protocol, input_variables, output_variables, prefix)
+    connection = controller.wait_for_connection(timeout=CONNECTION_TIMEOUT)
+
+    latency = LatencyHistogram()
+    puts = 0
+    timeouts = 0
+    missed = 0
+
+    put_pvs = list(input_variables)
+    start = time.time()
+    end = start + duration
+
+    if put_rate and put_pvs and wait_pv is not None:
+        period = 1.0 / put_rate
+        next_put = start
+
+        while next_put < end:
+            now = time.time()
+            if next_put > now:
+                time.sleep(next_put - now)
+
+            pvname = random.choice(put_pvs)
+            value = random_value(input_variables[pvname])
+
+            try:
+                _, elapsed = controller.put_and_wait(
+                    {pvname: value}, [wait_pv], timeout=timeout
+                )
+                latency.observe(elapsed)
+
+            except TimeoutError:
+                timeouts += 1
+
+            puts += 1
+            next_put += period
+
+            # skip slots that passed while waiting on the round trip
+            behind = int((time.time() - next_put) / period)
+            if behind > 0:
+                missed += behind
+                next_put += behind * period
+
+    else:
+        time.sleep(max(end - time.time(), 0))
+
+    elapsed = time.time() - start
+    stats = controller.stats()
+    controller.close()
+
+    results.put(
+        {
+            "client": client_id,
+            "elapsed": elapsed,
+            "failed_connections": len(connection["failed"]),
+            "puts": puts,
+            "timeouts": timeouts,
+            "missed": missed,
+            "latency": latency,
+            "monitor_updates": sum(entry["count"] for entry in stats.values()),
+            "monitor_bytes": sum(entry["bytes"] for entry in stats.values()),
+            "disconnects": sum(entry["disconnects"] for entry in stats.values()),
+        }
+    )
+
+
+def _snapshot_latencies(server) -> Dict[str, LatencyHistogram]:
+    """Returns copies of the evaluation latency histograms of the served models.
+
+    """
+    return {
+        prefix: copy.deepcopy(served.online_model.latency)
+        for prefix, served in server.models.items()
+    }
+
+
+def _latency_window(
+    start: LatencyHistogram, end: LatencyHistogram
+) -> LatencyHistogram:
+    """Returns the histogram of latencies recorded between two snapshots. The
+    maximum is that of the end snapshot.
+
+    """
+    window = LatencyHistogram(buckets=end.buckets)
+    window.counts = [b - a for a, b in zip(start.counts, end.counts)]
+    window.count = end.count - start.count
+    window.sum = end.sum - start.sum
+    window.max = end.max
+    return window
+
+
+def run_load(
+    protocol: str,
+    prefix: str,
+    input_variables: dict,
+    output_variables: dict,
+    clients: int = 1,
+    monitors: int = 0,
+    put_rates: List[float] = [1.0],
+    duration: float = 10.0,
+    put_pvs: List[str] = None,
+    monitor_pvs: List[str] = None,
+    wait_pv: str = None,
+    timeout: float = 5.0,
+    server=None,
+) -> dict:
+    """Runs simulated clients against a server and collects their reports. Round
+    trip latencies are only exact with one putting client, see the module
+    documentation.
+
+    Args:
+        protocol (str): Protocol used by the clients ("pva" or "ca")
+
+        prefix (str): Prefix of the served process variables
+
+        input_variables (dict): Dict mapping input variable names to variable
+
+        output_variables (dict): Dict mapping output variable names to variable
+
+        clients (int): Number of putting clients
+
+        monitors (int): Number of monitor only clients
+
+        put_rates (List[float]): Puts per second of the putting clients, cycled
+            over the clients to mix rates
+
+        duration (float): Seconds to generate load
+
+        put_pvs (List[str]): Input variables put to, defaults to the non-constant
+            scalar inputs
+
+        monitor_pvs (List[str]): Output variables monitored by every client,
+            defaults to all outputs
+
+        wait_pv (str): Output variable completing round trips, defaults to the
+            first monitored output
+
+        timeout (float): Seconds before a round trip is counted as dropped
+
+        server (Server): Local server, included in the report if provided
+
+    """
+    if put_pvs is None:
+        put_pvs = default_put_pvs(input_variables)
+
+    if monitor_pvs is None:
+        monitor_pvs = list(output_variables)
+
+    if wait_pv is None and monitor_pvs:
+        wait_pv = monitor_pvs[0]
+
+    if wait_pv is not None and wait_pv not in monitor_pvs:
+        monitor_pvs = monitor_pvs + [wait_pv]
+
+    if clients > 1:
+        logger.warning(
+            "Round trips of %s putting clients may be completed by evaluations of "
+            "other clients. Round trip latencies are only exact with one client.",
+            clients,
+        )
+
+    client_inputs = {name: input_variables[name] for name in put_pvs}
+    client_outputs = {name: output_variables[name] for name in monitor_pvs}
+
+    # spawn clients so they do not inherit the server threads
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    processes = []
+    for client_id in range(clients + monitors):
+        putting = client_id < clients
+        process = context.Process(
+            target=run_client,
+            name=f"load-client-{client_id}",
+            kwargs={
+                "client_id": client_id,
+                "protocol": protocol,
+                "prefix": prefix,
+                "input_variables": client_inputs if putting else {},
+                "output_variables": client_outputs,
+                "put_rate": put_rates[client_id % len(put_rates)] if putting else 0,
+                "duration": duration,
+                "results": results,
+                "wait_pv": wait_pv,
+                "timeout": timeout,
+            },
+            daemon=True,
+        )
+        processes.append(process)
+
+    server_start = _snapshot_latencies(server) if server is not None else None
+
+    for process in processes:
+        process.start()
+
+    reports = []
+    deadline = time.time() + duration + CONNECTION_TIMEOUT + timeout + 30
+    while len(reports) < len(processes):
+        try:
+            reports.append(results.get(timeout=max(deadline - time.time(), 0.1)))
+
+        except Empty:
+            if time.time() > deadline:
+                logger.error(
+                    "%s clients did not report.", len(processes) - len(reports)
+                )
+                break
+
+    for process in processes:
+        process.join(timeout=5)
+
+        if process.is_alive():
+            process.terminate()
+
+    report = summarize(reports, duration)
+    report["put_pvs"] = put_pvs
+    report["monitor_pvs"] = monitor_pvs
+    report["latency_exact"] = clients <= 1
+
+    # reloaded models start new histograms, so windows only span one model
+    if server is not None:
+        report["server"] = {}
+
+        for model_prefix, latency in _snapshot_latencies(server).items():
+            if latency.count >= server_start[model_prefix].count:
+                latency = _latency_window(server_start[model_prefix], latency)
+
+            report["server"][model_prefix] = {
+                "evaluations": latency.count,
+                "evaluation_rate": latency.count / duration,
+                "latency": latency.summary(),
+            }
+
+    return report
+
+
+def summarize(reports: List[dict], duration: float) -> dict:
+    """Combines the client reports into client-side throughput, latency, and drop
+    counts.
+
+    Args:
+        reports (List[dict]): Reports put by run_client
+
+        duration (float): Seconds load was generated for
+
+    """
+    latency = LatencyHistogram()
+    for report in reports:
+        latency.merge(report["latency"])
+
+    puts = sum(report["puts"] for report in reports)
+    monitor_updates = sum(report["monitor_updates"] for report in reports)
+
+    return {
+        "duration": duration,
+        "clients": len(reports),
+        "puts": puts,
+        "put_rate": puts / duration,
+        "latency": latency.summary(),
+        "timeouts": sum(report["timeouts"] for report in reports),
+        "missed": sum(report["missed"] for report in reports),
+        "failed_connections": sum(report["failed_connections"] for report in reports),
+        "disconnects": sum(report["disconnects"] for report in reports),
+        "monitor_updates": monitor_updates,
+        "monitor_rate": monitor_updates / duration,
+        "monitor_bytes_rate": sum(report["monitor_bytes"] for report in reports)
+        / duration,
+    }
+
+
+def format_report(report: dict) -> str:
+    """Formats a load report for printing.
+
+    Args:
+        report (dict): Report returned by run_load
+
+    """
+    latency = report["latency"]
+    lines = [
+        f"Clients: {report['clients']} over {report['duration']} s",
+        f"Puts: {report['puts']} ({report['put_rate']:.2f}/s)",
+        f"Round trip latency (ms): mean {latency['mean'] * 1000:.2f}, "
+        f"p50 {latency['p50'] * 1000:.2f}, p90 {latency['p90'] * 1000:.2f}, "
+        f"p99 {latency['p99'] * 1000:.2f}, max {latency['max'] * 1000:.2f}",
+    ]
+
+    if not report.get("latency_exact", True):
+        lines.append(
+            "  Approximate: round trips may be completed by evaluations of other "
+            "clients, latency is only exact with one putting client"
+        )
+
+    lines += [
+        f"Dropped: {report['timeouts']} timed out, {report['missed']} missed put "
+        f"slots, {report['failed_connections']} failed connections, "
+        f"{report['disconnects']} disconnects",
+        f"Monitor updates: {report['monitor_updates']} "
+        f"({report['monitor_rate']:.2f}/s, "
+        f"{report['monitor_bytes_rate'] / 1e6:.2f} MB/s)",
+    ]
+
+    for prefix, stats in report.get("server", {}).items():
+        latency = stats["latency"]
+        lines.append(
+            f"Server {prefix}: {stats['evaluations']} evaluations "
+            f"({stats['evaluation_rate']:.2f}/s), latency (ms): "
+            f"mean {latency['mean'] * 1000:.2f}, p50 {latency['p50'] * 1000:.2f}, "
+            f"p99 {latency['p99'] * 1000:.2f}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,358 @@
+"""
+The metrics module exposes server health over HTTP in the Prometheus text format,
+for monitoring systems that cannot read Channel Access or pvAccess. Metrics are
+rendered on request from counters maintained by the server, so scrapes never
+block the comm thread or model evaluations.
+
+```
+server = Server(MyModel, "test", metrics_port=9100)
+server.start(monitor=False)
+
+$ curl localhost:9100/metrics
+```
+
+"""
+
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def process_stats(pid: int) -> dict:
+    """Returns the resident memory in bytes, cpu time in seconds, number of open
+    file descriptors, and number of threads of a process. Read from /proc, so only
+    supported on Linux, raising FileNotFoundError elsewhere.
+
+    Args:
+        pid (int): Process id
+
+    """
+    status = {}
+    with open(f"/proc/{pid}/status", "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            status[key] = value.split()
+
+    # fields following the command name, which may contain spaces
+    with open(f"/proc/{pid}/stat", "r") as f:
+        stat = f.read()
+
+    fields = stat[stat.rindex(")") + 2 :].split()
+    ticks = int(fields[11]) + int(fields[12])
+
+    return {
+        "rss_bytes": int(status["VmRSS"][0]) * 1024,
+        "cpu_seconds": ticks / os.sysconf("SC_CLK_TCK"),
+        "fds": len(os.listdir(f"/proc/{pid}/fd")),
+        "threads": int(status["Threads"][0]),
+    }
+
+
+def queue_depth(queue) -> int:
+    """Returns the number of messages waiting in a multiprocessing queue, or None
+    on platforms not supporting qsize, e.g. macOS.
+
+    Args:
+        queue (multiprocessing.Queue): Queue to measure
+
+    """
+    try:
+        return queue.qsize()
+
+    except NotImplementedError:
+        return None
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    formatted = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+    return "{" + formatted + "}"
+
+
+def _format_metric(
+    name: str, kind: str, description: str, samples: List[Tuple[dict, float]]
+) -> List[str]:
+    """Returns the lines of a metric family.
+
+    Args:
+        name (str): Metric name
+
+        kind (str): Prometheus metric type, e.g. "counter" or "gauge"
+
+        description (str): Help text
+
+        samples (List[Tuple[dict, float]]): Labels and value of each sample
+
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    return lines
+
+
+def _format_histogram(name: str, description: str, histograms: dict) -> List[str]:
+    """Returns the lines of a histogram metric family built from latency
+    histograms.
+
+    Args:
+        name (str): Metric name
+
+        description (str): Help text
+
+        histograms (dict): Maps labels, as a tuple of items, to LatencyHistogram
+
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+
+    for labels, histogram in histograms.items():
+        labels = dict(labels)
+
+        counts, count, total = histogram.snapshot()
+
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            bucket_labels = _format_labels({**labels, "le": bound})
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return lines
+
+
+def _server_processes(server) -> Dict[str, int]:
+    """Returns the ids of the running server processes by name.
+
+    """
+    processes = {"server": os.getpid()}
+
+    for protocol in server.protocols:
+        pid = getattr(server, f"{protocol}_process").pid
+        if pid is not None:
+            processes[protocol] = pid
+
+    if server.manager_pid is not None:
+        processes["manager"] = server.manager_pid
+
+    return processes
+
+
+def render_metrics(server) -> str:
+    """Renders the metrics of a server in the Prometheus text format.
+
+    Args:
+        server (Server): Server to report on
+
+    """
+    models = list(server.models.values())
+    lines = []
+
+    lines += _format_metric(
+        "lume_epics_evaluations_total",
+        "counter",
+        "Model evaluations. Resets when the model is reloaded.",
+        [
+            ({"prefix": served.prefix}, served.online_model.latency.count)
+            for served in models
+        ],
+    )
+
+    lines += _format_metric(
+        "lume_epics_evaluation_timeouts_total",
+        "counter",
+        "Model evaluations exceeding the evaluation timeout.",
+        [({"prefix": served.prefix}, served.online_model.timeouts) for served in models],
+    )
+
+    lines += _format_histogram(
+        "lume_epics_evaluation_latency_seconds",
+        "Model evaluation latency.",
+        {
+            (("prefix", served.prefix),): served.online_model.latency
+            for served in models
+        },
+    )
+
+    lines += _format_metric(
+        "lume_epics_coalesced_updates_total",
+        "counter",
+        "Input updates combined into an already scheduled evaluation.",
+        [({"prefix": served.prefix}, served.coalesced_updates) for served in models],
+    )
+
+    queues = [({"queue": "in"}, server.in_queue)]
+    for protocol, queue in server.out_queues.items():
+        queues.append(({"queue": "out", "protocol": protocol}, queue))
+
+    # depths are left out where qsize is not supported
+    queue_depths = []
+    for labels, queue in queues:
+        depth = queue_depth(queue)
+        if depth is not None:
+            queue_depths.append((labels, depth))
+
+    lines += _format_metric(
+        "lume_epics_queue_depth",
+        "gauge",
+        "Messages waiting in the server queues.",
+        queue_depths,
+    )
+
+    lines += _format_metric(
+        "lume_epics_dropped_messages_total",
+        "counter",
+        "Messages dropped because the out queue of a protocol server was full.",
+        [
+            ({"protocol": protocol}, count)
+            for protocol, count in server.dropped_messages.items()
+        ],
+    )
+
+    processes = {
+        protocol: getattr(server, f"{protocol}_process")
+        for protocol in server.protocols
+    }
+
+    lines += _format_metric(
+        "lume_epics_coalesced_puts_total",
+        "counter",
+        "Puts replaced by a later put to the same variable while the model ran.",
+        [
+            ({"protocol": protocol}, process.coalesced_puts.value)
+            for protocol, process in processes.items()
+        ],
+    )
+
+    lines += _format_metric(
+        "lume_epics_published_updates_total",
+        "counter",
+        "Variable updates published by each protocol server.",
+        [
+            ({"protocol": protocol}, process.published_updates.value)
+            for protocol, process in processes.items()
+        ],
+    )
+
+    cpu = []
+    rss = []
+    for name, pid in _server_processes(server).items():
+        try:
+            stats = process_stats(pid)
+
+        # processes may exit between listing and reading, and /proc is only
+        # available on Linux
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+
+        cpu.append(({"process": name}, stats["cpu_seconds"]))
+        rss.append(({"process": name}, stats["rss_bytes"]))
+
+    lines += _format_metric(
+        "lume_epics_process_cpu_seconds_total",
+        "counter",
+        "User and system cpu time of the server processes.",
+        cpu,
+    )
+
+    lines += _format_metric(
+        "lume_epics_process_resident_memory_bytes",
+        "gauge",
+        "Resident memory of the server processes.",
+        rss,
+    )
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    HTTP server exposing the metrics of a server at /metrics. Requests are handled
+    on their own threads.
+
+    Attributes:
+        server (Server): Server reported on
+
+        host (str): Interface served on
+
+        port (int): Port served on, assigned by the system if 0 was requested
+
+    """
+
+    def __init__(self, server, port: int, host: str = "127.0.0.1") -> None:
+        """Initialize the HTTP server, binding the port.
+
+        Args:
+            server (Server): Server to report on
+
+            port (int): Port to serve on, 0 for a system assigned port
+
+            host (str): Interface to serve on, defaults to the loopback interface
+
+        """
+        self.server = server
+        self.host = host
+
+        metrics_server = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ["/", "/metrics"]:
+                    self.send_error(404)
+                    return
+
+                try:
+                    body = render_metrics(metrics_server.server).encode()
+
+                except Exception:
+                    logger.exception("Unable to render metrics.")
+                    self.send_error(500)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self._http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._http_server.daemon_threads = True
+        self.port = self._http_server.server_address[1]
+        self._thread = None
+
+    def start(self) -> None:
+        """Serve metrics from a background thread.
+
+        """
+        self._thread = threading.Thread(
+            target=self._http_server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+        logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    def stop(self) -> None:
+        """Stop serving and release the port.
+
+        """
+        if self._thread is not None:
+            self._http_server.shutdown()
+            self._thread.join()
+
+        self._http_server.server_close()
@@ -1,15 +1,23 @@
 """
 This module is used for executing callbacks on the user's SurrogateModel class for use
 with the EPICS server defined in lume_epics.epics_server. The SurrogateModel must be
-defined using the guidelines outlined in the lume_model.models module to be surfaced 
+defined using the guidelines outlined in the lume_model.models module to be surfaced
 using the OnlineSurrogateModel class.
 
 """
 
+import copy
 import numpy as np
 import time
 import logging
-from typing import Dict, Tuple, Mapping, Union, List
+import threading
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+)
+from functools import partial
+from typing import Callable, Dict, Tuple, Mapping, Union, List
 from abc import ABC, abstractmethod
 
 from lume_model.variables import InputVariable, OutputVariable
@@ -17,35 +25,338 @@ from lume_model.models import SurrogateModel
 
 logger = logging.getLogger(__name__)
 
+# upper bounds in seconds of the latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with fixed bucket bounds.
+
+    Attributes:
+        buckets (Tuple[float]): Upper bounds of the buckets in seconds. Latencies
+            above the last bound are counted in an overflow bucket.
+
+        counts (List[int]): Number of latencies in each bucket, including the
+            overflow bucket
+
+        count (int): Total number of latencies observed
+
+        sum (float): Sum of the latencies observed in seconds
+
+        max (float): Largest latency observed in seconds
+
+    """
+
+    def __init__(self, buckets: Tuple[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Initialize empty histogram.
+
+        Args:
+            buckets (Tuple[float]): Increasing upper bounds of the buckets in seconds
+
+        """
+        self.buckets = tuple(buckets)
+        self._bounds = np.array(self.buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe(self, latency: float) -> None:
+        """Record a latency.
+
+        Args:
+            latency (float): Latency in seconds
+
+        """
+        idx = int(np.searchsorted(self._bounds, latency))
+
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.sum += latency
+
+            if latency > self.max:
+                self.max = latency
+
+    def quantile(self, q: float) -> float:
+        """Returns the upper bound of the bucket containing a quantile, limited to
+        the largest latency observed.
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+
+            cumulative = np.cumsum(self.counts)
+            idx = int(np.searchsorted(cumulative, q * self.count))
+
+            if idx >= len(self.buckets):
+                return self.max
+
+            return min(self.buckets[idx], self.max)
+
+    def summary(self) -> dict:
+        """Returns the count, mean, maximum, and approximate quantiles in seconds.
+
+        """
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """Returns consistent copies of the bucket counts, total count, and sum.
+
+        """
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the latencies recorded by another histogram with the same buckets.
+
+        Args:
+            other (LatencyHistogram): Histogram to add
+
+        """
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets.")
+
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+            self.count += other.count
+            self.sum += other.sum
+            self.max = max(self.max, other.max)
+
+    def __getstate__(self) -> dict:
+        # locks cannot be pickled, e.g. when collected from worker processes
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+
 class OnlineSurrogateModel:
     """
-    Class for executing surrogate model.
+    Class for executing surrogate model. Evaluations are timed and recorded in a
+    latency histogram, and optionally run with a timeout.
 
     Attributes:
         model (SurrogateModel): Model for execution.
-            
+
         input_variables (List[InputVariable]): List of lume-model variables to use as inputs.
 
         ouput_variables (List[OutputVariable]): List of lume-model variables to use as outputs.
 
+        timeout (float): Maximum evaluation time in seconds, None for no limit
+
+        latency (LatencyHistogram): Latencies of model evaluations
+
+        warmup_time (float): Time in seconds spent on warmup evaluations
+
+        timeouts (int): Number of evaluations that timed out
+
+        callback (Callable[[List[OutputVariable]], None]): Called with the outputs of
+            inputs rejected while a timed out evaluation was running, once they
+            have been evaluated
+
+        _executor (ThreadPoolExecutor): Single worker running evaluations when a
+            timeout is set
+
+        _pending (Future): Last evaluation submitted to the executor
+
+        _rejected (List[InputVariable]): Newest inputs rejected while a timed out
+            evaluation was running
+
     """
 
     def __init__(
         self,
         model: SurrogateModel,
+        timeout: float = None,
+        callback: Callable[[List[OutputVariable]], None] = None,
     ) -> None:
         """
-        Initialize OnlineSurrogateModel with the surrogate model. 
+        Initialize OnlineSurrogateModel with the surrogate model.
 
         Args:
             model (SurrogateModel): Instantiated surrogate model.
 
+            timeout (float): Maximum evaluation time in seconds. Evaluations
+                exceeding the timeout raise a TimeoutError. Defaults to no limit.
+
+            callback (Callable[[List[OutputVariable]], None]): Called with the
+                outputs of inputs rejected while a timed out evaluation was running,
+                evaluated once it finishes.
+
         """
         self.model = model
+        self.timeout = timeout
+        self.latency = LatencyHistogram()
+        self.warmup_time = 0.0
+        self.timeouts = 0
+        self.callback = callback
 
         self.input_variables = list(self.model.input_variables.values())
         self.output_variables = self.model.output_variables
 
+        self._executor = None
+        self._pending = None
+        self._rejected = None
+        self._lock = threading.Lock()
+        if timeout is not None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="model-evaluation"
+            )
+
+    def warmup(self, n_evaluations: int = 1) -> None:
+        """
+        Evaluates the model with the default inputs so that one-time costs, e.g.
+        graph building, are paid before serving. Warmup evaluations use copies of
+        the input variables and are not recorded in the latency histogram.
+
+        Args:
+            n_evaluations (int): Number of warmup evaluations
+
+        """
+        model_input_variables = self.model.input_variables
+        input_variables = copy.deepcopy(list(model_input_variables.values()))
+        for variable in input_variables:
+            variable.value = variable.default
+
+        start = time.perf_counter()
+        for _ in range(n_evaluations):
+            self._evaluate(input_variables)
+
+        self.warmup_time = time.perf_counter() - start
+
+        # models may store the evaluated inputs, which must not be the copies
+        self.model.input_variables = model_input_variables
+        logger.info(
+            "Model warmup with %s evaluations took %s s", n_evaluations, self.warmup_time
+        )
+
+    def _evaluate(self, input_variables: List[InputVariable]) -> List[OutputVariable]:
+        """
+        Evaluates the model, enforcing the timeout if set.
+
+        Args:
+            input_variables (List[InputVariable]): List of lume-model variables to use as inputs.
+
+        """
+        if self._executor is None:
+            return self.model.evaluate(input_variables)
+
+        # timed out evaluations keep running and must not modify the served inputs
+        input_variables = copy.deepcopy(input_variables)
+
+        with self._lock:
+            # a timed out evaluation cannot be interrupted and still holds the worker
+            if self._pending is not None and not self._pending.done():
+                self.timeouts += 1
+                self._rejected = input_variables
+                raise TimeoutError("Previous model evaluation is still running.")
+
+            pending = self._executor.submit(self.model.evaluate, input_variables)
+            self._pending = pending
+
+        try:
+            return pending.result(timeout=self.timeout)
+
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+
+            pending.add_done_callback(self._evaluate_rejected)
+            raise TimeoutError(
+                f"Model evaluation exceeded timeout of {self.timeout} s."
+            ) from None
+
+    def _evaluate_rejected(self, finished: Future) -> None:
+        """
+        Done callback of timed out evaluations. Submits the newest inputs rejected
+        while the evaluation was running, unless a newer evaluation was submitted.
+
+        Args:
+            finished (Future): Finished evaluation
+
+        """
+        with self._lock:
+            input_variables, self._rejected = self._rejected, None
+
+            if input_variables is None or self._pending is not finished:
+                return
+
+            try:
+                pending = self._executor.submit(self.model.evaluate, input_variables)
+
+            # closed while the evaluation was running
+            except RuntimeError:
+                return
+
+            self._pending = pending
+
+        pending.add_done_callback(partial(self._complete_rejected, time.perf_counter()))
+
+    def _complete_rejected(self, start: float, finished: Future) -> None:
+        """
+        Done callback of evaluations of rejected inputs. Records the outputs and
+        passes them to the callback.
+
+        Args:
+            start (float): Time the evaluation was submitted
+
+            finished (Future): Finished evaluation
+
+        """
+        try:
+            predicted_output = finished.result()
+
+        except Exception:
+            logger.exception("Unable to evaluate rejected inputs.")
+            return
+
+        finally:
+            # inputs may have been rejected while this evaluation was running
+            self._evaluate_rejected(finished)
+
+        self.latency.observe(time.perf_counter() - start)
+
+        for variable in predicted_output:
+            self.output_variables[variable.name] = variable
+
+        if self.callback is not None:
+            self.callback(list(self.output_variables.values()))
+
     def run(
         self, input_variables: List[InputVariable]
     ) -> List[OutputVariable]:
@@ -53,21 +364,29 @@ class OnlineSurrogateModel:
         Executes both scalar and image model given process variable value inputs.
 
         Args:
-            input_variables (List[InputVariable]): List of lume-model variables to use as inputs.            
+            input_variables (List[InputVariable]): List of lume-model variables to use as inputs.
 
         """
         # update input variables and get state representation
         self.input_variables = input_variables
 
         # update output variable state
-        predicted_output = self.model.evaluate(self.input_variables)
+        start = time.perf_counter()
+        predicted_output = self._evaluate(self.input_variables)
+        elapsed = time.perf_counter() - start
+
+        self.latency.observe(elapsed)
+        logger.debug("Model evaluation took %s s", elapsed)
 
-        logger.info("Running model")
-        t1 = time.time()
         for variable in predicted_output:
             self.output_variables[variable.name] = variable
-        t2 = time.time()
-    
-        logger.info("Ellapsed time: %s", str(t2 - t1))
 
         return list(self.output_variables.values())
+
+    def close(self) -> None:
+        """
+        Shut down the evaluation worker without waiting for a running evaluation.
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,288 @@
+"""
+The profiling module contains tools for profiling the server threads and protocol
+processes. Each profiled thread runs a deterministic cProfile profiler, and a
+sampling profiler records the stacks of all threads of the process. Threads running tasks
+on behalf of the profiled thread, e.g. pool workers, are profiled while running
+them and merged into its profile. Profiles are written on shutdown or on request,
+e.g. from a SIGUSR1 handler.
+
+For each profiled thread, the profiler directory receives:
+
+    {name}.pstats       # cProfile statistics, readable with pstats or snakeviz
+    {name}.collapsed    # sampled stacks in collapsed format for flamegraph.pl
+    {name}_summary.txt  # hot functions from both profilers
+
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# functions reported in summaries
+DEFAULT_TRACKED_FUNCTIONS = ["run_comm_thread", "update_pvs", "evaluate"]
+
+
+class Profiler:
+    """
+    Profiler combining a deterministic profiler of the starting thread with a
+    sampling profiler of all threads of the process.
+
+    Attributes:
+        directory (str): Directory profiles are written to
+
+        name (str): Name used for the profile files
+
+        interval (float): Seconds between stack samples
+
+        tracked_functions (List[str]): Function names reported in the summary
+
+        _profile (cProfile.Profile): Deterministic profiler of the starting thread
+
+        _worker_profiles (dict): Maps thread id to the deterministic profiler of a
+            worker thread
+
+        _worker_stats (dict): Maps thread id to the statistics of a worker thread
+            as of its last profiled task
+
+        _stacks (Counter): Number of samples of each collapsed stack
+
+        _dump_requested (threading.Event): Set when a dump has been requested from
+            another thread or a signal handler
+
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        name: str,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        tracked_functions: List[str] = DEFAULT_TRACKED_FUNCTIONS,
+    ) -> None:
+        """Initialize the profiler.
+
+        Args:
+            directory (str): Directory profiles are written to, created if missing
+
+            name (str): Name used for the profile files
+
+            interval (float): Seconds between stack samples
+
+            tracked_functions (List[str]): Function names reported in the summary
+
+        """
+        self.directory = directory
+        self.name = name
+        self.interval = interval
+        self.tracked_functions = tracked_functions
+        self._profile = cProfile.Profile()
+        self._worker_profiles = {}
+        self._worker_stats = {}
+        self._stacks = Counter()
+        self._samples = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._stop_event = threading.Event()
+        self._dump_requested = threading.Event()
+        self._sampler = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self) -> None:
+        """Start profiling the calling thread and sampling all threads.
+
+        """
+        self._running = True
+        self._stop_event.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, name=f"{self.name}-sampler", daemon=True
+        )
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling and write the profiles. Must be called from the thread
+        that started the profiler.
+
+        """
+        self._profile.disable()
+        self._running = False
+        self._stop_event.set()
+
+        if self._sampler is not None:
+            self._sampler.join()
+
+        self.dump()
+
+    @contextmanager
+    def profile_worker(self):
+        """Context manager profiling the calling thread, e.g. while a pool worker
+        runs a task. Statistics of each worker thread accumulate over its tasks and
+        are merged into the dumped profile.
+
+        """
+        ident = threading.get_ident()
+
+        with self._lock:
+            profile = self._worker_profiles.get(ident)
+            if profile is None:
+                profile = cProfile.Profile()
+                self._worker_profiles[ident] = profile
+
+        profile.enable()
+
+        try:
+            yield
+
+        finally:
+            profile.disable()
+
+            # profilers may only be read from their own thread
+            stats = pstats.Stats(profile)
+            with self._lock:
+                self._worker_stats[ident] = stats
+
+    def request_dump(self) -> None:
+        """Request the profiles be written by the profiled thread. Safe to call from
+        signal handlers and other threads.
+
+        """
+        self._dump_requested.set()
+
+    def check_dump(self) -> None:
+        """Write the profiles if a dump has been requested. Called periodically from
+        the profiled thread.
+
+        """
+        if self._dump_requested.is_set():
+            self._dump_requested.clear()
+            self.dump()
+
+    def dump(self) -> None:
+        """Write the pstats, collapsed stack, and summary files. Must be called from
+        the profiled thread.
+
+        """
+        path = os.path.join(self.directory, self.name)
+
+        # creating stats disables the profiler
+        stats = pstats.Stats(self._profile)
+
+        with self._lock:
+            worker_stats = list(self._worker_stats.values())
+            stacks = dict(self._stacks)
+            samples = self._samples
+
+        if worker_stats:
+            stats.add(*worker_stats)
+
+        stats.dump_stats(f"{path}.pstats")
+
+        with open(f"{path}.collapsed", "w") as f:
+            for stack, count in stacks.items():
+                f.write(f"{stack} {count}\n")
+
+        with open(f"{path}_summary.txt", "w") as f:
+            f.write(self.summary(stats, stacks, samples))
+
+        logger.info("Wrote profiles to %s", path)
+
+        if self._running:
+            self._profile.enable()
+
+    def summary(self, stats: pstats.Stats, stacks: dict, samples: int) -> str:
+        """Returns a summary of the hot functions of the deterministic and sampling
+        profiles.
+
+        Args:
+            stats (pstats.Stats): Deterministic profile statistics
+
+            stacks (dict): Number of samples of each collapsed stack
+
+            samples (int): Number of sampling rounds
+
+        """
+        lines = [f"Profile {self.name}", ""]
+
+        # cumulative times of tracked functions
+        lines.append("Tracked functions (deterministic):")
+        lines.append(f"{'calls':>10} {'tottime':>10} {'cumtime':>10}  function")
+        for (filename, lineno, function), entry in stats.stats.items():
+            if function in self.tracked_functions:
+                _, ncalls, tottime, cumtime, _ = entry
+                location = f"{os.path.basename(filename)}:{lineno}"
+                lines.append(
+                    f"{ncalls:>10} {tottime:>10.4f} {cumtime:>10.4f}  "
+                    f"{function} ({location})"
+                )
+
+        lines.append("")
+
+        # top functions by own time
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats("tottime").print_stats(20)
+        lines.append("Top functions by own time (deterministic):")
+        lines.append(stream.getvalue())
+
+        # sampled functions by own and total samples
+        own = Counter()
+        total = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+
+            for frame in set(frames[1:]):
+                total[frame] += count
+
+        lines.append(f"Top functions by own samples ({samples} sampling rounds):")
+        for frame, count in own.most_common(20):
+            lines.append(f"{count:>10}  {frame}")
+
+        lines.append("")
+        lines.append("Top functions by total samples:")
+        for frame, count in total.most_common(20):
+            lines.append(f"{count:>10}  {frame}")
+
+        return "\n".join(lines) + "\n"
+
+    def _sample(self) -> None:
+        """Record the stacks of all other threads at the sampling interval.
+
+        """
+        own_ident = threading.get_ident()
+
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            collapsed = []
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} "
+                        f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                collapsed.append(";".join(reversed(stack)))
+
+            with self._lock:
+                self._stacks.update(collapsed)
+                self._samples += 1
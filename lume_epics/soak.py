@@ -0,0 +1,538 @@
+"""
+The soak module runs long-lived servers under controller-driven traffic to catch
+resource leaks. Traffic runs in separate processes so that client
+leaks are not attributed to the server. The resident memory, open file
+descriptors, and thread counts of the server, protocol, manager, and traffic
+processes are sampled along with the depths of the server queues, and tracemalloc snapshots of each process are compared to
+report the top allocation growth. A soak fails if growth after the warmup period
+passes the configured thresholds.
+
+Process statistics are read from /proc, so soaks are supported on Linux only.
+
+```
+soak = SoakTest(MyModel, "soak", duration=3600)
+report = soak.run()
+
+print(format_report(report))
+assert not report["failures"]
+```
+
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import tracemalloc
+from queue import Empty
+from typing import Dict, List
+
+from lume_epics import loadgen
+from lume_epics.metrics import process_stats
+
+logger = logging.getLogger(__name__)
+
+# maximum growth after warmup before a soak fails
+DEFAULT_THRESHOLDS = {
+    "rss_mb": 50.0,
+    "fds": 10,
+    "threads": 5,
+    "queue_depth": 100,
+}
+
+# frames recorded per tracemalloc allocation
+TRACEMALLOC_FRAMES = 5
+
+# seconds to wait for a process to write its tracemalloc snapshot
+SNAPSHOT_TIMEOUT = 10.0
+
+# directory snapshot requests are written to, inherited by forked processes
+_snapshot_dir = None
+
+
+def sample_process(pid: int) -> dict:
+    """Returns the resident memory in megabytes, number of open file descriptors,
+    and number of threads of a process.
+
+    Args:
+        pid (int): Process id
+
+    """
+    stats = process_stats(pid)
+
+    return {
+        "rss_mb": stats["rss_bytes"] / 1024 ** 2,
+        "fds": stats["fds"],
+        "threads": stats["threads"],
+    }
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{pid}.snapshot")
+
+
+def _dump_snapshot(signum, frame) -> None:
+    """SIGUSR2 handler writing a tracemalloc snapshot of the process.
+
+    """
+    if _snapshot_dir is None or not tracemalloc.is_tracing():
+        return
+
+    path = _snapshot_path(_snapshot_dir, os.getpid())
+
+    # write then rename so readers never load partial snapshots
+    tracemalloc.take_snapshot().dump(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+
+def request_snapshot(directory: str, pid: int) -> tracemalloc.Snapshot:
+    """Requests and loads a tracemalloc snapshot of a process forked after the soak
+    handlers were installed. Returns None if no snapshot was written in time.
+
+    Args:
+        directory (str): Directory snapshots are written to
+
+        pid (int): Process id
+
+    """
+    path = _snapshot_path(directory, pid)
+    if os.path.exists(path):
+        os.remove(path)
+
+    if pid == os.getpid():
+        snapshot = tracemalloc.take_snapshot()
+
+    else:
+        os.kill(pid, signal.SIGUSR2)
+
+        deadline = time.time() + SNAPSHOT_TIMEOUT
+        while not os.path.exists(path):
+            if time.time() > deadline:
+                logger.warning("No tracemalloc snapshot received from process %s.", pid)
+                return None
+
+            time.sleep(0.05)
+
+        snapshot = tracemalloc.Snapshot.load(path)
+
+    # exclude the memory used by tracemalloc itself
+    return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def run_traffic(
+    protocol: str,
+    prefix: str,
+    input_variables: dict,
+    output_variables: dict,
+    put_rate: float,
+    stop_event: multiprocessing.Event,
+    results: multiprocessing.Queue,
+    snapshot_dir: str = None,
+) -> None:
+    """Puts random values to the served inputs at the put rate while recording the
+    scalar outputs in time series monitors, until the stop event is set. The
+    number of puts is put to the results queue.
+
+    Args:
+        protocol (str): Protocol used by the traffic controller ("pva" or "ca")
+
+        prefix (str): Prefix of the served process variables
+
+        input_variables (dict): Dict mapping input variable names to variable
+
+        output_variables (dict): Dict mapping output variable names to variable
+
+        put_rate (float): Puts per second
+
+        stop_event (multiprocessing.Event): Event ending the traffic
+
+        results (multiprocessing.Queue): Queue the number of puts is put to
+
+        snapshot_dir (str): Directory tracemalloc snapshots are written to on
+            SIGUSR2, snapshots are not taken if not provided
+
+    """
+    global _snapshot_dir
+    from lume_epics.client.controller import Controller
+    from lume_epics.client.monitors import PVTimeSeries
+
+    if snapshot_dir is not None:
+        _snapshot_dir = snapshot_dir
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        signal.signal(signal.SIGUSR2, _dump_snapshot)
+
+    controller = Controller(protocol, input_variables, output_variables, prefix)
+    controller.wait_for_connection(timeout=loadgen.CONNECTION_TIMEOUT)
+
+    monitors = [
+        PVTimeSeries(variable, controller)
+        for variable in output_variables.values()
+        if variable.variable_type == "scalar"
+    ]
+
+    put_pvs = loadgen.default_put_pvs(input_variables)
+    period = 1.0 / put_rate if put_rate else None
+    puts = 0
+
+    while put_pvs and period and not stop_event.wait(period):
+        pvname = put_pvs[puts % len(put_pvs)]
+        controller.put(pvname, loadgen.random_value(input_variables[pvname]))
+        puts += 1
+
+    stop_event.wait()
+
+    for monitor in monitors:
+        monitor.close()
+
+    controller.close()
+    results.put(puts)
+
+
+class SoakTest:
+    """
+    Soak test of a server under controller-driven traffic.
+
+    Attributes:
+        model_class (SurrogateModel): Surrogate model class served
+
+        prefix (str): Prefix of the served process variables
+
+        model_kwargs (dict): Kwargs to instantiate model
+
+        protocols (List[str]): Protocols served and driven by traffic
+
+        duration (float): Seconds to run the soak
+
+        interval (float): Seconds between resource samples
+
+        warmup (float): Seconds before the baseline sample, excluding startup
+            allocations from the growth
+
+        put_rate (float): Puts per second of each traffic controller
+
+        thresholds (Dict[str, float]): Maximum growth of "rss_mb", "fds", and
+            "threads" of each process, and maximum "queue_depth" of each queue
+
+        top (int): Number of top allocation differences reported per process
+
+        snapshot_dir (str): Directory tracemalloc snapshots are written to
+
+        server (Server): Server under test, available while running
+
+    """
+
+    def __init__(
+        self,
+        model_class,
+        prefix: str,
+        model_kwargs: dict = {},
+        protocols: List[str] = ["ca", "pva"],
+        duration: float = 60.0,
+        interval: float = 1.0,
+        warmup: float = 5.0,
+        put_rate: float = 10.0,
+        thresholds: Dict[str, float] = None,
+        top: int = 10,
+        snapshot_dir: str = None,
+    ) -> None:
+        """Initialize the soak test.
+
+        Args:
+            model_class (SurrogateModel): Surrogate model class to serve
+
+            prefix (str): Prefix used to format process variables
+
+            model_kwargs (dict): Kwargs to instantiate model
+
+            protocols (List[str]): Protocols served and driven by traffic
+
+            duration (float): Seconds to run the soak
+
+            interval (float): Seconds between resource samples
+
+            warmup (float): Seconds before the baseline sample
+
+            put_rate (float): Puts per second of each traffic controller
+
+            thresholds (Dict[str, float]): Thresholds overriding
+                DEFAULT_THRESHOLDS
+
+            top (int): Number of top allocation differences reported per process
+
+            snapshot_dir (str): Directory tracemalloc snapshots are written to,
+                defaults to a temporary directory
+
+        """
+        if warmup >= duration:
+            raise ValueError("Warmup must be shorter than the soak duration.")
+
+        self.model_class = model_class
+        self.prefix = prefix
+        self.model_kwargs = model_kwargs
+        self.protocols = protocols
+        self.duration = duration
+        self.interval = interval
+        self.warmup = warmup
+        self.put_rate = put_rate
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.top = top
+        self.snapshot_dir = snapshot_dir
+        self.server = None
+
+        self._traffic_processes = {}
+
+    def _processes(self) -> Dict[str, int]:
+        """Returns the ids of the server processes by name.
+
+        """
+        processes = {"server": os.getpid()}
+
+        for protocol in self.protocols:
+            processes[protocol] = getattr(self.server, f"{protocol}_process").pid
+
+        if self.server.manager_pid is not None:
+            processes["manager"] = self.server.manager_pid
+
+        for protocol, process in self._traffic_processes.items():
+            processes[f"traffic_{protocol}"] = process.pid
+
+        return processes
+
+    def _queue_depths(self) -> Dict[str, int]:
+        """Returns the number of messages waiting in each server queue.
+
+        """
+        depths = {"in_queue": self.server.in_queue.qsize()}
+
+        for protocol, queue in self.server.out_queues.items():
+            depths[f"out_queue_{protocol}"] = queue.qsize()
+
+        return depths
+
+    def _snapshots(self, processes: Dict[str, int]) -> dict:
+        return {
+            name: request_snapshot(self.snapshot_dir, pid)
+            for name, pid in processes.items()
+        }
+
+    def run(self) -> dict:
+        """Runs the soak and returns the report. Must be called from the main
+        thread so that snapshot handlers can be installed. Raises a RuntimeError on
+        platforms other than Linux.
+
+        Returns:
+            dict: Dictionary with keys "samples" (list of resource samples),
+                "growth" (maps process name to the growth of each statistic after
+                warmup), "queue_depth" (maps queue to its maximum depth after
+                warmup), "top_allocations" (maps process name to the largest
+                allocation differences after warmup), "puts" (number of traffic
+                puts), and "failures" (list of threshold violations).
+
+        """
+        global _snapshot_dir
+        from lume_epics.epics_server import Server
+
+        # process statistics and queue depths are unavailable elsewhere
+        if not sys.platform.startswith("linux"):
+            raise RuntimeError("Soak tests are only supported on Linux.")
+
+        if self.snapshot_dir is None:
+            import tempfile
+
+            self.snapshot_dir = tempfile.mkdtemp(prefix="lume-epics-soak-")
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        loadgen.use_loopback()
+
+        # processes forked by the server inherit tracing and the handler
+        _snapshot_dir = self.snapshot_dir
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        previous_handler = signal.signal(signal.SIGUSR2, _dump_snapshot)
+
+        context = multiprocessing.get_context("spawn")
+        stop_event = context.Event()
+        results = context.Queue()
+        puts = 0
+
+        samples = []
+        baseline = None
+        baseline_snapshots = None
+
+        try:
+            self.server = Server(
+                self.model_class,
+                self.prefix,
+                protocols=self.protocols,
+                model_kwargs=self.model_kwargs,
+            )
+            self.server.start(monitor=False)
+
+            # spawn traffic so client resources are not counted as the server's
+            for protocol in self.protocols:
+                process = context.Process(
+                    target=run_traffic,
+                    name=f"soak-traffic-{protocol}",
+                    kwargs={
+                        "protocol": protocol,
+                        "prefix": self.prefix,
+                        "input_variables": self.server.input_variables,
+                        "output_variables": self.server.output_variables,
+                        "put_rate": self.put_rate,
+                        "stop_event": stop_event,
+                        "results": results,
+                        "snapshot_dir": self.snapshot_dir,
+                    },
+                    daemon=True,
+                )
+                process.start()
+                self._traffic_processes[protocol] = process
+
+            processes = self._processes()
+
+            start = time.time()
+            while time.time() - start < self.duration:
+                time.sleep(self.interval)
+
+                sample = {
+                    "time": time.time() - start,
+                    "processes": {
+                        name: sample_process(pid) for name, pid in processes.items()
+                    },
+                    "queues": self._queue_depths(),
+                }
+                samples.append(sample)
+
+                if baseline is None and sample["time"] >= self.warmup:
+                    baseline = sample
+                    baseline_snapshots = self._snapshots(processes)
+
+            final_snapshots = self._snapshots(processes)
+
+        finally:
+            stop_event.set()
+
+            # sum the puts reported by each traffic process
+            for _ in self._traffic_processes:
+                try:
+                    puts += results.get(timeout=10)
+
+                except Empty:
+                    logger.error("Traffic process did not report its puts.")
+                    break
+
+            for process in self._traffic_processes.values():
+                process.join(timeout=5)
+
+                if process.is_alive():
+                    process.terminate()
+
+            if self.server is not None:
+                self.server.stop()
+
+            signal.signal(signal.SIGUSR2, previous_handler)
+            tracemalloc.stop()
+            _snapshot_dir = None
+
+        report = self.analyze(samples, baseline)
+        report["puts"] = puts
+        report["top_allocations"] = {
+            name: [
+                str(stat)
+                for stat in final_snapshots[name].compare_to(
+                    baseline_snapshots[name], "lineno"
+                )[: self.top]
+            ]
+            for name in processes
+            if baseline_snapshots
+            and baseline_snapshots.get(name) is not None
+            and final_snapshots.get(name) is not None
+        }
+
+        return report
+
+    def analyze(self, samples: List[dict], baseline: dict) -> dict:
+        """Computes resource growth after warmup and checks it against the
+        thresholds.
+
+        Args:
+            samples (List[dict]): Resource samples
+
+            baseline (dict): Sample taken at the end of warmup
+
+        """
+        growth = {}
+        queue_depth = {}
+        failures = []
+
+        if baseline is None or not samples:
+            return {
+                "samples": samples,
+                "growth": growth,
+                "queue_depth": queue_depth,
+                "failures": ["No samples were taken after warmup."],
+            }
+
+        after_warmup = samples[samples.index(baseline) :]
+        final = after_warmup[-1]
+
+        for name, start in baseline["processes"].items():
+            growth[name] = {
+                key: final["processes"][name][key] - start[key] for key in start
+            }
+
+            for key, value in growth[name].items():
+                if value > self.thresholds[key]:
+                    failures.append(
+                        f"{name} {key} grew by {value:.1f}, "
+                        f"threshold {self.thresholds[key]}"
+                    )
+
+        for queue in baseline["queues"]:
+            queue_depth[queue] = max(sample["queues"][queue] for sample in after_warmup)
+
+            if queue_depth[queue] > self.thresholds["queue_depth"]:
+                failures.append(
+                    f"{queue} reached depth {queue_depth[queue]}, "
+                    f"threshold {self.thresholds['queue_depth']}"
+                )
+
+        return {
+            "samples": samples,
+            "growth": growth,
+            "queue_depth": queue_depth,
+            "failures": failures,
+        }
+
+
+def format_report(report: dict) -> str:
+    """Formats a soak report for printing.
+
+    Args:
+        report (dict): Report returned by SoakTest.run
+
+    """
+    lines = [f"Samples: {len(report['samples'])}, puts: {report.get('puts', 0)}"]
+
+    for name, growth in report["growth"].items():
+        lines.append(
+            f"{name}: rss {growth['rss_mb']:+.1f} MB, fds {growth['fds']:+d}, "
+            f"threads {growth['threads']:+d}"
+        )
+
+    for queue, depth in report["queue_depth"].items():
+        lines.append(f"{queue}: max depth {depth}")
+
+    for name, allocations in report.get("top_allocations", {}).items():
+        lines.append(f"Top allocation growth in {name}:")
+        lines.extend(f"    {allocation}" for allocation in allocations)
+
+    if report["failures"]:
+        lines.append("FAILED:")
+        lines.extend(f"    {failure}" for failure in report["failures"])
+
+    else:
+        lines.append("PASSED")
+
+    return "\n".join(lines)
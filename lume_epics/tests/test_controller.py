@@ -51,3 +51,39 @@ def test_controller_image_update_ca(
             x_max=var.x_max,
             y_max=var.y_max,
         )
+
+
+def test_controller_wait_for_connection(ca_controller, model):
+    status = ca_controller.wait_for_connection(timeout=5.0)
+
+    assert not status["failed"]
+
+    for variable in {**model.input_variables, **model.output_variables}.values():
+        for pvname in ca_controller._registry_names(variable.name):
+            assert pvname in status["connection_times"]
+
+
+@pytest.mark.parametrize("value", [(2.0), (4.0)])
+def test_controller_put_and_wait(value, ca_controller):
+    values, latency = ca_controller.put_and_wait(
+        {"input1": value}, ["output1"], timeout=5.0
+    )
+
+    assert values["output1"] == value * 2
+    assert latency > 0
+
+
+def test_controller_stats(ca_controller):
+    ca_controller.put_and_wait({"input1": 1.0}, ["output1"], timeout=5.0)
+    stats = ca_controller.stats()
+
+    assert stats["output1"]["count"] > 0
+    assert stats["output1"]["bytes"] > 0
+    assert stats["output1"]["since_last"] >= 0
+    assert ca_controller.last_output_update != ""
+
+
+def test_variable_name(ca_controller):
+    assert ca_controller.variable_name("output3:ArrayData_RBV") == "output3"
+    assert ca_controller.variable_name("output4:ArraySize_RBV") == "output4"
+    assert ca_controller.variable_name("input1") == "input1"
@@ -0,0 +1,62 @@
+import threading
+
+from bokeh.document import Document
+
+from lume_epics.client.hub import DataHub
+from lume_epics.client.utils import render_from_yaml
+
+
+def test_hub_shares_controller(model, prefix, protocol):
+    hub = DataHub()
+
+    controller = hub.acquire_controller(
+        protocol, model.input_variables, model.output_variables, prefix
+    )
+    shared = hub.acquire_controller(
+        protocol, model.input_variables, model.output_variables, prefix
+    )
+    assert controller is shared
+    assert list(hub.stats().values()) == [2]
+
+    hub.release_controller(controller)
+    assert list(hub.stats().values()) == [1]
+
+    hub.release_controller(shared)
+    assert hub.stats() == {}
+
+
+def test_cached_payload(ca_controller):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return len(builds)
+
+    assert ca_controller.cached_payload("test", ["input1"], build) == 1
+    assert ca_controller.cached_payload("test", ["input1"], build) == 1
+    assert len(builds) == 1
+
+
+def test_session_destroyed_releases_resources(rootdir, prefix, protocol):
+    hub = DataHub()
+    doc = Document()
+    existing = set(threading.enumerate())
+
+    render_from_yaml(
+        f"{rootdir}/examples/files/demo_config.yml", prefix, protocol, hub=hub, doc=doc
+    )
+    assert list(hub.stats().values()) == [1]
+
+    throttlers = [
+        thread
+        for thread in set(threading.enumerate()) - existing
+        if thread.name == "put-throttler"
+    ]
+    assert throttlers
+
+    # called by the bokeh server when the session closes
+    for callback in doc.session_destroyed_callbacks:
+        callback(None)
+
+    assert hub.stats() == {}
+    assert not any(thread.is_alive() for thread in throttlers)
@@ -0,0 +1,52 @@
+import sys
+import subprocess
+import pytest
+
+IMPORT_SCRIPT = """
+import sys
+import time
+
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+
+print(elapsed)
+print(",".join(name for name in {backends} if name in sys.modules))
+"""
+
+BACKENDS = ["epics", "p4p", "pcaspy"]
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "lume_epics.client.controller",
+        "lume_epics.epics_server",
+        "lume_epics.commands.serve_from_template",
+        "lume_epics.commands.render_from_template",
+    ],
+)
+def test_entry_point_import(module, record_property):
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module, backends=BACKENDS)],
+        universal_newlines=True,
+    )
+    elapsed, loaded = output.strip().split("\n")[-2:]
+
+    # import time reported in the junit xml for tracking
+    record_property("import_time", float(elapsed))
+
+    # protocol backends are imported only when a protocol is used
+    assert loaded == ""
+
+
+def test_server_import_sets_no_start_method():
+    script = (
+        "import multiprocessing\n"
+        "import lume_epics.epics_server\n"
+        "print(multiprocessing.get_start_method(allow_none=True))"
+    )
+    output = subprocess.check_output(
+        [sys.executable, "-c", script], universal_newlines=True
+    )
+    assert output.strip().split("\n")[-1] == "None"
@@ -0,0 +1,54 @@
+from lume_epics import loadgen
+from lume_epics.model import LatencyHistogram
+
+
+def test_default_put_pvs(model):
+    assert loadgen.default_put_pvs(model.input_variables) == ["input1"]
+
+
+def test_summarize():
+    reports = []
+    for latency in [0.01, 0.02]:
+        histogram = LatencyHistogram()
+        histogram.observe(latency)
+
+        reports.append(
+            {
+                "puts": 10,
+                "timeouts": 1,
+                "missed": 2,
+                "failed_connections": 0,
+                "disconnects": 0,
+                "latency": histogram,
+                "monitor_updates": 20,
+                "monitor_bytes": 160,
+            }
+        )
+
+    report = loadgen.summarize(reports, duration=2.0)
+
+    assert report["puts"] == 20
+    assert report["put_rate"] == 10.0
+    assert report["timeouts"] == 2
+    assert report["missed"] == 4
+    assert report["latency"]["count"] == 2
+    assert report["monitor_rate"] == 20.0
+
+    assert "Puts: 20" in loadgen.format_report(report)
+
+    # round trips of several clients may end on each other's evaluations
+    report["latency_exact"] = False
+    assert "Approximate" in loadgen.format_report(report)
+
+
+def test_latency_window():
+    start = LatencyHistogram(buckets=(0.1, 1.0))
+    start.observe(0.05)
+
+    end = LatencyHistogram(buckets=(0.1, 1.0))
+    end.observe(0.05)
+    end.observe(0.5)
+
+    window = loadgen._latency_window(start, end)
+    assert window.counts == [0, 1, 0]
+    assert window.count == 1
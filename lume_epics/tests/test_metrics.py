@@ -0,0 +1,55 @@
+import os
+import sys
+import pytest
+from lume_epics import metrics
+from lume_epics.model import LatencyHistogram
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Reads /proc")
+def test_process_stats():
+    stats = metrics.process_stats(os.getpid())
+
+    assert stats["rss_bytes"] > 0
+    assert stats["cpu_seconds"] > 0
+    assert stats["threads"] >= 1
+
+
+def test_queue_depth():
+    class UnsupportedQueue:
+        def qsize(self):
+            raise NotImplementedError
+
+    # qsize is not implemented on macOS
+    assert metrics.queue_depth(UnsupportedQueue()) is None
+
+
+def test_format_histogram():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for latency in [0.05, 0.5, 2.0]:
+        histogram.observe(latency)
+
+    lines = metrics._format_histogram(
+        "latency_seconds", "Latency.", {(("prefix", "test"),): histogram}
+    )
+
+    assert 'latency_seconds_bucket{prefix="test",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{prefix="test",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{prefix="test",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{prefix="test"} 3' in lines
+
+
+def test_metrics_server(model):
+    from urllib.request import urlopen
+    from lume_epics.epics_server import Server
+
+    server = Server(model, "metrics_test", protocols=["ca"])
+    metrics_server = metrics.MetricsServer(server, port=0)
+    metrics_server.start()
+
+    try:
+        body = urlopen(f"http://127.0.0.1:{metrics_server.port}/metrics").read()
+
+    finally:
+        metrics_server.stop()
+
+    assert b'lume_epics_evaluations_total{prefix="metrics_test"} 1' in body
@@ -0,0 +1,110 @@
+import pickle
+import time
+import pytest
+
+from lume_epics.model import LatencyHistogram, OnlineSurrogateModel
+
+
+class SlowModel:
+    input_variables = {}
+    output_variables = {}
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.evaluated = []
+
+    def evaluate(self, input_variables):
+        self.evaluated.append([variable.value for variable in input_variables])
+
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+
+        # models may modify the inputs they evaluate
+        for variable in input_variables:
+            variable.value = None
+
+        return []
+
+
+class Input:
+    def __init__(self, value):
+        self.value = value
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+
+    for latency in [0.05, 0.05, 0.5, 2.0]:
+        histogram.observe(latency)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.99) == 2.0
+
+
+def test_online_model_latency(model):
+    online_model = OnlineSurrogateModel(model())
+    online_model.warmup()
+
+    # warmup evaluations are not recorded
+    assert online_model.latency.count == 0
+
+    online_model.run(list(online_model.model.input_variables.values()))
+    assert online_model.latency.count == 1
+
+
+def test_online_model_timeout():
+    online_model = OnlineSurrogateModel(SlowModel([0.5]), timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        online_model.run([])
+
+    # the timed out evaluation still occupies the worker
+    with pytest.raises(TimeoutError):
+        online_model.run([])
+
+    time.sleep(0.5)
+    online_model.run([])
+    assert online_model.timeouts == 2
+
+    online_model.close()
+
+
+def test_online_model_evaluates_rejected():
+    model = SlowModel([0.3])
+    outputs = []
+    online_model = OnlineSurrogateModel(model, timeout=0.1, callback=outputs.append)
+    input_variables = [Input(1)]
+
+    for value in [1, 2, 3]:
+        input_variables[0].value = value
+
+        with pytest.raises(TimeoutError):
+            online_model.run(input_variables)
+
+    time.sleep(0.5)
+
+    # the newest rejected inputs are evaluated once the timed out evaluation ends
+    assert model.evaluated == [[1], [3]]
+    assert outputs == [[]]
+
+    # evaluations run on copies of the inputs
+    assert input_variables[0].value == 3
+
+    online_model.close()
+
+
+def test_latency_histogram_merge():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+
+    other = pickle.loads(pickle.dumps(LatencyHistogram(buckets=(0.1, 1.0))))
+    other.observe(2.0)
+
+    histogram.merge(other)
+    assert histogram.counts == [1, 0, 1]
+    assert histogram.max == 2.0
+
+    with pytest.raises(ValueError):
+        histogram.merge(LatencyHistogram(buckets=(1.0,)))
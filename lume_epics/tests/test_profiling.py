@@ -0,0 +1,58 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lume_epics.profiling import Profiler
+
+
+def evaluate():
+    return sum(i * i for i in range(10000))
+
+
+def test_profiler_dump(tmp_path):
+    profiler = Profiler(str(tmp_path), "test_thread")
+
+    def run():
+        profiler.start()
+        for _ in range(20):
+            evaluate()
+            profiler.check_dump()
+
+        profiler.stop()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+    for suffix in [".pstats", ".collapsed", "_summary.txt"]:
+        assert os.path.exists(os.path.join(str(tmp_path), f"test_thread{suffix}"))
+
+    with open(os.path.join(str(tmp_path), "test_thread_summary.txt")) as f:
+        assert "evaluate" in f.read()
+
+
+def test_profiler_merges_workers(tmp_path):
+    profiler = Profiler(str(tmp_path), "pool_thread")
+
+    def run_evaluation():
+        with profiler.profile_worker():
+            evaluate()
+
+    def run():
+        profiler.start()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for _ in range(4):
+                executor.submit(run_evaluation)
+
+        profiler.stop()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+    with open(os.path.join(str(tmp_path), "pool_thread_summary.txt")) as f:
+        summary = f.read()
+
+    # evaluations on the pool are recorded by the deterministic profiler
+    tracked = summary.split("Tracked functions")[1].split("Top functions")[0]
+    assert "evaluate" in tracked
@@ -0,0 +1,46 @@
+import pytest
+
+from lume_epics.client.recorder import Recorder, Replayer, ReplayController
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory, ca_controller):
+    directory = str(tmp_path_factory.mktemp("recording"))
+
+    recorder = Recorder(directory, chunk_size=1024 * 1024)
+    recorder.attach(ca_controller)
+
+    for value in [1.0, 3.0]:
+        ca_controller.put_and_wait({"input1": value}, ["output1"], timeout=5.0)
+
+    recorder.close()
+
+    return directory
+
+
+def test_replayer_records(recording):
+    replayer = Replayer(recording)
+
+    assert replayer.protocol == "ca"
+
+    output_values = [
+        value for _, pvname, value in replayer.records() if pvname == "output1"
+    ]
+
+    assert output_values[-2:] == [2.0, 6.0]
+
+
+def test_replay_controller(recording, model):
+    controller = ReplayController(
+        recording, model.input_variables, model.output_variables
+    )
+
+    updates = []
+    controller.add_callback(lambda pvname, value, timestamp: updates.append(pvname))
+
+    controller.play(speed=None)
+
+    assert "output1" in updates
+    assert controller.get_value("output1") == 6.0
+
+    controller.close()
@@ -0,0 +1,36 @@
+import time
+import epics
+from bokeh.document import Document
+
+from lume_epics.client.scheduler import DashboardScheduler
+
+
+def test_scheduler_skips_unchanged(ca_controller, prefix):
+    calls = []
+    scheduler = DashboardScheduler(ca_controller, doc=Document())
+    scheduler.add(lambda: calls.append(1), pvnames=["input1"])
+
+    scheduler.tick()
+    scheduler.tick()
+    assert len(calls) == 1
+
+    epics.caput(f"{prefix}:input1", 3.0)
+    time.sleep(0.5)
+
+    scheduler.tick()
+    assert len(calls) == 2
+    assert scheduler.stats()["ticks"] == 3
+    assert scheduler.stats()["skipped"] == 1
+
+
+def test_scheduler_intervals(ca_controller):
+    calls = []
+    scheduler = DashboardScheduler(ca_controller, period=250, doc=Document())
+    scheduler.add(lambda: calls.append("scalar"), interval=250)
+    scheduler.add(lambda: calls.append("image"), interval=1000)
+
+    for _ in range(8):
+        scheduler.tick()
+
+    assert calls.count("scalar") == 8
+    assert calls.count("image") == 2
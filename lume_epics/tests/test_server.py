@@ -1,4 +1,5 @@
 import numpy as np
+import copy
 import time
 import pytest
 import subprocess
@@ -99,4 +100,72 @@ def test_constant_variable_pva(value, prefix, server, model):
             else:
                 assert val == value
 
-    ctxt.close()
\ No newline at end of file
+    ctxt.close()
+
+
+class MismatchedModel(SurrogateModel):
+    input_variables = {
+        "input1": ScalarInputVariable(name="input1", default=1.0, range=[0, 5])
+    }
+    output_variables = {"output1": ScalarOutputVariable(name="output1")}
+
+    def evaluate(self, input_variables):
+        return list(self.output_variables.values())
+
+
+def test_reload_model(model):
+    class ReloadedModel(model):
+        def __init__(self):
+            self.input_variables = copy.deepcopy(model.input_variables)
+            self.output_variables = copy.deepcopy(model.output_variables)
+
+            for variable in self.input_variables.values():
+                variable.value = None
+
+    server = epics_server.Server(model, "reload_test", protocols=["ca"])
+    previous = server.online_model
+    server.input_variables["input1"].value = 3.0
+
+    with pytest.raises(ValueError):
+        server.reload_model(MismatchedModel, block=True)
+
+    assert server.online_model is previous
+
+    # the reloaded model is swapped in by the evaluation pool
+    server.reload_model(ReloadedModel, block=True)
+    server._executor.shutdown(wait=True)
+
+    assert server.online_model is not previous
+    assert server.model is server.online_model.model
+
+    # the variables of the reloaded model are served with the current inputs
+    assert server.input_variables["input1"] is server.model.input_variables["input1"]
+    assert server.input_variables["input1"].value == 3.0
+    assert (
+        server.output_variables["output1"] is server.model.output_variables["output1"]
+    )
+
+    # reloaded models are warmed up before the swap
+    assert server.online_model.warmup_time > 0
+
+
+def test_multiple_models(model):
+    server = epics_server.Server(
+        model,
+        "multi_test_1",
+        protocols=["ca"],
+        models={"multi_test_2": (MismatchedModel, {})},
+    )
+
+    assert list(server.models) == ["multi_test_1", "multi_test_2"]
+    assert server.prefix == "multi_test_1"
+    assert server.model is server.models["multi_test_1"].model
+    assert list(server.ca_process._variables) == ["multi_test_1", "multi_test_2"]
+
+    with pytest.raises(ValueError):
+        epics_server.Server(
+            model,
+            "multi_test_1",
+            protocols=["ca"],
+            models={"multi_test_1": (model, {})},
+        )
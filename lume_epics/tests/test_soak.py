@@ -0,0 +1,41 @@
+import os
+import sys
+import pytest
+from lume_epics import soak
+
+
+def sample(t, rss_mb, fds, threads, depth):
+    return {
+        "time": t,
+        "processes": {"server": {"rss_mb": rss_mb, "fds": fds, "threads": threads}},
+        "queues": {"in_queue": depth},
+    }
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Reads /proc")
+def test_sample_process():
+    stats = soak.sample_process(os.getpid())
+
+    assert stats["rss_mb"] > 0
+    assert stats["fds"] > 0
+    assert stats["threads"] >= 1
+
+
+def test_analyze():
+    test = soak.SoakTest(None, "soak", duration=10, warmup=1, thresholds={"fds": 2})
+
+    samples = [sample(0, 100, 10, 4, 0), sample(1, 110, 12, 4, 0)]
+    samples += [sample(t, 120, 14, 4, 1) for t in range(2, 10)]
+
+    report = test.analyze(samples, samples[1])
+
+    assert report["growth"]["server"] == {"rss_mb": 10, "fds": 2, "threads": 0}
+    assert report["queue_depth"] == {"in_queue": 1}
+    assert not report["failures"]
+
+    # file descriptors leaking past the threshold
+    samples.append(sample(10, 120, 20, 4, 1))
+    report = test.analyze(samples, samples[1])
+
+    assert len(report["failures"]) == 1
+    assert "fds" in report["failures"][0]
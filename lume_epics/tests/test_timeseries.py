@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from lume_epics.client.timeseries import RingBuffer, TimeSeriesStore
+
+
+@pytest.mark.parametrize("n_values", [(3), (5), (12)])
+def test_ring_buffer_view(n_values):
+    buffer = RingBuffer(capacity=5)
+
+    for value in range(n_values):
+        buffer.append(value)
+
+    expected = np.arange(n_values)[-5:]
+
+    assert len(buffer) == len(expected)
+    assert (buffer.view() == expected).all()
+    assert (buffer.view(2) == expected[-2:]).all()
+
+
+def test_ring_buffer_view_is_not_copy():
+    buffer = RingBuffer(capacity=5)
+
+    for value in range(7):
+        buffer.append(value)
+
+    assert np.shares_memory(buffer.view(), buffer._data)
+    assert not buffer.view().flags.writeable
+
+
+def test_ring_buffer_reset():
+    buffer = RingBuffer(capacity=5)
+    buffer.append(1)
+    buffer.reset()
+
+    assert len(buffer) == 0
+    assert len(buffer.view()) == 0
+
+
+@pytest.mark.parametrize("seconds", [(10), (600), (3600)])
+def test_time_series_store_window(seconds):
+    store = TimeSeriesStore(capacity=1000)
+
+    # one hour at 10 Hz
+    for i in range(36000):
+        store.append(i * 0.1, np.sin(i / 100.0))
+
+    ts, ys = store.window(seconds, 400)
+
+    assert 0 < len(ts) <= 400
+    assert len(ts) == len(ys)
+    assert (np.diff(ts) >= 0).all()
+    assert ts[0] >= 3600 - seconds - 600
+
+
+@pytest.mark.parametrize("aggregate", [("minmax"), ("mean")])
+def test_time_series_store_decimates_raw(aggregate):
+    store = TimeSeriesStore(capacity=1000, resolutions=())
+
+    for i in range(1000):
+        store.append(i * 0.1, np.sin(i / 10.0))
+
+    ts, ys = store.window(100, 100, aggregate=aggregate)
+
+    assert 0 < len(ts) <= 100
+    assert len(ts) == len(ys)
+    assert (np.diff(ts) >= 0).all()
+
+    # extremes of the raw samples are kept
+    if aggregate == "minmax":
+        assert ys.max() == store.data.view().max()
+        assert ys.min() == store.data.view().min()
@@ -2,12 +2,13 @@ import numpy as np
 import pytest
 import epics
 import time
+import warnings
 
 from bokeh.palettes import YlGn3
 from bokeh.models import LinearColorMapper
 
 from lume_model.variables import ImageOutputVariable
-from lume_epics.client.widgets.plots import ImagePlot
+from lume_epics.client.widgets.plots import ImagePlot, NAN_COLOR
 
 
 @pytest.fixture(scope="session")
@@ -47,3 +48,44 @@ def test_image_plot_update(image_plot, image_vars, prefix, server, ca_controller
         val = image_plot.source.data["image"][0]
 
         assert (updated_vals[var.name] == val).all
+
+
+def test_image_plot_skips_unchanged(image_plot):
+    image_plot.update()
+    image_column = image_plot.source.data["image"]
+
+    # no new monitor updates, so the data source is left untouched
+    image_plot.update()
+
+    assert image_plot.source.data["image"] is image_column
+
+
+def test_image_plot_rgba(ca_controller, server, image_vars):
+    float_plot = ImagePlot(image_vars, ca_controller, palette=YlGn3)
+    rgba_plot = ImagePlot(image_vars, ca_controller, palette=YlGn3, rgba=True)
+
+    float_plot.update()
+    rgba_plot.update()
+
+    float_image = float_plot.source.data["image"][0]
+    rgba_image = rgba_plot.source.data["image"][0]
+
+    assert rgba_image.dtype == np.uint32
+    assert rgba_image.shape == float_image.shape
+    assert rgba_image.nbytes * 2 == float_image.astype(np.float64).nbytes
+
+
+def test_image_plot_rgba_nan(ca_controller, image_vars):
+    rgba_plot = ImagePlot(image_vars, ca_controller, palette=YlGn3, rgba=True)
+
+    image = np.arange(6, dtype=np.float64).reshape(2, 3)
+    image[0, 1] = np.nan
+
+    # NaN pixels must not be cast to palette indices
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        rgba_image = rgba_plot._colormap(image)
+
+    # oriented pixel of image[0, 1]
+    assert rgba_image[1, 0] == NAN_COLOR
+    assert (rgba_image == NAN_COLOR).sum() == 1
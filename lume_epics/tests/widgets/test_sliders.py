@@ -35,7 +35,22 @@ def test_slider_set(value, slider_variables, prefix, sliders):
 
     for slider in sliders:
         slider.bokeh_slider.value = value
+        slider.throttler.flush(timeout=1.0)
 
     for var in slider_variables:
         val = epics.caget(f"{prefix}:{var.name}")
         assert val == value
+
+
+def test_slider_update_does_not_put(slider_variables, sliders, ca_controller):
+    for slider in sliders:
+        slider.update()
+
+    versions = [ca_controller.get_version(var.name) for var in slider_variables]
+
+    # refreshing unchanged sliders must not write back to the server
+    for slider in sliders:
+        slider._version = None
+        slider.update()
+
+    assert versions == [ca_controller.get_version(var.name) for var in slider_variables]
@@ -1,6 +1,7 @@
 import pytest
 import epics
 import time
+from bokeh.models import ColumnDataSource
 from lume_epics.client.widgets.tables import ValueTable
 
 
@@ -43,3 +44,30 @@ def test_value_table_update(
         val = value_table._source.data["y"][val_idx]
 
         assert epics_val == float(val)
+
+
+def test_value_table_patches_changed_rows(ca_controller, table_variables, monkeypatch):
+    table = ValueTable(table_variables, ca_controller)
+
+    values = {var.name: 1.0 for var in table_variables}
+    for pvname, monitor in table._pv_monitors.items():
+        monkeypatch.setattr(monitor, "poll", lambda pvname=pvname: values[pvname])
+
+    patches = []
+    monkeypatch.setattr(
+        ColumnDataSource, "patch", lambda self, patch: patches.append(patch)
+    )
+
+    table.update()
+    assert len(patches[-1]["y"]) == len(table_variables)
+
+    # unchanged values send nothing
+    table.update()
+    assert len(patches) == 1
+
+    # only the changed row is patched
+    changed = table_variables[0].name
+    values[changed] = 2.0
+    table.update()
+
+    assert patches[-1] == {"y": [(table._pvnames.index(changed), "2.0")]}
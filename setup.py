@@ -30,6 +30,8 @@ setup(
     entry_points={
         "console_scripts": [
         "render-from-template=lume_epics.commands.render_from_template:render_from_template",
-        "serve-from-template=lume_epics.commands.serve_from_template:serve_from_template"]
+        "serve-from-template=lume_epics.commands.serve_from_template:serve_from_template",
+        "generate-load=lume_epics.commands.generate_load:generate_load",
+        "soak-test=lume_epics.commands.soak_test:soak_test"]
     },
 )
\ No newline at end of file